@@ -27,6 +27,8 @@ def create_app(config_name=None):
     
     from config import config
     app.config.from_object(config[config_name])
+    # Worker processes rebuild the app from the same configuration
+    app.config['CONFIG_NAME'] = config_name
     
     # Set secret key
     app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
@@ -65,6 +67,10 @@ def create_app(config_name=None):
     # Register global context processors
     register_context_processors(app)
     
+    # Register CLI commands
+    from app.cli.commands import register_commands
+    register_commands(app)
+    
     @login_manager.user_loader
     def load_user(user_id):
         from app.models import User
@@ -92,6 +98,7 @@ def create_app(config_name=None):
     from app.routes.reminders import reminders_bp
     from app.routes.notifications import notifications_bp
     from app.routes.health import health_bp
+    from app.routes.jobs import jobs_bp
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(dashboard_bp)
@@ -106,6 +113,7 @@ def create_app(config_name=None):
     app.register_blueprint(reminders_bp)
     app.register_blueprint(notifications_bp)
     app.register_blueprint(health_bp)
+    app.register_blueprint(jobs_bp)
     
     # Create database tables
     with app.app_context():
@@ -113,6 +121,10 @@ def create_app(config_name=None):
         from app.models import employee as _employee  # imported for side effects
         assert _employee
         db.create_all()
+
+        # Choose the employee search backend and create its index
+        from app.services.employee_search import init_employee_search
+        init_employee_search(app, db)
         
         # Initialize sample data only for existing demo companies
         from app.services.employee_service import EmployeeService as _EmployeeService
@@ -121,6 +133,10 @@ def create_app(config_name=None):
         # to prevent demo employees appearing in new user companies
         # EmployeeService.initialize_sample_data()
     
+    # In-process employee typeahead indexes
+    from app.services.employee_typeahead import init_employee_typeahead
+    init_employee_typeahead(app)
+    
     # Root route redirect with authentication
     @app.route('/')
     def index():
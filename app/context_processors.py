@@ -1,5 +1,6 @@
 from flask import session
 from app.services.sars_service import SARSService
+from app.services.sars_config_resolver import SARSConfigResolver
 
 
 def register_context_processors(app):
@@ -11,7 +12,7 @@ def register_context_processors(app):
         if company_id:
             sars_config = SARSService.get_company_sars_config(company_id)
         else:
-            sars_config = SARSService.get_global_sars_config().to_dict()
+            sars_config = SARSConfigResolver.resolve_global()
         return {'sars_config': sars_config}
 
 
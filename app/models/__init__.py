@@ -2,7 +2,11 @@
 from app.models.company import Company
 from app.models.user import User, user_company
 from app.models.employee import Employee
+from app.models.employee_id_sequence import EmployeeIdSequence
 from app.models.payroll_entry import PayrollEntry
+from app.models.payroll_entry_deduction import PayrollEntryDeduction
+from app.models.payroll_period_summary import PayrollPeriodSummary
+from app.models.ytd_ledger import YtdLedger
 from app.models.beneficiary import Beneficiary
 from app.models.employee_recurring_deduction import EmployeeRecurringDeduction
 from app.models.company_deduction_default import CompanyDeductionDefault
@@ -14,13 +18,21 @@ from app.models.compliance import ComplianceReminderRule
 from app.models.document_template import DocumentTemplate
 from app.models.ui19_record import UI19Record
 from app.models.company_department import CompanyDepartment
+from app.models.tax_table import TaxTable, TaxBracket
+from app.models.job import Job
+from app.models.cache_version import CacheVersion
+from app.models.import_batch import ImportBatch, ImportRow
 
 __all__ = [
     'Company',
     'User',
     'user_company',
     'Employee',
+    'EmployeeIdSequence',
     'PayrollEntry',
+    'PayrollEntryDeduction',
+    'PayrollPeriodSummary',
+    'YtdLedger',
     'Beneficiary',
     'EmployeeRecurringDeduction',
     'CompanyDeductionDefault',
@@ -33,4 +45,10 @@ __all__ = [
     'DocumentTemplate',
     'UI19Record',
     'CompanyDepartment',
+    'TaxTable',
+    'TaxBracket',
+    'Job',
+    'CacheVersion',
+    'ImportBatch',
+    'ImportRow',
 ]
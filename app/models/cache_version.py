@@ -0,0 +1,89 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import case, select
+from app import db
+from app.services.bulk_upsert import upsert_statement
+
+
+class CacheVersion(db.Model):
+    """Shared version counter for a namespace of cached values
+
+    Cached values embed their namespace's version in the cache key, so a
+    bump makes every process miss and recompute. The counters live in the
+    database because the default Flask-Caching backend is per process.
+    Each process remembers the versions it read for ``CACHE_VERSION_TTL``
+    seconds, which bounds how long other processes serve stale values.
+    """
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    DEFAULT_TTL = 5
+
+    _lock = threading.Lock()
+
+    def __repr__(self):
+        return f'<CacheVersion {self.name} {self.version}>'
+
+    @staticmethod
+    def _remembered():
+        """``{name: (version, read_at)}`` for the current application"""
+        return current_app.extensions.setdefault('cache_versions', {})
+
+    @classmethod
+    def current(cls, names):
+        """Versions of several namespaces, reading the database at most once per TTL
+
+        Namespaces that were never bumped are at version 0.
+        """
+        ttl = current_app.config.get('CACHE_VERSION_TTL', cls.DEFAULT_TTL)
+        remembered = cls._remembered()
+        now = time.monotonic()
+        versions = {}
+        stale = []
+        for name in dict.fromkeys(names):
+            entry = remembered.get(name)
+            if entry and now - entry[1] < ttl:
+                versions[name] = entry[0]
+            else:
+                stale.append(name)
+
+        if stale:
+            stored = dict(db.session.execute(select(cls.name, cls.version).where(cls.name.in_(stale))).all())
+            with cls._lock:
+                for name in stale:
+                    versions[name] = stored.get(name, 0)
+                    remembered[name] = (versions[name], now)
+        return versions
+
+    @classmethod
+    def bump(cls, names):
+        """Move the namespaces to new versions in their own committed transaction
+
+        The new version is the larger of the clock in milliseconds and the
+        old version plus one, so bumps on a recreated table do not reuse
+        versions handed out before. This process sees the change at once,
+        the others when their remembered versions expire.
+        """
+        names = sorted(set(names))
+        if not names:
+            return
+        now_ms = int(time.time() * 1000)
+        stmt = upsert_statement(cls, ('name',), combine={'version': _next_version})
+        with db.engine.begin() as connection:
+            connection.execute(stmt, [{'name': name, 'version': now_ms} for name in names])
+        cls.forget(names)
+
+    @classmethod
+    def forget(cls, names):
+        """Drop remembered versions so the next lookup reads the database"""
+        remembered = cls._remembered()
+        with cls._lock:
+            for name in names:
+                remembered.pop(name, None)
+
+
+def _next_version(stored, incoming):
+    return case((stored + 1 > incoming, stored + 1), else_=incoming)
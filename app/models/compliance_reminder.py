@@ -5,12 +5,15 @@ class ComplianceReminder(db.Model):
     """ComplianceReminder model for managing company-specific regulatory and custom deadlines"""
     
     __tablename__ = 'compliance_reminders'
+    __table_args__ = (
+        db.Index('ix_compliance_reminders_company_active_due', 'company_id', 'is_active', 'due_date'),
+    )
     
     # Primary key
     id = db.Column(db.Integer, primary_key=True)
     
     # Foreign key to company
-    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
     
     # Reminder details
     title = db.Column(db.String(255), nullable=False)
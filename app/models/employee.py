@@ -10,7 +10,7 @@ class Employee(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     
     # Company relationship (for multi-tenant support)
-    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
     
     # Personal information
     employee_id = db.Column(db.String(20), unique=True, nullable=False, index=True)
@@ -177,4 +177,6 @@ class Employee(db.Model):
     # Table constraints
     __table_args__ = (
         db.UniqueConstraint('company_id', 'id_number', name='uq_company_id_number'),
+        # Employee list: a company's employees in name order, also serving keyset page seeks
+        db.Index('ix_employees_company_name', 'company_id', 'last_name', 'first_name', 'id'),
     )
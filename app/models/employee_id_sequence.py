@@ -0,0 +1,38 @@
+from sqlalchemy import update
+from app import db
+
+
+class EmployeeIdSequence(db.Model):
+    """Next employee ID sequence number for a company, claimed atomically"""
+    __tablename__ = 'employee_id_sequences'
+
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), primary_key=True)
+    prefix = db.Column(db.String(5), nullable=False, unique=True)
+    next_value = db.Column(db.Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f'<EmployeeIdSequence {self.prefix} next {self.next_value}>'
+
+    @classmethod
+    def reserve(cls, company_id, count=1):
+        """Claim ``count`` consecutive values in one UPDATE ... RETURNING
+
+        Returns ``(prefix, first_value)``, or None when the company has no
+        sequence yet. The row stays locked until the caller's transaction
+        ends, so concurrent reservations for a company are serialized.
+        """
+        row = db.session.execute(
+            update(cls)
+            .where(cls.company_id == company_id)
+            .values(next_value=cls.next_value + count)
+            .returning(cls.prefix, cls.next_value)
+        ).first()
+        if row is None:
+            return None
+        return row.prefix, row.next_value - count
+
+    @classmethod
+    def peek(cls, company_id):
+        """``(prefix, next_value)`` without claiming it, or None when not seeded"""
+        row = db.session.query(cls.prefix, cls.next_value).filter(cls.company_id == company_id).first()
+        return tuple(row) if row else None
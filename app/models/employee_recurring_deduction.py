@@ -34,12 +34,18 @@ class EmployeeRecurringDeduction(db.Model):
     def __repr__(self):
         return f'<EmployeeRecurringDeduction {self.employee.full_name} -> {self.beneficiary.name}>'
     
-    def calculate_deduction_amount(self, gross_salary):
-        """Calculate the deduction amount based on type and value"""
+    def calculate_deduction_amount(self, gross_salary, medical_aid_amount=None):
+        """Calculate the deduction amount based on type and value
+
+        ``medical_aid_amount`` lets batch callers supply a precomputed
+        medical aid amount for 'Calculated' deductions instead of querying it.
+        """
         print(f"[DEBUG] Calculating deduction for employee {self.employee_id}, beneficiary {self.beneficiary_id}, type {self.amount_type}")
         if self.amount_type == 'Percentage':
             return (Decimal(str(gross_salary)) * (self.value or Decimal('0'))) / Decimal('100')
         if self.amount_type == 'Calculated':
+            if medical_aid_amount is not None:
+                return Decimal(str(medical_aid_amount))
             from app.services.payroll_service import calculate_medical_aid_deduction
             amount = Decimal(str(calculate_medical_aid_deduction(self.employee)))
             print(f"[DEBUG] Calculated medical aid deduction: {amount}")
@@ -0,0 +1,155 @@
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import case, delete, func, insert
+from app import db
+
+
+class ImportBatch(db.Model):
+    """An uploaded employee spreadsheet staged for review before import"""
+    __tablename__ = 'import_batches'
+
+    STATUS_STAGED = 'staged'
+    STATUS_IMPORTED = 'imported'
+
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), nullable=False, index=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+
+    filename = db.Column(db.String(255), nullable=True)
+    apply_defaults = db.Column(db.Boolean, nullable=False, default=False)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_STAGED)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Audit fields
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    imported_at = db.Column(db.DateTime, nullable=True)
+
+    rows = db.relationship('ImportRow', backref='batch', lazy='dynamic', cascade='all, delete-orphan',
+                           passive_deletes=True)
+
+    def __repr__(self):
+        return f'<ImportBatch {self.id} company {self.company_id}: {self.row_count} rows ({self.status})>'
+
+    @classmethod
+    def stage(cls, company_id, rows, user_id=None, filename=None, apply_defaults=False):
+        """Store validated ``{'data', 'errors'}`` rows as a new batch; the caller commits"""
+        batch = cls(company_id=company_id, created_by=user_id, filename=filename,
+                    apply_defaults=apply_defaults, row_count=len(rows))
+        db.session.add(batch)
+        db.session.flush()
+        if rows:
+            db.session.execute(insert(ImportRow), [
+                {
+                    'batch_id': batch.id,
+                    'row_number': number,
+                    'data_json': ImportRow.dump(row['data']),
+                    'errors_json': ImportRow.dump(row['errors']),
+                    'has_errors': bool(row['errors']),
+                    'status': ImportRow.STATUS_PENDING,
+                }
+                for number, row in enumerate(rows, start=1)
+            ])
+        return batch
+
+    def counts(self):
+        """Row counts by review status plus the number of rows with errors"""
+        counts = dict(
+            db.session.query(ImportRow.status, func.count(ImportRow.id))
+            .filter(ImportRow.batch_id == self.id)
+            .group_by(ImportRow.status)
+            .all()
+        )
+        counts['errors'] = db.session.query(func.count(ImportRow.id))\
+            .filter(ImportRow.batch_id == self.id, ImportRow.has_errors == True)\
+            .scalar()
+        counts['total'] = self.row_count
+        return counts
+
+    def row_criteria(self, row_filter='all'):
+        """Filter criteria selecting the batch's rows under a review filter"""
+        criteria = [ImportRow.batch_id == self.id]
+        if row_filter == 'errors':
+            criteria.append(ImportRow.has_errors == True)
+        elif row_filter == 'valid':
+            criteria.append(ImportRow.has_errors == False)
+        elif row_filter in ImportRow.STATUSES:
+            criteria.append(ImportRow.status == row_filter)
+        return criteria
+
+    def filtered_rows(self, row_filter='all'):
+        """Query for the batch's rows under a review filter, rows with errors first"""
+        return ImportRow.query\
+            .filter(*self.row_criteria(row_filter))\
+            .order_by(case((ImportRow.has_errors == True, 0), else_=1), ImportRow.row_number)
+
+    @classmethod
+    def purge(cls, older_than=timedelta(days=7)):
+        """Delete batches created before the cutoff; returns the number deleted"""
+        cutoff = datetime.utcnow() - older_than
+        stale = db.session.query(cls.id).filter(cls.created_at < cutoff)
+        db.session.execute(delete(ImportRow).where(ImportRow.batch_id.in_(stale.scalar_subquery())))
+        return db.session.execute(delete(cls).where(cls.created_at < cutoff)).rowcount
+
+
+class ImportRow(db.Model):
+    """One parsed spreadsheet row of an import batch with its validation errors"""
+    __tablename__ = 'import_rows'
+    __table_args__ = (
+        # Review pages: a batch's rows, errors first, in spreadsheet order
+        db.Index('ix_import_rows_batch_errors_number', 'batch_id', 'has_errors', 'row_number'),
+    )
+
+    STATUS_PENDING = 'pending'
+    STATUS_CONFIRMED = 'confirmed'
+    STATUS_SKIPPED = 'skipped'
+    STATUS_IMPORTED = 'imported'
+    STATUS_FAILED = 'failed'
+    STATUSES = (STATUS_PENDING, STATUS_CONFIRMED, STATUS_SKIPPED, STATUS_IMPORTED, STATUS_FAILED)
+    # Statuses a reviewer can set
+    REVIEW_STATUSES = (STATUS_PENDING, STATUS_CONFIRMED, STATUS_SKIPPED)
+
+    id = db.Column(db.Integer, primary_key=True)
+    batch_id = db.Column(db.Integer, db.ForeignKey('import_batches.id', ondelete='CASCADE'), nullable=False)
+    row_number = db.Column(db.Integer, nullable=False)
+
+    data_json = db.Column(db.Text, nullable=False)
+    errors_json = db.Column(db.Text, nullable=False, default='[]')
+    has_errors = db.Column(db.Boolean, nullable=False, default=False)
+
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    message = db.Column(db.String(500), nullable=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id', ondelete='SET NULL'), nullable=True)
+
+    def __repr__(self):
+        return f'<ImportRow {self.batch_id}#{self.row_number} ({self.status})>'
+
+    @staticmethod
+    def dump(value):
+        # Dates are stored as ISO strings, which parse_date reads back
+        return json.dumps(value, default=str)
+
+    @property
+    def data(self):
+        return json.loads(self.data_json) if self.data_json else {}
+
+    @property
+    def errors(self):
+        return json.loads(self.errors_json) if self.errors_json else []
+
+    def set_validated(self, data, errors):
+        """Store re-validated data and its errors"""
+        self.data_json = self.dump(data)
+        self.errors_json = self.dump(errors)
+        self.has_errors = bool(errors)
+
+    def to_dict(self):
+        """Convert row to dictionary"""
+        return {
+            'id': self.id,
+            'row_number': self.row_number,
+            'data': self.data,
+            'errors': self.errors,
+            'status': self.status,
+            'message': self.message,
+            'employee_id': self.employee_id,
+        }
@@ -0,0 +1,93 @@
+import json
+from datetime import datetime
+from app import db
+
+
+class Job(db.Model):
+    """Background job queued in the database and executed by `flask run-jobs`"""
+    __tablename__ = 'jobs'
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    FINISHED_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELLED)
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_QUEUED)
+
+    # Ownership
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='SET NULL'), nullable=True, index=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
+
+    # Input and output
+    params_json = db.Column(db.Text, nullable=True)
+    result_json = db.Column(db.Text, nullable=True)
+    result_path = db.Column(db.String(500), nullable=True)
+    result_filename = db.Column(db.String(255), nullable=True)
+    result_mimetype = db.Column(db.String(100), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    # Progress and control
+    progress = db.Column(db.Integer, nullable=False, default=0)  # 0-100
+    progress_message = db.Column(db.String(255), nullable=True)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    worker_id = db.Column(db.String(100), nullable=True)
+
+    # Audit fields
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_jobs_status_created_at', 'status', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.job_type} ({self.status})>'
+
+    @property
+    def params(self):
+        return json.loads(self.params_json) if self.params_json else {}
+
+    @params.setter
+    def params(self, value):
+        self.params_json = json.dumps(value or {}, default=str)
+
+    @property
+    def result(self):
+        return json.loads(self.result_json) if self.result_json else None
+
+    @result.setter
+    def result(self, value):
+        self.result_json = json.dumps(value, default=str) if value is not None else None
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
+
+    @property
+    def has_download(self):
+        return self.status == self.STATUS_SUCCEEDED and bool(self.result_path)
+
+    def to_dict(self):
+        """Convert job to dictionary"""
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'company_id': self.company_id,
+            'progress': self.progress,
+            'progress_message': self.progress_message,
+            'cancel_requested': self.cancel_requested,
+            'result': self.result,
+            'has_download': self.has_download,
+            'result_filename': self.result_filename,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
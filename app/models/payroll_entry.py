@@ -1,17 +1,32 @@
 from app import db
 from datetime import datetime
 from decimal import Decimal
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
 
 class PayrollEntry(db.Model):
     """PayrollEntry model for storing manual payroll data per employee"""
     
     __tablename__ = 'payroll_entries'
+    __table_args__ = (
+        # One entry per employee and pay period; the conflict target of payroll upserts. Also serves
+        # per-employee period lookups (existing entries, YTD totals) and employee_id joins
+        db.Index('uq_payroll_entries_employee_period', 'employee_id', 'pay_period_start', 'pay_period_end',
+                 unique=True),
+        # Tenant-scoped month reports filtered by verification/finalization status
+        db.Index('ix_payroll_entries_company_month_status', 'company_id', 'month_year', 'is_verified', 'is_finalized'),
+        # Tenant-scoped pay period ranges
+        db.Index('ix_payroll_entries_company_period', 'company_id', 'pay_period_start', 'pay_period_end'),
+    )
     
     # Primary key
     id = db.Column(db.Integer, primary_key=True)
     
     # Foreign key to employee
-    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False, index=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
+    
+    # Copy of employee.company_id so tenant-scoped queries need no employees join
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
     
     # Pay period
     pay_period_start = db.Column(db.Date, nullable=False)
@@ -49,6 +64,11 @@ class PayrollEntry(db.Model):
     # Net pay
     net_pay = db.Column(db.Numeric(10, 2), nullable=False, default=0)
     
+    # Persisted totals, refreshed on save/finalize when their inputs change
+    gross_pay = db.Column(db.Numeric(10, 2), nullable=True)
+    recurring_deductions_total = db.Column(db.Numeric(10, 2), nullable=True)
+    total_deductions = db.Column(db.Numeric(10, 2), nullable=True)
+    
     # Verification status for payroll approval workflow
     is_verified = db.Column(db.Boolean, nullable=False, default=False)
     verified_at = db.Column(db.DateTime, nullable=True)
@@ -63,56 +83,86 @@ class PayrollEntry(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Columns of the employee/period unique index, the conflict target for upserts
+    PERIOD_KEY = ('employee_id', 'pay_period_start', 'pay_period_end')
+    
     def __repr__(self):
         return f'<PayrollEntry Employee ID: {self.employee_id} - {self.pay_period_start} to {self.pay_period_end}>'
     
-    @property
-    def gross_pay(self):
-        """Calculate gross pay based on salary type (monthly, hourly, daily, piece)"""
-        if self.employee and self.employee.salary_type == 'monthly':
+    def calculate_gross_pay(self, employee=None):
+        """Gross pay for this entry, optionally against an already-loaded employee"""
+        employee = employee or self.employee
+        # Column defaults are only applied on INSERT, so pending entries may hold None
+        zero = Decimal('0')
+        ordinary_hours = self.ordinary_hours or zero
+        hourly_rate = self.hourly_rate or zero
+        if employee and employee.salary_type == 'monthly':
             # For monthly employees, use their monthly salary
-            ordinary_pay = Decimal(str(self.employee.salary))
-        elif self.employee and self.employee.salary_type == 'daily':
+            ordinary_pay = Decimal(str(employee.salary))
+        elif employee and employee.salary_type == 'daily':
             # For daily employees, multiply hours by daily rate
-            ordinary_pay = self.ordinary_hours * Decimal(str(self.employee.salary))
-        elif self.employee and self.employee.salary_type == 'piece':
+            ordinary_pay = ordinary_hours * Decimal(str(employee.salary))
+        elif employee and employee.salary_type == 'piece':
             # For piece work employees, multiply pieces produced by piece rate
             pieces = self.pieces_produced or Decimal('0')
             rate = self.piece_rate or Decimal('0')
             ordinary_pay = pieces * rate
         else:
             # For hourly employees, use hourly rate
-            ordinary_pay = self.ordinary_hours * self.hourly_rate
+            ordinary_pay = ordinary_hours * hourly_rate
 
         # Calculate overtime and special pay (only for hourly/daily employees)
         overtime_pay = Decimal('0')
         sunday_pay = Decimal('0')
         holiday_pay = Decimal('0')
         
-        if self.employee and self.employee.salary_type not in ['monthly', 'piece']:
-            overtime_pay = self.overtime_hours * (self.hourly_rate * Decimal('1.5'))  # Overtime at 1.5x rate
-            sunday_pay = self.sunday_hours * (self.hourly_rate * Decimal('2'))  # Sunday work at 2x rate
-            holiday_pay = self.public_holiday_hours * (self.hourly_rate * Decimal('2'))  # Holiday work at 2x rate
+        if employee and employee.salary_type not in ['monthly', 'piece']:
+            overtime_pay = (self.overtime_hours or zero) * (hourly_rate * Decimal('1.5'))  # Overtime at 1.5x rate
+            sunday_pay = (self.sunday_hours or zero) * (hourly_rate * Decimal('2'))  # Sunday work at 2x rate
+            holiday_pay = (self.public_holiday_hours or zero) * (hourly_rate * Decimal('2'))  # Holiday work at 2x rate
 
-        return ordinary_pay + overtime_pay + sunday_pay + holiday_pay + self.allowances + (self.bonus_amount or Decimal('0'))
+        return ordinary_pay + overtime_pay + sunday_pay + holiday_pay + (self.allowances or zero) + (self.bonus_amount or zero)
     
-    @property
-    def total_deductions(self):
-        """Calculate total deductions including recurring deductions (medical aid, union, etc.)"""
-        base_deductions = self.paye + self.uif + self.sdl + self.deductions_other
-
-        total_recurring = Decimal('0')
-        if self.employee_id:
-            from app.models.employee_recurring_deduction import EmployeeRecurringDeduction
-            deductions = EmployeeRecurringDeduction.query.filter_by(
-                employee_id=self.employee_id,
-                is_active=True
-            ).all()
-
-            for deduction in deductions:
-                total_recurring += deduction.calculate_deduction_amount(self.gross_pay)
-
-        return base_deductions + total_recurring
+    # Fields that feed gross_pay / total_deductions
+    TOTALS_INPUT_FIELDS = (
+        'employee_id', 'ordinary_hours', 'overtime_hours', 'sunday_hours', 'public_holiday_hours',
+        'hourly_rate', 'allowances', 'bonus_amount', 'pieces_produced', 'piece_rate',
+        'deductions_other', 'paye', 'uif', 'sdl', 'is_finalized',
+    )
+    
+    def recurring_deduction_amounts(self, gross_pay):
+        """Active recurring deductions (medical aid, union, etc.) with their amounts for ``gross_pay``"""
+        if not self.employee_id:
+            return []
+        
+        from app.models.employee_recurring_deduction import EmployeeRecurringDeduction
+        deductions = EmployeeRecurringDeduction.query.filter_by(
+            employee_id=self.employee_id,
+            is_active=True
+        ).all()
+        return [(deduction, deduction.calculate_deduction_amount(gross_pay)) for deduction in deductions]
+    
+    def refresh_totals(self, employee=None):
+        """Recompute and store gross pay, deduction totals and deduction lines; returns total deductions"""
+        from app.models.payroll_entry_deduction import PayrollEntryDeduction
+        
+        gross_pay = self.calculate_gross_pay(employee)
+        recurring = self.recurring_deduction_amounts(gross_pay)
+        total_recurring = sum((amount for _, amount in recurring), Decimal('0'))
+        
+        # Snapshot the deductions so reports do not depend on their current configuration
+        self.deduction_lines = [PayrollEntryDeduction.from_recurring(deduction, amount) for deduction, amount in recurring]
+        base_deductions = (self.paye or 0) + (self.uif or 0) + (self.sdl or 0) + (self.deductions_other or 0)
+        
+        self.gross_pay = gross_pay
+        self.recurring_deductions_total = total_recurring
+        self.total_deductions = base_deductions + total_recurring
+        return self.total_deductions
+    
+    def totals_inputs_changed(self):
+        """Whether any input to the persisted totals changed since load"""
+        state = inspect(self)
+        return any(state.attrs[field].history.has_changes() for field in self.TOTALS_INPUT_FIELDS)
     
     def calculate_medical_tax_credit(self, dependants):
         """Calculate Medical Tax Credit (MTC) using SARS 2024/2025 rates"""
@@ -128,7 +178,7 @@ class PayrollEntry(db.Model):
 
     def calculate_statutory_deductions(self):
         """Calculate PAYE, UIF, and SDL based on gross pay with medical aid considerations"""
-        base_gross = self.gross_pay
+        base_gross = self.calculate_gross_pay()
         
         # Add medical aid fringe benefit if any
         gross_for_tax = base_gross + (self.fringe_benefit_medical or Decimal('0'))
@@ -138,27 +188,15 @@ class PayrollEntry(db.Model):
         sars_config = SARSService.get_company_sars_config(self.employee.company_id)
         
         uif_eligible_salary = min(gross_for_tax, Decimal(str(sars_config['uif_salary_cap'])))
-        uif_amount = uif_eligible_salary * Decimal(str(sars_config['uif_percent']))
+        uif_amount = uif_eligible_salary * SARSService.as_rate(sars_config['uif_percent'])
         self.uif = min(uif_amount, Decimal(str(sars_config['uif_monthly_cap'])))
         
         # SDL: Dynamic rate of gross pay for employers with payroll > R500k annually
-        self.sdl = gross_for_tax * Decimal(str(sars_config['sdl_percent']))
+        self.sdl = gross_for_tax * SARSService.as_rate(sars_config['sdl_percent'])
         
-        # PAYE calculation (2024/2025 South African tax brackets)
-        if gross_for_tax <= Decimal('7100'):
-            self.paye = Decimal('0')
-        elif gross_for_tax <= Decimal('11000'):
-            self.paye = (gross_for_tax - Decimal('7100')) * Decimal('0.18')
-        elif gross_for_tax <= Decimal('17500'):
-            self.paye = Decimal('702') + (gross_for_tax - Decimal('11000')) * Decimal('0.26')
-        elif gross_for_tax <= Decimal('27000'):
-            self.paye = Decimal('2392') + (gross_for_tax - Decimal('17500')) * Decimal('0.31')
-        elif gross_for_tax <= Decimal('39000'):
-            self.paye = Decimal('5337') + (gross_for_tax - Decimal('27000')) * Decimal('0.36')
-        elif gross_for_tax <= Decimal('55000'):
-            self.paye = Decimal('9657') + (gross_for_tax - Decimal('39000')) * Decimal('0.39')
-        else:
-            self.paye = Decimal('15897') + (gross_for_tax - Decimal('55000')) * Decimal('0.41')
+        # PAYE from the compiled tax table for the configured tax year
+        from app.services.tax_table_service import TaxTableService
+        self.paye = TaxTableService.calculate_paye(gross_for_tax, sars_config['tax_year_display'])
         
         # Apply medical tax credit if applicable
         if self.medical_aid_tax_credit and self.medical_aid_tax_credit > 0:
@@ -168,13 +206,14 @@ class PayrollEntry(db.Model):
         self.paye = max(self.paye, Decimal('0'))
         
         # Calculate net pay
-        self.net_pay = base_gross - self.total_deductions
+        self.net_pay = base_gross - self.refresh_totals()
     
     def to_dict(self):
         """Convert payroll entry to dictionary"""
         return {
             'id': self.id,
             'employee_id': self.employee_id,
+            'company_id': self.company_id,
             'pay_period_start': self.pay_period_start.isoformat() if self.pay_period_start else None,
             'pay_period_end': self.pay_period_end.isoformat() if self.pay_period_end else None,
             'month_year': self.month_year,
@@ -191,8 +230,9 @@ class PayrollEntry(db.Model):
             'uif': float(self.uif),
             'sdl': float(self.sdl),
             'net_pay': float(self.net_pay),
-            'gross_pay': float(self.gross_pay),
-            'total_deductions': float(self.total_deductions),
+            'gross_pay': float(self.gross_pay or 0),
+            'recurring_deductions_total': float(self.recurring_deductions_total or 0),
+            'total_deductions': float(self.total_deductions or 0),
             'is_verified': self.is_verified,
             'verified_at': self.verified_at.isoformat() if self.verified_at else None,
             'verified_by': self.verified_by,
@@ -201,4 +241,35 @@ class PayrollEntry(db.Model):
             'finalized_by': self.finalized_by,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_payroll_company(session, flush_context, instances):
+    """Copy the employee's company onto new entries and entries moved to another employee"""
+    from app.models.employee import Employee
+    
+    with session.no_autoflush:
+        for obj in list(session.new) + list(session.dirty):
+            if not isinstance(obj, PayrollEntry):
+                continue
+            if obj not in session.new and not inspect(obj).attrs.employee_id.history.has_changes():
+                continue
+            employee = obj.employee or (session.get(Employee, obj.employee_id) if obj.employee_id else None)
+            if employee is not None:
+                obj.company_id = employee.company_id
+
+
+@event.listens_for(Session, 'before_flush')
+def _refresh_payroll_totals(session, flush_context, instances):
+    """Fill persisted totals for new entries and entries whose inputs changed"""
+    from app.models.employee import Employee
+    
+    with session.no_autoflush:
+        for obj in list(session.new) + list(session.dirty):
+            if not isinstance(obj, PayrollEntry):
+                continue
+            if obj not in session.new and not obj.totals_inputs_changed():
+                continue
+            employee = obj.employee or (session.get(Employee, obj.employee_id) if obj.employee_id else None)
+            obj.refresh_totals(employee)
@@ -0,0 +1,54 @@
+from datetime import datetime
+from app import db
+
+
+class PayrollEntryDeduction(db.Model):
+    """Snapshot of a recurring deduction as applied to one payroll entry"""
+    __tablename__ = 'payroll_entry_deductions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    payroll_entry_id = db.Column(db.Integer, db.ForeignKey('payroll_entries.id', ondelete='CASCADE'), nullable=False, index=True)
+    recurring_deduction_id = db.Column(db.Integer, db.ForeignKey('employee_recurring_deductions.id', ondelete='SET NULL'), nullable=True)
+    # Past payroll keeps its beneficiaries; the beneficiary delete route refuses them
+    beneficiary_id = db.Column(db.Integer, db.ForeignKey('beneficiaries.id', ondelete='RESTRICT'), nullable=False, index=True)
+    
+    # Deduction configuration at the time the entry was saved or finalized
+    amount_type = db.Column(db.String(10), nullable=False)
+    value = db.Column(db.Numeric(10, 2), nullable=True)
+    amount = db.Column(db.Numeric(10, 2), nullable=False, default=0)
+    
+    # Audit Fields
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    payroll_entry = db.relationship('PayrollEntry', backref=db.backref('deduction_lines',
+                                                                     cascade='all, delete-orphan',
+                                                                     passive_deletes=True))
+    beneficiary = db.relationship('Beneficiary')
+    
+    def __repr__(self):
+        return f'<PayrollEntryDeduction entry {self.payroll_entry_id} -> beneficiary {self.beneficiary_id}: {self.amount}>'
+    
+    @classmethod
+    def from_recurring(cls, deduction, amount):
+        """Build a snapshot line for a recurring deduction and its computed amount"""
+        return cls(
+            recurring_deduction_id=deduction.id,
+            beneficiary_id=deduction.beneficiary_id,
+            amount_type=deduction.amount_type,
+            value=deduction.value,
+            amount=amount,
+        )
+    
+    def to_dict(self):
+        """Convert deduction line to dictionary"""
+        return {
+            'id': self.id,
+            'payroll_entry_id': self.payroll_entry_id,
+            'recurring_deduction_id': self.recurring_deduction_id,
+            'beneficiary_id': self.beneficiary_id,
+            'amount_type': self.amount_type,
+            'value': float(self.value) if self.value is not None else None,
+            'amount': float(self.amount or 0),
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,332 @@
+import operator
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import case, delete, event, func, inspect, or_, select, true, tuple_, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models.payroll_entry import PayrollEntry
+from app.services.bulk_upsert import upsert_statement
+
+
+def sync_rollup(connection, table, key_names, aggregates, existing_filter):
+    """Upsert or delete rollup rows in ``table`` to match ``aggregates``
+
+    Rows are matched on the ``key_names`` columns and written with one
+    INSERT ... ON CONFLICT DO UPDATE, so rows are updated in place (keeping
+    the identity of instances loaded in a session) and a concurrent first
+    insert of the same key does not fail. Existing rows selected by
+    ``existing_filter`` with no aggregate row are deleted.
+    """
+    key_columns = [table.c[name] for name in key_names]
+    stale = set(connection.execute(select(*key_columns).where(existing_filter)).all())
+
+    now = datetime.utcnow()
+    rows = [dict(row._mapping, updated_at=now) for row in aggregates]
+    if rows:
+        value_columns = [name for name in rows[0] if name not in key_names]
+        connection.execute(upsert_statement(table, key_names, value_columns), rows)
+        stale -= {tuple(row[name] for name in key_names) for row in rows}
+
+    if stale:
+        connection.execute(delete(table).where(tuple_(*key_columns).in_(sorted(stale))))
+
+
+def expire_loaded(session, model, key_names, keys=None):
+    """Expire rollup instances held by the session so they reload recomputed values"""
+    for obj in list(session.identity_map.values()):
+        if not isinstance(obj, model):
+            continue
+        loaded = inspect(obj).dict
+        if keys is None or tuple(loaded.get(name) for name in key_names) in keys:
+            session.expire(obj)
+
+
+class PayrollPeriodSummary(db.Model):
+    """Per-company monthly payroll totals, kept in step with payroll entries
+
+    Each flush adds the difference its new, changed and deleted entries make
+    to their (company, month) buckets with an atomic upsert, so dashboards
+    read one row per month instead of aggregating every payroll entry and
+    concurrent writers never overwrite each other's totals. Bulk statements
+    that bypass the session report their entries through `add_entries`;
+    `flask rebuild-summaries` repairs the table after other bulk SQL changes.
+    """
+    __tablename__ = 'payroll_period_summaries'
+    __table_args__ = (
+        db.UniqueConstraint('company_id', 'month_year', name='uq_payroll_period_summary_company_month'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), nullable=False, index=True)
+    month_year = db.Column(db.String(7), nullable=False)
+
+    # Entry counts
+    headcount = db.Column(db.Integer, nullable=False, default=0)
+    verified_count = db.Column(db.Integer, nullable=False, default=0)
+    finalized_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Totals over all entries in the month
+    gross_pay = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    paye = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    uif = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    sdl = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    other_deductions = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    net_pay = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    verified_net_pay = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    last_pay_period_end = db.Column(db.Date, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Entry columns whose changes affect a summary row
+    SOURCE_FIELDS = (
+        'company_id', 'month_year', 'pay_period_end', 'gross_pay', 'paye', 'uif', 'sdl',
+        'deductions_other', 'union_fee', 'net_pay', 'is_verified', 'is_finalized',
+    )
+
+    def __repr__(self):
+        return f'<PayrollPeriodSummary company {self.company_id} {self.month_year}: {self.headcount} entries>'
+
+    @property
+    def unverified_count(self):
+        return self.headcount - self.verified_count
+
+    @classmethod
+    def aggregate_select(cls):
+        """Summary columns aggregated from payroll entries, grouped by company and month"""
+        return select(
+            PayrollEntry.company_id.label('company_id'),
+            PayrollEntry.month_year.label('month_year'),
+            func.count(PayrollEntry.id).label('headcount'),
+            func.count(case((PayrollEntry.is_verified == True, PayrollEntry.id))).label('verified_count'),
+            func.count(case((PayrollEntry.is_finalized == True, PayrollEntry.id))).label('finalized_count'),
+            func.coalesce(func.sum(PayrollEntry.gross_pay), 0).label('gross_pay'),
+            func.coalesce(func.sum(PayrollEntry.paye), 0).label('paye'),
+            func.coalesce(func.sum(PayrollEntry.uif), 0).label('uif'),
+            func.coalesce(func.sum(PayrollEntry.sdl), 0).label('sdl'),
+            func.coalesce(func.sum(PayrollEntry.deductions_other + PayrollEntry.union_fee), 0).label('other_deductions'),
+            func.coalesce(func.sum(PayrollEntry.net_pay), 0).label('net_pay'),
+            func.coalesce(func.sum(case((PayrollEntry.is_verified == True, PayrollEntry.net_pay), else_=0)), 0).label('verified_net_pay'),
+            func.max(PayrollEntry.pay_period_end).label('last_pay_period_end'),
+        )\
+            .where(PayrollEntry.month_year.isnot(None))\
+            .group_by(PayrollEntry.company_id, PayrollEntry.month_year)
+
+    @classmethod
+    def _sync(cls, connection, summary_filter, entry_filter):
+        """Update, insert or delete summary rows to match the aggregated entries"""
+        aggregates = connection.execute(cls.aggregate_select().where(entry_filter)).all()
+        sync_rollup(connection, cls.__table__, ('company_id', 'month_year'), aggregates, summary_filter)
+
+    # Summary columns that accumulate the contribution of each entry
+    COUNTER_COLUMNS = (
+        'headcount', 'verified_count', 'finalized_count', 'gross_pay', 'paye', 'uif', 'sdl',
+        'other_deductions', 'net_pay', 'verified_net_pay',
+    )
+
+    @staticmethod
+    def contribution(values):
+        """Bucket and counter values one entry adds to its summary row
+
+        ``values`` maps the ``SOURCE_FIELDS`` of an entry to their values.
+        Returns None for entries that do not belong to a month.
+        """
+        if not values['company_id'] or not values['month_year']:
+            return None
+        net_pay = values['net_pay'] or Decimal('0')
+        other = Decimal('0')
+        if values['deductions_other'] is not None and values['union_fee'] is not None:
+            other = values['deductions_other'] + values['union_fee']
+        return (values['company_id'], values['month_year']), {
+            'headcount': 1,
+            'verified_count': 1 if values['is_verified'] else 0,
+            'finalized_count': 1 if values['is_finalized'] else 0,
+            'gross_pay': values['gross_pay'] or Decimal('0'),
+            'paye': values['paye'] or Decimal('0'),
+            'uif': values['uif'] or Decimal('0'),
+            'sdl': values['sdl'] or Decimal('0'),
+            'other_deductions': other,
+            'net_pay': net_pay,
+            'verified_net_pay': net_pay if values['is_verified'] else Decimal('0'),
+        }
+
+    @classmethod
+    def apply_changes(cls, connection, added=(), removed=()):
+        """Add the contributions of ``added`` entries and subtract those of ``removed`` ones
+
+        Both are iterables of ``SOURCE_FIELDS`` mappings. Counters are
+        incremented in the database, so concurrent changes to one bucket
+        accumulate instead of overwriting each other. Buckets that lost an
+        entry re-read their latest pay period end, and buckets left without
+        entries are deleted. Returns the touched buckets.
+        """
+        deltas = defaultdict(lambda: dict.fromkeys(cls.COUNTER_COLUMNS, 0))
+        latest = {}
+        shrunk = set()
+        for sign, entries in ((1, added), (-1, removed)):
+            for values in entries:
+                contribution = cls.contribution(values)
+                if contribution is None:
+                    continue
+                bucket, counters = contribution
+                for column, value in counters.items():
+                    deltas[bucket][column] += sign * value
+                if sign < 0:
+                    shrunk.add(bucket)
+                elif values['pay_period_end'] and (latest.get(bucket) is None or values['pay_period_end'] > latest[bucket]):
+                    latest[bucket] = values['pay_period_end']
+        if not deltas:
+            return set()
+
+        now = datetime.utcnow()
+        rows = [
+            dict(counters, company_id=company_id, month_year=month_year, updated_at=now,
+                 last_pay_period_end=latest.get((company_id, month_year)))
+            for (company_id, month_year), counters in sorted(deltas.items())
+        ]
+        combine = dict.fromkeys(cls.COUNTER_COLUMNS, operator.add)
+        combine['last_pay_period_end'] = _later_date
+        connection.execute(upsert_statement(cls, ('company_id', 'month_year'), ('updated_at',), combine), rows)
+
+        table = cls.__table__
+        if shrunk:
+            connection.execute(
+                update(table)
+                .where(tuple_(table.c.company_id, table.c.month_year).in_(sorted(shrunk)))
+                .values(last_pay_period_end=select(func.max(PayrollEntry.pay_period_end))
+                        .where(PayrollEntry.company_id == table.c.company_id,
+                               PayrollEntry.month_year == table.c.month_year)
+                        .scalar_subquery())
+            )
+            connection.execute(
+                delete(table)
+                .where(tuple_(table.c.company_id, table.c.month_year).in_(sorted(shrunk)))
+                .where(table.c.headcount <= 0)
+            )
+        return set(deltas)
+
+    @classmethod
+    def add_entries(cls, rows):
+        """Count entries written by bulk statements that bypass the flush; the caller commits
+
+        ``rows`` are mappings of entry columns; source fields they omit take
+        the column defaults.
+        """
+        defaults = {'is_verified': False, 'is_finalized': False, 'deductions_other': Decimal('0'),
+                    'union_fee': Decimal('0')}
+        added = [{field: row.get(field, defaults.get(field)) for field in cls.SOURCE_FIELDS} for row in rows]
+        buckets = cls.apply_changes(db.session.connection(), added=added)
+        expire_loaded(db.session, cls, ('company_id', 'month_year'), buckets)
+
+    @classmethod
+    def remove_entries(cls, rows):
+        """Uncount entries deleted by bulk statements that bypass the flush; the caller commits
+
+        ``rows`` are mappings of every ``SOURCE_FIELDS`` column, such as the
+        rows a ``DELETE ... RETURNING`` gives back.
+        """
+        removed = [{field: row[field] for field in cls.SOURCE_FIELDS} for row in rows]
+        buckets = cls.apply_changes(db.session.connection(), removed=removed)
+        expire_loaded(db.session, cls, ('company_id', 'month_year'), buckets)
+
+    @classmethod
+    def rebuild(cls, company_id=None):
+        """Recompute every summary row, optionally for one company; the caller commits"""
+        table = cls.__table__
+        if company_id is None:
+            cls._sync(db.session.connection(), true(), true())
+        else:
+            cls._sync(db.session.connection(), table.c.company_id == company_id, PayrollEntry.company_id == company_id)
+        expire_loaded(db.session, cls, ('company_id', 'month_year'))
+
+    @classmethod
+    def for_company(cls, company_id, month_year):
+        """Summary row for a company and month, or None if it has no entries"""
+        return cls.query.filter_by(company_id=company_id, month_year=month_year).first()
+
+    def to_dict(self):
+        """Convert summary to dictionary"""
+        return {
+            'company_id': self.company_id,
+            'month_year': self.month_year,
+            'headcount': self.headcount,
+            'verified_count': self.verified_count,
+            'finalized_count': self.finalized_count,
+            'gross_pay': float(self.gross_pay or 0),
+            'paye': float(self.paye or 0),
+            'uif': float(self.uif or 0),
+            'sdl': float(self.sdl or 0),
+            'other_deductions': float(self.other_deductions or 0),
+            'net_pay': float(self.net_pay or 0),
+            'verified_net_pay': float(self.verified_net_pay or 0),
+            'last_pay_period_end': self.last_pay_period_end.isoformat() if self.last_pay_period_end else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+def _later_date(stored, incoming):
+    """The later of two nullable dates as a SQL expression"""
+    return case((or_(stored.is_(None), incoming > stored), incoming), else_=stored)
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Load old values on assignment so a flush can subtract what an entry contributed before
+for _field in PayrollPeriodSummary.SOURCE_FIELDS:
+    event.listen(getattr(PayrollEntry, _field), 'set', _load_previous_value, active_history=True, retval=True)
+
+
+def _current_values(entry):
+    return {field: getattr(entry, field) for field in PayrollPeriodSummary.SOURCE_FIELDS}
+
+
+def _previous_values(entry):
+    """Source field values of an entry before its pending changes"""
+    state = inspect(entry)
+    values = {}
+    for field in PayrollPeriodSummary.SOURCE_FIELDS:
+        history = state.attrs[field].history
+        if history.deleted:
+            values[field] = history.deleted[0]
+        elif history.added:
+            # Old values are loaded on assignment, so nothing deleted means it was None
+            values[field] = None
+        else:
+            values[field] = getattr(entry, field)
+    return values
+
+
+def _summary_inputs_changed(entry):
+    state = inspect(entry)
+    return any(state.attrs[field].history.has_changes() for field in PayrollPeriodSummary.SOURCE_FIELDS)
+
+
+@event.listens_for(Session, 'before_flush')
+def _load_deleted_entries(session, flush_context, instances):
+    """Load the source fields of entries being deleted while their rows still exist"""
+    for obj in session.deleted:
+        if isinstance(obj, PayrollEntry):
+            for field in inspect(obj).unloaded & set(PayrollPeriodSummary.SOURCE_FIELDS):
+                getattr(obj, field)
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_period_summary_changes(session, flush_context):
+    """Apply the difference added, changed and deleted entries make to their months"""
+    added, removed = [], []
+    for obj in session.new:
+        if isinstance(obj, PayrollEntry):
+            added.append(_current_values(obj))
+    for obj in session.dirty:
+        if isinstance(obj, PayrollEntry) and _summary_inputs_changed(obj):
+            removed.append(_previous_values(obj))
+            added.append(_current_values(obj))
+    for obj in session.deleted:
+        if isinstance(obj, PayrollEntry):
+            removed.append(_previous_values(obj))
+
+    buckets = PayrollPeriodSummary.apply_changes(session.connection(), added, removed)
+    if buckets:
+        expire_loaded(session, PayrollPeriodSummary, ('company_id', 'month_year'), buckets)
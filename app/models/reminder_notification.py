@@ -5,12 +5,15 @@ class ReminderNotification(db.Model):
     """ReminderNotification model for in-app notification system"""
     
     __tablename__ = 'reminder_notifications'
+    __table_args__ = (
+        db.Index('ix_reminder_notifications_user_read', 'user_id', 'is_read'),
+    )
     
     # Primary key
     id = db.Column(db.Integer, primary_key=True)
     
     # Foreign keys
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     reminder_id = db.Column(db.Integer, db.ForeignKey('compliance_reminders.id'), nullable=False, index=True)
     
     # Notification content
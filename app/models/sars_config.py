@@ -115,9 +115,10 @@ class SARSConfig(db.Model):
     def __repr__(self):
         return f'<SARSConfig Company {self.company_id}>'
 
-    def get_effective_config(self):
+    def get_effective_config(self, global_config=None):
         """Get effective configuration with global fallbacks"""
-        global_config = GlobalSARSConfig.get_current()
+        if global_config is None:
+            global_config = GlobalSARSConfig.get_current()
         
         return {
             'uif_percent': self.uif_percent or global_config.uif_percent,
@@ -131,12 +132,13 @@ class SARSConfig(db.Model):
             'tax_authority_name': self.tax_authority_name or global_config.tax_authority_name,
             'currency_symbol': self.currency_symbol or global_config.currency_symbol,
             'tax_year_display': global_config.tax_year_display,
-            'tax_year_start_display': self.get_tax_year_start_display()
+            'tax_year_start_display': self.get_tax_year_start_display(global_config)
         }
 
-    def get_tax_year_start_display(self):
+    def get_tax_year_start_display(self, global_config=None):
         """Get formatted tax year start date for display"""
-        global_config = GlobalSARSConfig.get_current()
+        if global_config is None:
+            global_config = GlobalSARSConfig.get_current()
         month = self.tax_year_start_month or global_config.tax_year_start_month
         day = self.tax_year_start_day or global_config.tax_year_start_day
         
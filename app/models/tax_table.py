@@ -0,0 +1,77 @@
+from app import db
+from datetime import datetime
+from decimal import Decimal
+
+
+class TaxTable(db.Model):
+    """PAYE tax table for one tax year, keyed by GlobalSARSConfig.tax_year_display"""
+    __tablename__ = 'tax_tables'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tax_year = db.Column(db.String(20), nullable=False, unique=True, index=True)  # e.g. "2024/2025"
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    brackets = db.relationship(
+        'TaxBracket',
+        backref='tax_table',
+        cascade='all, delete-orphan',
+        order_by='TaxBracket.threshold',
+    )
+
+    # Monthly 2024/2025 brackets as (lower threshold, marginal rate)
+    DEFAULT_TAX_YEAR = "2024/2025"
+    DEFAULT_BRACKETS = (
+        (Decimal('0'), Decimal('0')),
+        (Decimal('7100'), Decimal('0.18')),
+        (Decimal('11000'), Decimal('0.26')),
+        (Decimal('17500'), Decimal('0.31')),
+        (Decimal('27000'), Decimal('0.36')),
+        (Decimal('39000'), Decimal('0.39')),
+        (Decimal('55000'), Decimal('0.41')),
+    )
+
+    def __repr__(self):
+        return f'<TaxTable {self.tax_year}>'
+
+    @classmethod
+    def create_default(cls, tax_year=DEFAULT_TAX_YEAR):
+        """Build (unsaved) table populated with the default brackets"""
+        table = cls(tax_year=tax_year)
+        table.brackets = [TaxBracket(threshold=t, rate=r) for t, r in cls.DEFAULT_BRACKETS]
+        return table
+
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'tax_year': self.tax_year,
+            'is_active': self.is_active,
+            'brackets': [b.to_dict() for b in self.brackets],
+        }
+
+
+class TaxBracket(db.Model):
+    """Marginal PAYE rate applying to monthly taxable income above ``threshold``"""
+    __tablename__ = 'tax_brackets'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tax_table_id = db.Column(db.Integer, db.ForeignKey('tax_tables.id'), nullable=False, index=True)
+    threshold = db.Column(db.Numeric(12, 2), nullable=False)  # Lower bound of the bracket
+    rate = db.Column(db.Numeric(5, 4), nullable=False)        # 0.18 for 18%
+
+    __table_args__ = (
+        db.UniqueConstraint('tax_table_id', 'threshold', name='uq_tax_bracket_threshold'),
+    )
+
+    def __repr__(self):
+        return f'<TaxBracket {self.threshold} @ {self.rate}>'
+
+    def to_dict(self):
+        return {
+            'threshold': float(self.threshold),
+            'rate': float(self.rate),
+        }
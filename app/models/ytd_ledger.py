@@ -0,0 +1,206 @@
+from datetime import datetime
+from sqlalchemy import case, event, extract, func, inspect, select, true, tuple_
+from sqlalchemy.orm import Session
+from app import db
+from app.models.payroll_entry import PayrollEntry
+from app.models.payroll_period_summary import expire_loaded, sync_rollup
+
+# SARS tax years run from 1 March to the end of February
+TAX_YEAR_START_MONTH = 3
+
+
+def tax_year_for(day):
+    """Calendar year in which the tax year containing ``day`` starts"""
+    return day.year if day.month >= TAX_YEAR_START_MONTH else day.year - 1
+
+
+def tax_year_column(column):
+    """SQL expression for :func:`tax_year_for` over a date column"""
+    return (extract('year', column) - case((extract('month', column) < TAX_YEAR_START_MONTH, 1), else_=0))
+
+
+class YtdLedger(db.Model):
+    """Per-employee totals of finalized payroll entries for one tax year
+
+    ``tax_year`` is the calendar year the tax year starts in (2025 for
+    March 2025 - February 2026). Rows are recomputed whenever finalized
+    entries of the employee's tax year are added, changed or deleted;
+    `flask rebuild-summaries` repairs the table.
+    """
+    __tablename__ = 'ytd_ledgers'
+    __table_args__ = (
+        db.UniqueConstraint('employee_id', 'tax_year', name='uq_ytd_ledger_employee_tax_year'),
+        db.Index('ix_ytd_ledgers_company_tax_year', 'company_id', 'tax_year'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id', ondelete='CASCADE'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), nullable=False)
+    tax_year = db.Column(db.Integer, nullable=False)
+
+    periods = db.Column(db.Integer, nullable=False, default=0)
+    gross_pay = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    paye = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    uif = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    sdl = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    net_pay = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    fringe_benefit = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    bonus = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    allowances = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    last_pay_period_end = db.Column(db.Date, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    KEY = ('employee_id', 'tax_year')
+
+    # Entry columns whose changes affect a ledger row
+    SOURCE_FIELDS = (
+        'employee_id', 'company_id', 'pay_period_start', 'pay_period_end', 'gross_pay', 'paye', 'uif', 'sdl',
+        'net_pay', 'fringe_benefit_medical', 'bonus_amount', 'allowances', 'is_finalized',
+    )
+
+    def __repr__(self):
+        return f'<YtdLedger employee {self.employee_id} {self.tax_year}: {self.periods} periods>'
+
+    @staticmethod
+    def totals_columns():
+        """YTD sums over finalized payroll entries, labelled like the ledger columns"""
+        return (
+            func.count(PayrollEntry.id).label('periods'),
+            func.coalesce(func.sum(PayrollEntry.gross_pay), 0).label('gross_pay'),
+            func.coalesce(func.sum(PayrollEntry.paye), 0).label('paye'),
+            func.coalesce(func.sum(PayrollEntry.uif), 0).label('uif'),
+            func.coalesce(func.sum(PayrollEntry.sdl), 0).label('sdl'),
+            func.coalesce(func.sum(PayrollEntry.net_pay), 0).label('net_pay'),
+            func.coalesce(func.sum(PayrollEntry.fringe_benefit_medical), 0).label('fringe_benefit'),
+            func.coalesce(func.sum(PayrollEntry.bonus_amount), 0).label('bonus'),
+            func.coalesce(func.sum(PayrollEntry.allowances), 0).label('allowances'),
+            func.max(PayrollEntry.pay_period_end).label('last_pay_period_end'),
+        )
+
+    @classmethod
+    def aggregate_select(cls):
+        """Ledger columns aggregated from finalized entries, grouped by employee and tax year"""
+        tax_year = tax_year_column(PayrollEntry.pay_period_start)
+        return select(
+            PayrollEntry.employee_id.label('employee_id'),
+            func.max(PayrollEntry.company_id).label('company_id'),
+            tax_year.label('tax_year'),
+            *cls.totals_columns(),
+        )\
+            .where(PayrollEntry.is_finalized == True)\
+            .group_by(PayrollEntry.employee_id, tax_year)
+
+    @classmethod
+    def refresh(cls, connection, buckets):
+        """Recompute the ledger rows for an iterable of (employee_id, tax_year) pairs"""
+        buckets = {bucket for bucket in buckets if bucket[0] is not None and bucket[1] is not None}
+        if not buckets:
+            return
+        employee_ids = sorted({employee_id for employee_id, _ in buckets})
+        aggregates = [
+            row for row in connection.execute(
+                cls.aggregate_select().where(PayrollEntry.employee_id.in_(employee_ids))
+            )
+            if (row.employee_id, row.tax_year) in buckets
+        ]
+        table = cls.__table__
+        sync_rollup(connection, table, cls.KEY, aggregates,
+                    tuple_(table.c.employee_id, table.c.tax_year).in_(sorted(buckets)))
+
+    @classmethod
+    def remove_entries(cls, rows):
+        """Recompute the ledger rows of entries deleted by bulk statements that bypass the flush
+
+        ``rows`` are mappings with the deleted entries' ``employee_id``,
+        ``pay_period_start`` and ``is_finalized``; the caller commits.
+        """
+        keys = {
+            (row['employee_id'], tax_year_for(row['pay_period_start']))
+            for row in rows
+            if row['is_finalized'] and row['pay_period_start']
+        }
+        if keys:
+            cls.refresh(db.session.connection(), keys)
+            expire_loaded(db.session, cls, cls.KEY, keys)
+
+    @classmethod
+    def rebuild(cls, company_id=None):
+        """Recompute every ledger row, optionally for one company; the caller commits"""
+        table = cls.__table__
+        stmt = cls.aggregate_select()
+        existing = true()
+        if company_id is not None:
+            stmt = stmt.where(PayrollEntry.company_id == company_id)
+            existing = table.c.company_id == company_id
+        connection = db.session.connection()
+        sync_rollup(connection, table, cls.KEY, connection.execute(stmt).all(), existing)
+        expire_loaded(db.session, cls, cls.KEY)
+
+    def to_dict(self):
+        """Convert ledger row to dictionary"""
+        return {
+            'employee_id': self.employee_id,
+            'company_id': self.company_id,
+            'tax_year': self.tax_year,
+            'periods': self.periods,
+            'gross_pay': float(self.gross_pay or 0),
+            'paye': float(self.paye or 0),
+            'uif': float(self.uif or 0),
+            'sdl': float(self.sdl or 0),
+            'net_pay': float(self.net_pay or 0),
+            'fringe_benefit': float(self.fringe_benefit or 0),
+            'bonus': float(self.bonus or 0),
+            'allowances': float(self.allowances or 0),
+            'last_pay_period_end': self.last_pay_period_end.isoformat() if self.last_pay_period_end else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Load the old ledger keys on assignment so moved entries also refresh the year they left
+for _attribute in (PayrollEntry.employee_id, PayrollEntry.pay_period_start, PayrollEntry.is_finalized):
+    event.listen(_attribute, 'set', _load_previous_value, active_history=True, retval=True)
+
+
+def _entry_ledger_keys(entry):
+    """(employee_id, tax_year) before and after the pending changes of a finalized entry"""
+    state = inspect(entry)
+    keys = set()
+    if entry.is_finalized and entry.pay_period_start:
+        keys.add((entry.employee_id, tax_year_for(entry.pay_period_start)))
+    if state.has_identity:
+        def previous(field):
+            history = state.attrs[field].history
+            return (history.deleted or history.unchanged or [getattr(entry, field)])[0]
+
+        if previous('is_finalized') and previous('pay_period_start'):
+            keys.add((previous('employee_id'), tax_year_for(previous('pay_period_start'))))
+    return keys
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_ytd_ledgers(session, flush_context):
+    """Recompute the ledger rows of tax years whose finalized entries changed"""
+    keys = set()
+    for obj in session.new:
+        if isinstance(obj, PayrollEntry):
+            keys |= _entry_ledger_keys(obj)
+    for obj in session.dirty:
+        if isinstance(obj, PayrollEntry) and any(
+            inspect(obj).attrs[field].history.has_changes() for field in YtdLedger.SOURCE_FIELDS
+        ):
+            keys |= _entry_ledger_keys(obj)
+    for obj in session.deleted:
+        if isinstance(obj, PayrollEntry):
+            keys |= _entry_ledger_keys(obj)
+
+    keys = {key for key in keys if key[0]}
+    if not keys:
+        return
+
+    YtdLedger.refresh(session.connection(), keys)
+    expire_loaded(session, YtdLedger, YtdLedger.KEY, keys)
@@ -3,6 +3,8 @@ from flask_login import login_required, current_user
 from app.models import Company, Employee, PayrollEntry, ComplianceReminder
 from app.services.portfolio_service import PortfolioService
 from app.services.compliance_calendar_service import ComplianceCalendarService
+from app.services.job_service import JobService
+from app.routes.jobs import job_accepted
 from app import db
 from sqlalchemy import desc, and_, or_
 from datetime import datetime, timedelta
@@ -87,6 +89,46 @@ def switch_company(company_id):
     # Default redirect
     return redirect(url_for('dashboard.overview'))
 
+@accountant_dashboard_bp.route('/payroll-run', methods=['POST'])
+@login_required
+def portfolio_payroll_run():
+    """Queue one payroll period for several companies as a background job"""
+    
+    if not current_user.is_accountant:
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+    
+    period_start_str = request.form.get('period_start')
+    period_end_str = request.form.get('period_end')
+    try:
+        datetime.strptime(period_start_str or '', '%Y-%m-%d')
+        datetime.strptime(period_end_str or '', '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Please provide both start and end dates.'}), 400
+    
+    # Selected companies, or the whole portfolio when none are given
+    user_company_ids = [c.id for c in current_user.companies.all()]
+    company_ids = request.form.getlist('company_ids')
+    if company_ids:
+        try:
+            company_ids = [int(cid) for cid in company_ids]
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid company selection'}), 400
+        denied = [cid for cid in company_ids if cid not in user_company_ids]
+        if denied:
+            return jsonify({'success': False, 'message': 'You do not have access to all selected companies.'}), 403
+    else:
+        company_ids = user_company_ids
+    
+    if not company_ids:
+        return jsonify({'success': False, 'message': 'No companies selected'}), 400
+    
+    job = JobService.enqueue('payroll.portfolio', {
+        'company_ids': company_ids,
+        'period_start': period_start_str,
+        'period_end': period_end_str,
+    }, user_id=current_user.id)
+    return job_accepted(job)
+
 @accountant_dashboard_bp.route('/clear-cache')
 @login_required
 def clear_cache():
@@ -117,8 +159,7 @@ def _calculate_pending_issues(company_id):
     # Check for missing payroll entries this month
     current_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     current_month_payroll = db.session.query(PayrollEntry)\
-        .join(Employee)\
-        .filter(Employee.company_id == company_id)\
+        .filter(PayrollEntry.company_id == company_id)\
         .filter(PayrollEntry.pay_period_end >= current_month_start)\
         .count()
     
@@ -142,8 +183,7 @@ def _get_upcoming_payroll_actions(companies):
         # Check if payroll has been run this month
         current_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         payroll_done = db.session.query(PayrollEntry)\
-            .join(Employee)\
-            .filter(Employee.company_id == company.id)\
+            .filter(PayrollEntry.company_id == company.id)\
             .filter(PayrollEntry.pay_period_end >= current_month_start)\
             .count() > 0
         
@@ -184,8 +224,7 @@ def _get_compliance_notifications(companies):
         # Check for overdue payroll
         current_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         payroll_done = db.session.query(PayrollEntry)\
-            .join(Employee)\
-            .filter(Employee.company_id == company.id)\
+            .filter(PayrollEntry.company_id == company.id)\
             .filter(PayrollEntry.pay_period_end >= current_month_start)\
             .count() > 0
         
@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_required, current_user
 from app.models import GlobalSARSConfig, DocumentTemplate
 from app import db
+from app.services.sars_config_resolver import SARSConfigResolver
 from decimal import Decimal
 from werkzeug.utils import secure_filename
 import os
@@ -64,6 +65,7 @@ def sars_settings():
             config.currency_symbol = request.form.get('currency_symbol', 'R').strip()
             
             db.session.commit()
+            SARSConfigResolver.bump_version()
             flash("SARS configuration updated successfully! Changes will apply to all companies using global defaults.", "success")
             
         except ValueError as e:
@@ -448,6 +448,10 @@ def remove_company(company_id):
             ComplianceReminder.query.filter_by(company_id=company.id).delete(synchronize_session=False)
             SARSConfig.query.filter_by(company_id=company.id).delete(synchronize_session=False)
             
+            # Remove the company's background jobs and their result files
+            from app.services.job_service import JobService
+            JobService.remove_company_jobs(company.id)
+            
             # Update any users who have this company as their current company
             from app.models.user import User
             User.query.filter_by(current_company_id=company.id).update({'current_company_id': None})
@@ -1,7 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
 from flask_login import login_required, current_user
 from app import db
-from app.models import Company, Beneficiary, Employee, EmployeeRecurringDeduction, CompanyDeductionDefault, CompanyDepartment
+from app.models import Company, Beneficiary, Employee, EmployeeRecurringDeduction, CompanyDeductionDefault, CompanyDepartment, PayrollEntryDeduction
 from app.forms import EmployeeDefaultsForm
 from app.services.sars_service import SARSService
 
@@ -200,6 +200,7 @@ def delete_beneficiary(company_id, beneficiary_id):
     # Check if beneficiary is referenced elsewhere
     default_count = CompanyDeductionDefault.query.filter_by(beneficiary_id=beneficiary.id).count()
     deduction_count = EmployeeRecurringDeduction.query.filter_by(beneficiary_id=beneficiary.id).count()
+    payroll_line_count = PayrollEntryDeduction.query.filter_by(beneficiary_id=beneficiary.id).count()
 
     if default_count or deduction_count:
         flash(
@@ -208,6 +209,13 @@ def delete_beneficiary(company_id, beneficiary_id):
         )
         return redirect(url_for('company.beneficiaries', company_id=company_id))
 
+    if payroll_line_count:
+        flash(
+            f"Cannot delete beneficiary because {payroll_line_count} past payroll deduction(s) were paid to it. Payslips and reports for those periods still need it.",
+            "warning",
+        )
+        return redirect(url_for('company.beneficiaries', company_id=company_id))
+
     try:
         beneficiary_name = beneficiary.name
         db.session.delete(beneficiary)
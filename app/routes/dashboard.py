@@ -5,9 +5,10 @@ import calendar
 import os
 from app.services.employee_service import EmployeeService
 from app.services.company_service import CompanyService
-from app.services.payroll_service import calculate_ytd_totals
+from app.services.payroll_service import get_ytd_totals
+from app.models.ytd_ledger import tax_year_for
 from app.services.compliance_calendar_service import ComplianceCalendarService
-from app.models import Company, CompanyDeductionDefault, Beneficiary, EmployeeRecurringDeduction, Employee, PayrollEntry
+from app.models import Company, CompanyDeductionDefault, Beneficiary, EmployeeRecurringDeduction, Employee, PayrollEntry, PayrollPeriodSummary
 from app import db
 from sqlalchemy import func
 from decimal import Decimal
@@ -294,35 +295,16 @@ def overview():
 
         # Payroll progress tracking
         from datetime import date
-        import calendar
 
         today = date.today()
         current_period = today.strftime('%Y-%m')
-        month_start = today.replace(day=1)
-        last_day = calendar.monthrange(today.year, today.month)[1]
-        month_end = today.replace(day=last_day)
 
         total_employees = Employee.query.filter_by(company_id=selected_company_id).count()
 
-        processed = db.session.query(PayrollEntry).join(Employee)\
-            .filter(Employee.company_id == selected_company_id)\
-            .filter(PayrollEntry.pay_period_start >= month_start)\
-            .filter(PayrollEntry.pay_period_end <= month_end)\
-            .count()
-
-        verified = db.session.query(PayrollEntry).join(Employee)\
-            .filter(Employee.company_id == selected_company_id)\
-            .filter(PayrollEntry.pay_period_start >= month_start)\
-            .filter(PayrollEntry.pay_period_end <= month_end)\
-            .filter(PayrollEntry.is_verified.is_(True))\
-            .count()
-
-        finalized = db.session.query(PayrollEntry).join(Employee)\
-            .filter(Employee.company_id == selected_company_id)\
-            .filter(PayrollEntry.pay_period_start >= month_start)\
-            .filter(PayrollEntry.pay_period_end <= month_end)\
-            .filter(PayrollEntry.is_finalized.is_(True))\
-            .count()
+        summary = PayrollPeriodSummary.for_company(selected_company_id, current_period)
+        processed = summary.headcount if summary else 0
+        verified = summary.verified_count if summary else 0
+        finalized = summary.finalized_count if summary else 0
 
         def pct(count):
             return int((count / total_employees) * 100) if total_employees else 0
@@ -344,12 +326,9 @@ def overview():
         department_stats = {dept: count for dept, count in dept_rows}
         largest_department = max(department_stats, key=department_stats.get) if department_stats else None
         
-        # Calculate YTD company totals
+        # Calculate YTD company totals from the tax-year ledger in one read
         today = date.today()
-        tax_year_start = date(today.year if today.month >= 3 else today.year - 1, 3, 1)
-        
-        # Get all employees for the company and calculate YTD totals
-        company_employees = Employee.query.filter_by(company_id=selected_company_id).all()
+        tax_year = tax_year_for(today)
         
         ytd_stats = {
             'gross_total': 0.0,
@@ -360,21 +339,18 @@ def overview():
             'finalized_periods': 0
         }
         
-        if company_employees:
-            for emp in company_employees:
-                emp_ytd = calculate_ytd_totals(emp.id, tax_year_start)
-                ytd_stats['gross_total'] += emp_ytd.get('gross_pay_ytd', 0)
-                ytd_stats['paye_total'] += emp_ytd.get('paye_ytd', 0)
-                ytd_stats['uif_total'] += emp_ytd.get('uif_ytd', 0)
-                ytd_stats['sdl_total'] += emp_ytd.get('sdl_ytd', 0)
-                ytd_stats['net_total'] += emp_ytd.get('net_pay_ytd', 0)
+        for emp_ytd in get_ytd_totals(selected_company_id, tax_year).values():
+            ytd_stats['gross_total'] += emp_ytd.get('gross_pay_ytd', 0)
+            ytd_stats['paye_total'] += emp_ytd.get('paye_ytd', 0)
+            ytd_stats['uif_total'] += emp_ytd.get('uif_ytd', 0)
+            ytd_stats['sdl_total'] += emp_ytd.get('sdl_ytd', 0)
+            ytd_stats['net_total'] += emp_ytd.get('net_pay_ytd', 0)
         
         # Count finalized payroll periods
-        finalized_periods = db.session.query(PayrollEntry.month_year)\
-            .join(Employee)\
-            .filter(Employee.company_id == selected_company_id)\
-            .filter(PayrollEntry.is_finalized.is_(True))\
-            .distinct().count()
+        finalized_periods = PayrollPeriodSummary.query\
+            .filter_by(company_id=selected_company_id)\
+            .filter(PayrollPeriodSummary.finalized_count > 0)\
+            .count()
         ytd_stats['finalized_periods'] = finalized_periods
         
         # Compliance metrics
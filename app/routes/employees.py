@@ -10,6 +10,19 @@ from app.models.beneficiary import Beneficiary
 from app.models.employee_medical_aid_info import EmployeeMedicalAidInfo
 from app.models.ui19_record import UI19Record
 from app.models.document_template import DocumentTemplate
+from app.models.import_batch import ImportBatch, ImportRow
+from app.services.employee_import_service import (
+    IMPORT_HEADER_MAP,
+    validate_sa_cell_number,
+    normalize_phone,
+    validate_south_african_id,
+    extract_info_from_id,
+    validate_import_frame,
+    revalidate_import_data,
+    commit_import_batch,
+)
+from app.services.employee_id_service import generate_employee_id, preview_employee_id
+from app.services.employee_typeahead import typeahead_cache
 from app.services.payroll_service import (
     calculate_medical_aid_deduction,
     calculate_medical_aid_fringe_benefit,
@@ -19,9 +32,9 @@ from app import db
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from io import BytesIO
+from sqlalchemy import delete as sql_delete
+from sqlalchemy.exc import IntegrityError
 import pandas as pd
-import re
-import hashlib
 import tempfile
 import os
 from docx import Document
@@ -30,291 +43,6 @@ from docx2pdf import convert
 # Create employees blueprint
 employees_bp = Blueprint('employees', __name__, url_prefix='/employees')
 
-# Mapping between spreadsheet headers and model fields
-IMPORT_HEADER_MAP = {
-    'First Name': 'first_name',
-    'Last Name': 'last_name',
-    'South African ID Number': 'id_number',
-    'Tax Number': 'tax_number',
-    'Cell Number': 'cell_number',
-    'Email Address': 'email',
-    'Date of Birth': 'date_of_birth',
-    'Gender': 'gender',
-    'Marital Status': 'marital_status',
-    'Department': 'department',
-    'Job Title': 'job_title',
-    'Start Date': 'start_date',
-    'Employment Type': 'employment_type',
-    'Salary Type': 'salary_type',
-    'Hourly Rate': 'hourly_rate',
-    'Monthly Salary': 'monthly_salary',
-    'Bank Name': 'bank_name',
-    'Account Number': 'account_number',
-    'Account Type': 'account_type',
-    'Annual Leave Days': 'annual_leave_days',
-}
-
-# Normalization lookup tables
-GENDER_MAP = {
-    'm': 'Male',
-    'male': 'Male',
-    'f': 'Female',
-    'female': 'Female'
-}
-
-STATUS_MAP = {
-    'single': 'Single',
-    'married': 'Married',
-    'divorced': 'Divorced',
-    'widowed': 'Widowed',
-}
-
-BANK_MAP = {
-    'absa': 'ABSA',
-    'fnb': 'FNB',
-    'standard bank': 'Standard Bank',
-    'capitec': 'Capitec Bank',
-    'nedbank': 'Nedbank',
-}
-
-
-def validate_sa_cell_number(cell_number: str) -> tuple[bool, str]:
-    """Validate South African cell number format and return validity and error message"""
-    if not cell_number:
-        return False, "Cell number is required"
-    
-    # Check if matches the full regex pattern for both formats
-    pattern = r'^(\+27|0)[6-8][0-9]{8}$'
-    if re.match(pattern, cell_number.strip()):
-        return True, ""
-    
-    return False, "Please enter a valid South African mobile number (0791234567 or +27791234567)."
-
-def normalize_phone(val: str) -> str:
-    """Normalize a South African phone number to +27 format"""
-    if not val:
-        return ''
-    
-    # Remove all non-digit characters
-    digits = re.sub(r'\D', '', str(val))
-    
-    # Handle different input formats
-    if digits.startswith('27') and len(digits) == 11:
-        # Already in 27xxxxxxxxx format
-        pass
-    elif digits.startswith('0') and len(digits) == 10:
-        # SA format 0xxxxxxxxx -> convert to 27xxxxxxxxx
-        digits = '27' + digits[1:]
-    elif len(digits) == 9:
-        # Missing leading 0, assume SA format -> add 27
-        digits = '27' + digits
-    else:
-        # Invalid format, return as-is
-        return val
-    
-    return '+' + digits if digits else ''
-
-
-def parse_date(val):
-    """Parse a date from various common formats"""
-    if pd.isna(val) or val == '':
-        return None
-    for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d'):
-        try:
-            return datetime.strptime(str(val), fmt).date()
-        except Exception:
-            continue
-    try:
-        return pd.to_datetime(val, dayfirst=True).date()
-    except Exception:
-        return None
-
-
-def clean_import_value(val):
-    """Clean up raw values imported from Excel."""
-    if pd.isna(val) or val is None:
-        return ''
-    val = str(val).strip()
-    if val.startswith("'"):
-        val = val.lstrip("'")
-    return val
-
-def slugify_company_name(company_name):
-    """Convert company name to a slug format"""
-    # Remove special characters and convert to lowercase
-    slug = re.sub(r'[^a-zA-Z0-9\s]', '', company_name.lower())
-    # Replace spaces with hyphens
-    slug = re.sub(r'\s+', '-', slug.strip())
-    return slug
-
-def generate_unique_company_prefix(company_id, company_name):
-    """Generate a unique 5-character prefix for the company"""
-    # First try to generate from company name
-    slug = slugify_company_name(company_name)
-    
-    # Extract characters for prefix (skip hyphens, take consonants first, then vowels)
-    chars = []
-    consonants = []
-    vowels = []
-    
-    for char in slug:
-        if char.isalpha():
-            if char in 'aeiou':
-                vowels.append(char.upper())
-            else:
-                consonants.append(char.upper())
-    
-    # Prefer consonants first, then vowels
-    chars = consonants + vowels
-    
-    # Try different combinations to get 5 unique characters
-    if len(chars) >= 5:
-        prefix = ''.join(chars[:5])
-    elif len(chars) >= 3:
-        # Pad with first letters repeated or use company ID hash
-        prefix = ''.join(chars[:3])
-        # Add digits from company ID
-        prefix += str(company_id).zfill(2)[:2]
-    else:
-        # Fallback: use hash of company name + ID
-        hash_input = f"{company_name}_{company_id}".encode()
-        hash_hex = hashlib.md5(hash_input).hexdigest()
-        prefix = ''.join(c.upper() for c in hash_hex if c.isalpha())[:5]
-        if len(prefix) < 5:
-            prefix = prefix + hash_hex[:5-len(prefix)].upper()
-    
-    # Ensure exactly 5 characters
-    prefix = prefix[:5].ljust(5, 'X')
-    
-    return prefix
-
-def check_prefix_uniqueness(prefix, company_id):
-    """Check if prefix is unique across all companies except current one"""
-    # Check if any other company is already using this prefix
-    existing = db.session.query(Employee.employee_id).filter(
-        Employee.employee_id.like(f"{prefix}-EMP%"),
-        Employee.company_id != company_id
-    ).first()
-    
-    return existing is None
-
-def validate_south_african_id(id_number):
-    """Validate South African ID number format and basic structure"""
-    # Check if ID is exactly 13 digits
-    if not id_number or len(id_number) != 13 or not id_number.isdigit():
-        return False, "ID number must be exactly 13 digits"
-    
-    # Extract date components (YYMMDD)
-    try:
-        year = int(id_number[:2])
-        month = int(id_number[2:4])
-        day = int(id_number[4:6])
-        
-        # Determine century (if year > 21, assume 19xx, else 20xx)
-        full_year = 1900 + year if year > 21 else 2000 + year
-        
-        # Validate date components - basic range checks
-        if month < 1 or month > 12:
-            return False, "Invalid month in ID number"
-        
-        if day < 1 or day > 31:
-            return False, "Invalid day in ID number"
-        
-        # Check if date is not in the future (with some flexibility)
-        try:
-            test_date = date(full_year, month, day)
-            if test_date > date.today():
-                return False, "Date of birth cannot be in the future"
-        except ValueError:
-            # Allow some flexibility for dates that might be edge cases
-            pass
-            
-    except ValueError:
-        return False, "Invalid date format in ID number"
-    
-    # Extract gender sequence (digits 7-10) - basic range check
-    try:
-        gender_sequence = int(id_number[6:10])
-        if gender_sequence < 0 or gender_sequence > 9999:
-            return False, "Invalid gender sequence in ID number"
-    except ValueError:
-        return False, "Invalid gender sequence in ID number"
-    
-    # Skip checksum validation as it's often problematic with real IDs
-    # Focus on format and basic structure validation instead
-    
-    return True, "Valid South African ID number"
-
-def extract_info_from_id(id_number):
-    """Extract date of birth and gender from valid South African ID number"""
-    if len(id_number) != 13 or not id_number.isdigit():
-        return None, None
-    
-    # Extract date components
-    year = int(id_number[:2])
-    month = int(id_number[2:4])
-    day = int(id_number[4:6])
-    
-    # Determine century
-    full_year = 1900 + year if year > 21 else 2000 + year
-    
-    try:
-        birth_date = date(full_year, month, day)
-    except ValueError:
-        return None, None
-    
-    # Extract gender (digits 7-10: >= 5000 = Male, < 5000 = Female)
-    gender_sequence = int(id_number[6:10])
-    gender = "Male" if gender_sequence >= 5000 else "Female"
-    
-    return birth_date, gender
-
-def generate_employee_id(company_id):
-    """Generate a unique employee ID for the given company"""
-    # Get company details
-    company = Company.query.get(company_id)
-    if not company:
-        raise ValueError("Company not found")
-    
-    # Generate base prefix
-    base_prefix = generate_unique_company_prefix(company_id, company.name)
-    
-    # Ensure prefix uniqueness across companies
-    prefix = base_prefix
-    counter = 1
-    while not check_prefix_uniqueness(prefix, company_id):
-        # If not unique, modify slightly
-        if counter == 1:
-            prefix = base_prefix[:-1] + str(company_id % 10)
-        else:
-            # Use hash fallback
-            hash_input = f"{company.name}_{company_id}_{counter}".encode()
-            hash_hex = hashlib.md5(hash_input).hexdigest()
-            prefix = ''.join(c.upper() for c in hash_hex if c.isalpha())[:5]
-            if len(prefix) < 5:
-                prefix = prefix + hash_hex[:5-len(prefix)].upper()
-        counter += 1
-        if counter > 10:  # Safety break
-            break
-    
-    # Get next sequence number for this company
-    employee_count = Employee.query.filter_by(company_id=company_id).count()
-    seq = employee_count + 1
-    
-    # Generate employee ID and ensure it's unique
-    max_attempts = 100
-    for attempt in range(max_attempts):
-        employee_id = f"{prefix}-EMP{seq:03d}"
-        
-        # Check if this ID already exists anywhere in the system
-        existing = Employee.query.filter_by(employee_id=employee_id).first()
-        if not existing:
-            return employee_id
-        
-        seq += 1
-    
-    # Fallback if all attempts failed
-    raise ValueError("Unable to generate unique employee ID after maximum attempts")
 
 @employees_bp.route('/')
 @login_required
@@ -336,15 +64,15 @@ def index():
     search = request.args.get('search', '')
     department = request.args.get('department', '')
     status = request.args.get('status', '')
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     per_page = 10
     
-    # Get filtered employees scoped to selected company
-    employees_data = EmployeeService.get_employees_paginated(
+    # Get filtered employees scoped to selected company, one keyset page at a time
+    employees_data = EmployeeService.get_employees_keyset(
         search=search,
         department=department,
         status=status,
-        page=page,
+        cursor=cursor,
         per_page=per_page,
         company_id=selected_company_id
     )
@@ -486,13 +214,12 @@ def search():
     
     query = request.args.get('q', '')
     
-    if len(query) < 2:
+    if len(query) < 2 or not selected_company_id:
         return {'employees': []}
     
-    employees = EmployeeService.search_employees(query, limit=10, company_id=selected_company_id)
-    
+    # Served from the in-process typeahead index, without a database round trip once warm
     return {
-        'employees': [emp.to_dict() for emp in employees]
+        'employees': typeahead_cache().search(selected_company_id, query, limit=10)
     }
 
 
@@ -556,8 +283,8 @@ def new():
     
     if request.method == 'POST':
         try:
-            # Auto-generate unique employee ID
-            generated_employee_id = generate_employee_id(selected_company_id)
+            # Shown again if the form is re-rendered; reserved when the employee is saved
+            generated_employee_id = preview_employee_id(selected_company_id)
         except ValueError as e:
             flash(f'Error generating employee ID: {str(e)}', 'error')
             return render_template('employees/new.html')
@@ -913,7 +640,7 @@ def new():
         try:
             new_employee = Employee()
             new_employee.company_id = selected_company_id  # Assign to selected company
-            new_employee.employee_id = generated_employee_id  # Use auto-generated ID
+            new_employee.employee_id = generate_employee_id(selected_company_id)  # Reserve auto-generated ID
             
             # Personal Information
             new_employee.first_name = first_name
@@ -1112,9 +839,9 @@ def new():
                                  beneficiaries=beneficiaries,
                                  form_data=request.form)
     
-    # GET request - show form with generated employee ID
+    # GET request - show form with the next employee ID
     try:
-        generated_employee_id = generate_employee_id(selected_company_id)
+        generated_employee_id = preview_employee_id(selected_company_id)
     except ValueError as e:
         flash(f'Error generating employee ID: {str(e)}', 'error')
         generated_employee_id = None
@@ -1755,6 +1482,8 @@ def delete(employee_id):
     """Delete employee and all related records"""
     from app.models.ui19_record import UI19Record
     from app.models.payroll_entry import PayrollEntry
+    from app.models.payroll_period_summary import PayrollPeriodSummary
+    from app.models.ytd_ledger import YtdLedger
     from app.models.employee_recurring_deduction import EmployeeRecurringDeduction
     from app.models.employee_medical_aid_info import EmployeeMedicalAidInfo
     
@@ -1770,8 +1499,15 @@ def delete(employee_id):
         # 1. Delete UI19 records
         UI19Record.query.filter_by(employee_id=employee_id).delete()
         
-        # 2. Delete payroll entries
-        PayrollEntry.query.filter_by(employee_id=employee_id).delete()
+        # 2. Delete payroll entries, taking them out of their period summaries and YTD ledgers
+        returned_fields = dict.fromkeys(PayrollPeriodSummary.SOURCE_FIELDS + ('employee_id', 'pay_period_start'))
+        deleted_entries = db.session.execute(
+            sql_delete(PayrollEntry)
+            .where(PayrollEntry.employee_id == employee_id)
+            .returning(*(getattr(PayrollEntry, field) for field in returned_fields))
+        ).mappings().all()
+        PayrollPeriodSummary.remove_entries(deleted_entries)
+        YtdLedger.remove_entries(deleted_entries)
         
         # 3. Delete recurring deductions
         EmployeeRecurringDeduction.query.filter_by(employee_id=employee_id).delete()
@@ -1934,6 +1670,11 @@ def payroll_new(employee_id):
             flash(f'Payroll entry created successfully for {employee.full_name}. Net pay: R{payroll_entry.net_pay:,.2f}', 'success')
             return redirect(url_for('employees.view', employee_id=employee_id))
             
+        except IntegrityError:
+            # Another request created the entry for this period after the check above
+            db.session.rollback()
+            flash('Payroll entry already exists for this pay period', 'error')
+            return render_template('payroll/new.html', employee=employee)
         except Exception as e:
             db.session.rollback()
             current_app.logger.error("Error creating payroll entry: %s", e)
@@ -2254,8 +1995,12 @@ def update_medical_aid(employee_id):
 @employees_bp.route('/import', methods=['GET', 'POST'])
 @login_required
 def import_employees():
-    """Upload file and preview employees before import"""
+    """Upload file and stage its rows for review before import"""
     if request.method == 'POST':
+        selected_company_id = session.get('selected_company_id')
+        if not selected_company_id:
+            flash('Please select a company before importing employees.', 'warning')
+            return redirect(url_for('employees.import_employees'))
         file = request.files.get('file')
         apply_defaults = bool(request.form.get('apply_defaults'))
         if not file:
@@ -2267,147 +2012,103 @@ def import_employees():
             flash(f'Unable to read file: {e}', 'error')
             return redirect(url_for('employees.import_employees'))
 
-        rows = []
-        for index, raw_row in df.iterrows():
-            data = {}
-            errors = []
-            for hdr, field in IMPORT_HEADER_MAP.items():
-                raw_val = raw_row.get(hdr, '')
-                data[field] = clean_import_value(raw_val)
-            
-            # Validate and normalize cell number
-            cell_number = data.get('cell_number', '').strip()
-            if cell_number:
-                cell_valid, cell_error = validate_sa_cell_number(cell_number)
-                if not cell_valid:
-                    errors.append(f"Cell number: {cell_error}")
-                else:
-                    data['cell_number'] = normalize_phone(cell_number)
-            else:
-                errors.append("Cell number is required")
-            if data.get('gender'):
-                g = data['gender'].strip().lower()
-                data['gender'] = GENDER_MAP.get(g, g.title())
-            if data.get('marital_status'):
-                m = data['marital_status'].strip().lower()
-                data['marital_status'] = STATUS_MAP.get(m, m.title())
-            if data.get('bank_name'):
-                b = data['bank_name'].strip().lower()
-                for k, v in BANK_MAP.items():
-                    if k in b:
-                        data['bank_name'] = v
-                        break
-            id_number = data.get('id_number')
-            if id_number:
-                valid, msg = validate_south_african_id(str(id_number))
-                if not valid:
-                    errors.append(msg)
-                else:
-                    birth, gen = extract_info_from_id(str(id_number))
-                    if birth and not data.get('date_of_birth'):
-                        data['date_of_birth'] = birth
-                    if gen and not data.get('gender'):
-                        data['gender'] = gen
-            if data.get('date_of_birth'):
-                dob = parse_date(data['date_of_birth'])
-                if dob:
-                    data['date_of_birth'] = dob
-                else:
-                    errors.append('Invalid date of birth')
-                    data['date_of_birth'] = None
-            if data.get('start_date'):
-                sd = parse_date(data['start_date'])
-                if sd:
-                    data['start_date'] = sd
-                else:
-                    errors.append('Invalid start date')
-                    data['start_date'] = None
-            rows.append({'data': data, 'errors': errors, 'status': 'pending'})
-        session['import_rows'] = rows
-        session['apply_defaults'] = apply_defaults
-        session['field_order'] = list(IMPORT_HEADER_MAP.values())
-        return redirect(url_for('employees.import_review'))
+        batch = ImportBatch.stage(selected_company_id, validate_import_frame(df), user_id=current_user.id,
+                                  filename=file.filename, apply_defaults=apply_defaults)
+        db.session.commit()
+        return redirect(url_for('employees.import_review', batch_id=batch.id))
     return render_template('employees/import.html')
 
-@employees_bp.route('/import/review', methods=['GET'])
+
+def get_import_batch_or_404(batch_id):
+    """Staged import batch of a company the current user can access"""
+    batch = db.session.get(ImportBatch, batch_id)
+    if batch is None or not current_user.has_company_access(batch.company_id):
+        abort(404)
+    return batch
+
+
+IMPORT_REVIEW_FILTERS = ('all', 'errors', 'valid', 'pending', 'confirmed', 'skipped', 'imported', 'failed')
+
+
+@employees_bp.route('/import/<int:batch_id>/review', methods=['GET'])
 @login_required
-def import_review():
-    """Review parsed employees before final import"""
-    rows = session.get('import_rows')
-    if not rows:
-        flash('No import data found. Please upload a file.', 'warning')
-        return redirect(url_for('employees.import_employees'))
-    field_order = session.get('field_order', list(IMPORT_HEADER_MAP.values()))
-    return render_template('employees/import_review.html', rows=rows, field_order=field_order, apply_defaults=session.get('apply_defaults'))
-
-@employees_bp.route('/import/confirm', methods=['POST'])
+def import_review(batch_id):
+    """Review a page of staged rows, rows with errors first"""
+    batch = get_import_batch_or_404(batch_id)
+    row_filter = request.args.get('filter', 'all')
+    if row_filter not in IMPORT_REVIEW_FILTERS:
+        row_filter = 'all'
+    page = request.args.get('page', 1, type=int)
+    pagination = batch.filtered_rows(row_filter).paginate(page=page, per_page=50, error_out=False)
+    return render_template('employees/import_review.html',
+                           batch=batch,
+                           rows=pagination.items,
+                           pagination=pagination,
+                           counts=batch.counts(),
+                           row_filter=row_filter,
+                           filters=IMPORT_REVIEW_FILTERS,
+                           field_order=list(IMPORT_HEADER_MAP.values()))
+
+
+@employees_bp.route('/import/<int:batch_id>/rows/<int:row_id>', methods=['POST'])
 @login_required
-def import_confirm():
-    """Import employees after preview"""
-    rows = session.get('import_rows', [])
-    apply_defaults = session.get('apply_defaults', False)
-    selected_company_id = session.get('selected_company_id')
-    company = Company.query.get(selected_company_id) if selected_company_id else None
-    imported = 0
-    skipped = 0
-    error_count = 0
-    for idx, row in enumerate(rows):
-        status = request.form.get(f'status_{idx}', row.get('status'))
-        if status != 'confirmed':
-            skipped += 1
-            continue
-        data = {}
-        for field in IMPORT_HEADER_MAP.values():
-            form_key = f'rows-{idx}-{field}'
-            raw_val = request.form.get(form_key) or row['data'].get(field)
-            data[field] = clean_import_value(raw_val)
-        data['cell_number'] = normalize_phone(data.get('cell_number'))
-        if apply_defaults and company:
-            default_map = {
-                'salary_type': 'default_salary_type',
-                'monthly_salary': 'default_salary',
-                'annual_leave_days': 'default_annual_leave_days',
-                'overtime_multiplier': 'overtime_multiplier',
-                'sunday_multiplier': 'sunday_multiplier',
-                'holiday_multiplier': 'public_holiday_multiplier',
-            }
-            for f, attr in default_map.items():
-                if not data.get(f) and getattr(company, attr, None) is not None:
-                    data[f] = getattr(company, attr)
-        try:
-            employee = Employee()
-            employee.company_id = selected_company_id
-            employee.employee_id = generate_employee_id(selected_company_id)
-            employee.first_name = data.get('first_name')
-            employee.last_name = data.get('last_name')
-            employee.id_number = str(data.get('id_number') or '')
-            employee.tax_number = str(data.get('tax_number')) if data.get('tax_number') else None
-            employee.cell_number = data.get('cell_number')
-            employee.email = data.get('email') or None
-            employee.date_of_birth = parse_date(data.get('date_of_birth')) if data.get('date_of_birth') else None
-            employee.gender = data.get('gender') or None
-            employee.marital_status = data.get('marital_status') or None
-            employee.department = data.get('department') or ''
-            employee.job_title = data.get('job_title') or ''
-            employee.start_date = parse_date(data.get('start_date')) if data.get('start_date') else None
-            employee.employment_type = data.get('employment_type') or 'Full-Time'
-            stype = (data.get('salary_type') or 'monthly').lower()
-            employee.salary_type = stype
-            salary_val = data.get('monthly_salary') if stype == 'monthly' else data.get('hourly_rate')
-            employee.salary = Decimal(str(salary_val)) if salary_val else Decimal('0')
-            employee.bank_name = data.get('bank_name') or ''
-            employee.account_number = str(data.get('account_number') or '')
-            employee.account_type = data.get('account_type') or 'Savings'
-            al = data.get('annual_leave_days') or 15
-            employee.annual_leave_days = int(al)
-            db.session.add(employee)
-            db.session.commit()
-            imported += 1
-        except Exception as e:
-            db.session.rollback()
-            error_count += 1
-            flash(f'Failed to import row {idx + 1}: {e}', 'error')
-    flash(f'Import complete: {imported} imported, {skipped} skipped, {error_count} errors', 'success')
+def import_update_row(batch_id, row_id):
+    """Set a staged row's review status and apply edited values"""
+    batch = get_import_batch_or_404(batch_id)
+    row = ImportRow.query.filter_by(id=row_id, batch_id=batch.id).first_or_404()
+    if batch.status != ImportBatch.STATUS_STAGED:
+        return jsonify({'success': False, 'message': 'This import has already been completed'}), 409
+
+    status = request.form.get('status')
+    if status is not None:
+        if status not in ImportRow.REVIEW_STATUSES:
+            return jsonify({'success': False, 'message': 'Invalid status'}), 400
+        row.status = status
+
+    edits = {field: request.form[field] for field in IMPORT_HEADER_MAP.values() if field in request.form}
+    if edits:
+        row.set_validated(*revalidate_import_data(dict(row.data, **edits)))
+    db.session.commit()
+    return jsonify({'success': True, 'row': row.to_dict(), 'counts': batch.counts()})
+
+
+@employees_bp.route('/import/<int:batch_id>/status', methods=['POST'])
+@login_required
+def import_bulk_status(batch_id):
+    """Set the review status of every pending or reviewed row matching a filter"""
+    batch = get_import_batch_or_404(batch_id)
+    status = request.form.get('status')
+    row_filter = request.form.get('filter', 'all')
+    if status not in ImportRow.REVIEW_STATUSES or row_filter not in IMPORT_REVIEW_FILTERS:
+        flash('Invalid review action.', 'error')
+    elif batch.status == ImportBatch.STATUS_STAGED:
+        updated = ImportRow.query\
+            .filter(*batch.row_criteria(row_filter))\
+            .filter(ImportRow.status.in_(ImportRow.REVIEW_STATUSES))\
+            .update({'status': status}, synchronize_session=False)
+        db.session.commit()
+        flash(f'{updated} rows marked as {status}.', 'success')
+    return redirect(url_for('employees.import_review', batch_id=batch.id, filter=row_filter))
+
+
+@employees_bp.route('/import/<int:batch_id>/confirm', methods=['POST'])
+@login_required
+def import_confirm(batch_id):
+    """Import the confirmed rows of a staged batch"""
+    batch = get_import_batch_or_404(batch_id)
+    if batch.status != ImportBatch.STATUS_STAGED:
+        flash('This import has already been completed.', 'warning')
+        return redirect(url_for('employees.index'))
+    summary = commit_import_batch(batch)
+    db.session.commit()
+    for row_number, message in summary['failures'][:10]:
+        flash(f'Failed to import row {row_number}: {message}', 'error')
+    if summary['failed'] > 10:
+        flash(f'{summary["failed"] - 10} more rows failed; see the failed rows of this import.', 'error')
+    flash(f'Import complete: {summary["imported"]} imported, {summary["skipped"]} skipped, '
+          f'{summary["failed"]} errors', 'success')
+    if summary['failed']:
+        return redirect(url_for('employees.import_review', batch_id=batch.id, filter=ImportRow.STATUS_FAILED))
     return redirect(url_for('employees.index'))
 
 
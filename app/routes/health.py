@@ -1,4 +1,5 @@
 from flask import Blueprint, jsonify
+from flask_login import login_required
 from app import db
 
 health_bp = Blueprint('health', __name__, url_prefix='/health')
@@ -23,3 +24,11 @@ def health_check():
 def ping():
     """Simple ping endpoint"""
     return jsonify({'message': 'pong'})
+
+
+@health_bp.route('/payslip-store')
+@login_required
+def payslip_store():
+    """Finalized payslip store hit/miss counters and size"""
+    from app.services.payslip_store import PayslipStore
+    return jsonify(PayslipStore.stats())
@@ -0,0 +1,54 @@
+from flask import Blueprint, jsonify, send_file, url_for, abort
+from flask_login import login_required, current_user
+from app.services.job_service import JobService
+
+# Create jobs blueprint
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+
+def job_accepted(job):
+    """202 response returned by async endpoints after enqueueing a job"""
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': url_for('jobs.status', job_id=job.id),
+        'cancel_url': url_for('jobs.cancel', job_id=job.id),
+        'download_url': url_for('jobs.download', job_id=job.id),
+    }), 202
+
+
+def get_job_or_404(job_id):
+    job = JobService.get_for_user(job_id, current_user)
+    if job is None:
+        abort(404)
+    return job
+
+
+@jobs_bp.route('/<int:job_id>')
+@login_required
+def status(job_id):
+    """Job status, progress and result"""
+    return jsonify(get_job_or_404(job_id).to_dict())
+
+
+@jobs_bp.route('/<int:job_id>/cancel', methods=['POST'])
+@login_required
+def cancel(job_id):
+    """Cancel a queued or running job"""
+    job = JobService.cancel(get_job_or_404(job_id))
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+
+@jobs_bp.route('/<int:job_id>/download')
+@login_required
+def download(job_id):
+    """Download the file produced by a finished job"""
+    job = get_job_or_404(job_id)
+    if not job.has_download:
+        return jsonify({'success': False, 'message': 'Job has no downloadable result yet', 'job': job.to_dict()}), 409
+
+    return send_file(job.result_path,
+                     mimetype=job.result_mimetype,
+                     as_attachment=True,
+                     download_name=job.result_filename)
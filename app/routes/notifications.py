@@ -55,6 +55,19 @@ def test_dispatch():
     })
 
 
+@notifications_bp.route('/api/test-dispatch/async', methods=['POST'])
+@login_required
+def test_dispatch_async():
+    """Queue a notification scan as a background job (admin only)"""
+    if not current_user.is_global_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+
+    from app.services.job_service import JobService
+    from app.routes.jobs import job_accepted
+    job = JobService.enqueue('notifications.scan', user_id=current_user.id)
+    return job_accepted(job)
+
+
 @notifications_bp.route('/unread')
 @login_required
 def unread():
@@ -1,11 +1,18 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, make_response, abort, session, jsonify, send_file
+from flask import Blueprint, render_template, request, flash, redirect, url_for, make_response, abort, session, jsonify, send_file, Response, stream_with_context, current_app
 from flask_login import login_required, current_user
-from app.models import Employee, PayrollEntry, Company
+from app.models import Employee, PayrollEntry, PayrollPeriodSummary, Company
 from app.models.employee_recurring_deduction import EmployeeRecurringDeduction
+from app.services.bulk_upsert import bulk_upsert
+from app.services.payroll_batch_service import PayrollBatchCalculator
+from app.services.payslip_render_service import PayslipRenderService
+from app.services.payslip_print_service import PayslipPrintRun
+from app.services.payslip_store import PayslipStore
+from app.services.report_query import ReportQuery
+from app.services.sars_service import SARSService
+from app.services.job_service import JobService
+from app.routes.jobs import job_accepted
 from app import db
 from datetime import datetime, date, timedelta
-import io
-import zipfile
 from decimal import Decimal
 from sqlalchemy import func, desc
 import calendar
@@ -93,8 +100,7 @@ def index():
     
     # Check if payroll has been processed this month
     payroll_processed = db.session.query(PayrollEntry)\
-        .join(Employee)\
-        .filter(Employee.company_id == selected_company_id)\
+        .filter(PayrollEntry.company_id == selected_company_id)\
         .filter(PayrollEntry.pay_period_start >= current_month_start)\
         .count() > 0
     
@@ -154,66 +160,9 @@ def process():
     period_start = datetime.strptime(period_start_str, '%Y-%m-%d').date()
     period_end = datetime.strptime(period_end_str, '%Y-%m-%d').date()
     
-    # Get company employees
-    employees = Employee.query.filter_by(company_id=selected_company_id).all()
-    
     try:
-        processed_count = 0
-        for employee in employees:
-            # Check if payroll entry already exists for this period
-            existing_entry = PayrollEntry.query.filter_by(
-                employee_id=employee.id,
-                pay_period_start=period_start,
-                pay_period_end=period_end
-            ).first()
-
-            if not existing_entry:
-                # Create new payroll entry with default values
-                payroll_entry = PayrollEntry()
-                payroll_entry.employee_id = employee.id
-                payroll_entry.pay_period_start = period_start
-                payroll_entry.pay_period_end = period_end
-                payroll_entry.month_year = datetime.now().strftime('%Y-%m')
-        
-                if employee.salary_type == 'daily':
-                    payroll_entry.ordinary_hours = Decimal('0')
-                    payroll_entry.hourly_rate = employee.salary / (employee.ordinary_hours_per_day or 8)
-                else:
-                    payroll_entry.ordinary_hours = Decimal(str((employee.ordinary_hours_per_day or 8) * (employee.work_days_per_month or 22)))
-                    payroll_entry.hourly_rate = employee.salary if employee.salary_type == 'hourly' else employee.salary / ((employee.ordinary_hours_per_day or 8) * (employee.work_days_per_month or 22))
-                payroll_entry.overtime_hours = Decimal('0.00')
-                payroll_entry.sunday_hours = Decimal('0.00')
-                payroll_entry.public_holiday_hours = Decimal('0.00')
-        
-                payroll_entry.allowances = Decimal('0.00')
-                payroll_entry.deductions_other = Decimal('0.00')
-                payroll_entry.union_fee = Decimal('0.00')
-                
-                # Calculate statutory deductions
-                gross_pay = payroll_entry.gross_pay
-                payroll_entry.paye = gross_pay * Decimal('0.18')  # Simplified PAYE calculation
-                
-                # UIF: Dynamic rate of gross pay, with dynamic caps
-                from app.services.sars_service import SARSService
-                sars_config = SARSService.get_company_sars_config(company_id)
-                
-                uif_eligible_salary = min(gross_pay, Decimal(str(sars_config['uif_salary_cap'])))
-                uif_amount = uif_eligible_salary * Decimal(str(sars_config['uif_percent']))
-                payroll_entry.uif = min(uif_amount, Decimal(str(sars_config['uif_monthly_cap'])))
-                
-                payroll_entry.sdl = gross_pay * Decimal(str(sars_config['sdl_percent']))  # SDL
-                
-                # Calculate net pay
-                payroll_entry.net_pay = gross_pay - payroll_entry.total_deductions
-                
-                db.session.add(payroll_entry)
-                processed_count += 1
-            else:
-                if not existing_entry.month_year:
-                    existing_entry.month_year = datetime.now().strftime('%Y-%m')
-        
-        db.session.commit()
-        flash('Payroll processed successfully. View the summary below.', 'success')
+        summary = PayrollBatchCalculator(selected_company_id, period_start, period_end).run()
+        flash(f"Payroll processed successfully ({summary['created']} new entries). View the summary below.", 'success')
         
     except Exception as e:
         db.session.rollback()
@@ -222,6 +171,30 @@ def process():
     
     return redirect(url_for('payroll.reports'))
 
+@payroll_bp.route('/process/async', methods=['POST'])
+@login_required
+def process_async():
+    """Queue payroll processing as a background job and return its id"""
+    
+    selected_company_id = session.get('selected_company_id')
+    if not selected_company_id:
+        return jsonify({'success': False, 'message': 'No company selected'}), 400
+    
+    period_start_str = request.form.get('period_start')
+    period_end_str = request.form.get('period_end')
+    try:
+        datetime.strptime(period_start_str or '', '%Y-%m-%d')
+        datetime.strptime(period_end_str or '', '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Please provide both start and end dates.'}), 400
+    
+    job = JobService.enqueue('payroll.process', {
+        'company_id': selected_company_id,
+        'period_start': period_start_str,
+        'period_end': period_end_str,
+    }, company_id=selected_company_id, user_id=current_user.id)
+    return job_accepted(job)
+
 
 
 @payroll_bp.route('/payslips')
@@ -242,8 +215,7 @@ def payslips():
     
     # Get payroll entries for current period
     payroll_entries = db.session.query(PayrollEntry)\
-        .join(Employee)\
-        .filter(Employee.company_id == selected_company_id)\
+        .filter(PayrollEntry.company_id == selected_company_id)\
         .filter(PayrollEntry.pay_period_start >= period_start)\
         .all()
     
@@ -268,57 +240,14 @@ def reports_dashboard():
     last_day = calendar.monthrange(today.year, today.month)[1]
     month_end = today.replace(day=last_day)
     
-    # Get current month payroll entries
-    current_entries = db.session.query(PayrollEntry)\
-        .join(Employee)\
-        .filter(Employee.company_id == selected_company_id)\
-        .filter(PayrollEntry.pay_period_start >= month_start)\
-        .filter(PayrollEntry.pay_period_end <= month_end)\
-        .all()
-    
-    # Calculate current period totals
-    current_totals = {
-        'gross_pay': sum(entry.gross_pay for entry in current_entries),
-        'paye': sum(entry.paye for entry in current_entries),
-        'uif': sum(entry.uif for entry in current_entries),
-        'sdl': sum(entry.sdl for entry in current_entries),
-        'other_deductions': sum((entry.deductions_other + entry.union_fee) for entry in current_entries),
-        'net_pay': sum(entry.net_pay for entry in current_entries)
-    }
-    
-    # Get historical payroll data grouped by month (excluding current month)
-    historical_data = db.session.query(
-        func.date_trunc('month', PayrollEntry.pay_period_start).label('period'),
-        func.count(PayrollEntry.id).label('employee_count'),
-        func.sum((PayrollEntry.ordinary_hours * PayrollEntry.hourly_rate) + PayrollEntry.allowances).label('gross_pay'),
-        func.sum(PayrollEntry.paye).label('paye'),
-        func.sum(PayrollEntry.uif).label('uif'),
-        func.sum(PayrollEntry.sdl).label('sdl'),
-        func.sum(PayrollEntry.deductions_other + PayrollEntry.union_fee).label('other_deductions'),
-        func.sum(PayrollEntry.net_pay).label('net_pay')
-    )\
-    .join(Employee)\
-    .filter(Employee.company_id == selected_company_id)\
-    .filter(PayrollEntry.pay_period_start < month_start)\
-    .group_by(func.date_trunc('month', PayrollEntry.pay_period_start))\
-    .order_by(desc(func.date_trunc('month', PayrollEntry.pay_period_start)))\
-    .limit(12)\
-    .all()
-    
-    # Get detailed entries for historical periods (for expandable sections)
-    historical_entries = {}
-    for period_data in historical_data:
-        period_start = period_data.period.date()
-        period_end = (period_start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
-        
-        entries = db.session.query(PayrollEntry)\
-            .join(Employee)\
-            .filter(Employee.company_id == selected_company_id)\
-            .filter(PayrollEntry.pay_period_start >= period_start)\
-            .filter(PayrollEntry.pay_period_end <= period_end)\
-            .all()
-        
-        historical_entries[period_start.strftime('%Y-%m')] = entries
+    current_period = month_start.strftime('%Y-%m')
+
+    # Current month rows and totals, bucketed on month_year
+    current_entries = ReportQuery.payroll_rows(selected_company_id, period=current_period, verified_only=False)
+    current_totals = ReportQuery.period_totals(selected_company_id, current_period)
+
+    # Up to 12 earlier months: one grouped query plus one query for all detail rows
+    historical_data, historical_entries = ReportQuery.period_history(selected_company_id, current_period)
     
     report_data = {
         'current_period': {
@@ -364,22 +293,25 @@ def save_entry():
         period_start = datetime.strptime(period_start_str, '%Y-%m-%d').date()
         period_end = datetime.strptime(period_end_str, '%Y-%m-%d').date()
         
-        # Check if entry already exists
-        existing_entry = PayrollEntry.query.filter_by(
-            employee_id=employee_id,
+        # Claim the employee's entry for the period; ON CONFLICT DO NOTHING keeps
+        # concurrent saves from creating duplicates, and both then update one row
+        claim = {
+            'employee_id': employee.id,
+            'company_id': employee.company_id,
+            'pay_period_start': period_start,
+            'pay_period_end': period_end,
+            'month_year': datetime.now().strftime('%Y-%m'),
+            'hourly_rate': Decimal('0'),
+        }
+        if bulk_upsert(PayrollEntry, [claim], PayrollEntry.PERIOD_KEY, returning=(PayrollEntry.id,)):
+            # The insert bypassed the flush, so count the new entry in its month's summary
+            PayrollPeriodSummary.add_entries([claim])
+        payroll_entry = PayrollEntry.query.filter_by(
+            employee_id=employee.id,
             pay_period_start=period_start,
             pay_period_end=period_end
-        ).first()
-        
-        if existing_entry:
-            payroll_entry = existing_entry
-            if not payroll_entry.month_year:
-                payroll_entry.month_year = datetime.now().strftime('%Y-%m')
-        else:
-            payroll_entry = PayrollEntry()
-            payroll_entry.employee_id = employee_id
-            payroll_entry.pay_period_start = period_start
-            payroll_entry.pay_period_end = period_end
+        ).populate_existing().one()
+        if not payroll_entry.month_year:
             payroll_entry.month_year = datetime.now().strftime('%Y-%m')
         
         # Update payroll entry fields
@@ -416,24 +348,25 @@ def save_entry():
                 payroll_entry.hourly_rate = employee.salary / ((employee.ordinary_hours_per_day or 8) * (employee.work_days_per_month or 22))
         
         # Calculate gross pay for deduction calculations
-        gross_pay = payroll_entry.gross_pay
+        gross_pay = payroll_entry.calculate_gross_pay(employee)
         
         # Calculate recurring deductions from EmployeeRecurringDeduction system
         recurring_deductions = calculate_employee_recurring_deductions(employee_id, gross_pay)
         payroll_entry.union_fee = recurring_deductions['union']
         
-        # Calculate statutory deductions (UIF, SDL, PAYE)
+        # Calculate statutory deductions (UIF, SDL, PAYE) with dynamic SARS configuration
+        from app.services.sars_service import SARSService
+        from app.services.tax_table_service import TaxTableService
+        sars_config = SARSService.get_company_sars_config(selected_company_id)
+        
         if employee.paye_exempt:
             payroll_entry.paye = Decimal('0')
         else:
-            payroll_entry.paye = gross_pay * Decimal('0.18')
-        # UIF and SDL with dynamic SARS configuration
-        from app.services.sars_service import SARSService
-        sars_config = SARSService.get_company_sars_config(selected_company_id)
+            payroll_entry.paye = TaxTableService.calculate_paye(gross_pay, sars_config['tax_year_display'])
         
-        uif_amount = gross_pay * Decimal(str(sars_config['uif_percent']))
+        uif_amount = gross_pay * SARSService.as_rate(sars_config['uif_percent'])
         payroll_entry.uif = min(uif_amount, Decimal(str(sars_config['uif_monthly_cap'])))  # UIF with dynamic cap
-        payroll_entry.sdl = gross_pay * Decimal(str(sars_config['sdl_percent']))  # SDL
+        payroll_entry.sdl = gross_pay * SARSService.as_rate(sars_config['sdl_percent'])  # SDL
         
         # Calculate medical aid components if employee has medical aid
         if employee.medical_aid_member and employee.medical_aid_dependants is not None:
@@ -443,17 +376,14 @@ def save_entry():
             # Fringe benefit still comes from Employee model (employer contribution)
             payroll_entry.fringe_benefit_medical = employee.medical_aid_employer or Decimal('0')
         
-        # Calculate net pay
-        payroll_entry.net_pay = gross_pay - payroll_entry.total_deductions
+        # Store totals and calculate net pay
+        payroll_entry.net_pay = gross_pay - payroll_entry.refresh_totals(employee)
         
         # Mark as verified when saved
         payroll_entry.is_verified = True
         payroll_entry.verified_at = datetime.utcnow()
         payroll_entry.verified_by = current_user.id
         
-        if not existing_entry:
-            db.session.add(payroll_entry)
-        
         db.session.commit()
         
         return jsonify({'success': True, 'message': 'Payroll entry saved and verified successfully'})
@@ -498,26 +428,34 @@ def generate_payslip(employee_id):
     if not company:
         abort(404)
     
-    # Render the payslip template with actual payroll data
-    html = render_template("payslip.html", 
-                          employee=employee,
-                          entry=entry,
-                          company=company,
-                          current_date=datetime.now())
+    # Create filename with employee name and pay period
+    employee_name_clean = employee.full_name.replace(' ', '_').replace('.', '').replace(',', '')
+    pay_period_str = entry.pay_period_end.strftime("%B%Y")
+    filename = f'payslip_{employee_name_clean}_{pay_period_str}.pdf'
 
-    # Generate PDF
     try:
-        if not WEASYPRINT_AVAILABLE:
-            flash('PDF generation is not available. System dependencies are missing.', 'error')
-            return redirect(url_for('payroll.index'))
-        
+        # Finalized payslips are rendered once and served from the payslip store
+        if entry.is_finalized:
+            fingerprint = PayslipStore.fingerprint(entry)
+            path = PayslipStore.get(entry, fingerprint)
+            if path is None:
+                html = PayslipRenderService.render_html(entry)
+                path = PayslipStore.put(entry, HTML(string=html).write_pdf(), fingerprint)
+            return send_file(path,
+                             mimetype='application/pdf',
+                             download_name=filename,
+                             etag=fingerprint,
+                             conditional=True,
+                             max_age=0)
+
+        # Render the payslip template with actual payroll data
+        html = render_template("payslip.html", 
+                              employee=employee,
+                              entry=entry,
+                              company=company,
+                              current_date=datetime.now())
         pdf = HTML(string=html).write_pdf()
         
-        # Create filename with employee name and pay period
-        employee_name_clean = employee.full_name.replace(' ', '_').replace('.', '').replace(',', '')
-        pay_period_str = entry.pay_period_end.strftime("%B%Y")
-        filename = f'payslip_{employee_name_clean}_{pay_period_str}.pdf'
-        
         response = make_response(pdf)
         response.headers['Content-Type'] = 'application/pdf'
         response.headers['Content-Disposition'] = f'inline; filename={filename}'
@@ -526,6 +464,7 @@ def generate_payslip(employee_id):
     except Exception as e:
         flash(f'Error generating PDF: {str(e)}', 'error')
         return redirect(url_for('payroll.index'))
+
 @payroll_bp.route('/payslips/download')
 @login_required
 def download_payslips():
@@ -536,33 +475,78 @@ def download_payslips():
         flash('Please select a company.', 'warning')
         return redirect(url_for('payroll.index'))
 
-    entries = PayrollEntry.query.filter(
-        PayrollEntry.id.in_(ids),
-        PayrollEntry.employee.has(company_id=selected_company_id),
-        PayrollEntry.is_finalized == True
-    ).all()
+    if not WEASYPRINT_AVAILABLE:
+        flash('PDF generation is not available. WeasyPrint dependencies are missing.', 'error')
+        return redirect(url_for('payroll.reports'))
 
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
-        for entry in entries:
-            company = entry.employee.company
-            html = render_template('payslip.html',
-                                   employee=entry.employee,
-                                   entry=entry,
-                                   company=company,
-                                   current_date=datetime.now())
-            pdf = HTML(string=html).write_pdf()
-            filename = f"{entry.employee.full_name}_Payslip_{entry.month_year}.pdf".replace(" ", "_")
-            zip_file.writestr(filename, pdf)
-
-    zip_buffer.seek(0)
-    return send_file(
-        zip_buffer,
+    entries = PayslipRenderService.load_entries(ids, selected_company_id)
+    # Everything the template (and its SARS context) needs is loaded; release the connection before rendering
+    SARSService.get_company_sars_config(selected_company_id)
+    db.session.close()
+
+    body = PayslipRenderService.stream_zip(PayslipRenderService.iter_entry_pdfs(entries))
+    return Response(
+        stream_with_context(body),
         mimetype='application/zip',
-        as_attachment=True,
-        download_name='payslips.zip'
+        headers={'Content-Disposition': 'attachment; filename=payslips.zip'}
     )
 
+@payroll_bp.route('/payslips/download/async')
+@login_required
+def download_payslips_async():
+    """Queue a payslip ZIP as a background job and return its id"""
+    ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip().isdigit()]
+
+    selected_company_id = session.get('selected_company_id')
+    if not selected_company_id:
+        return jsonify({'success': False, 'message': 'No company selected'}), 400
+
+    if not WEASYPRINT_AVAILABLE:
+        return jsonify({'success': False, 'message': 'PDF generation is not available. WeasyPrint dependencies are missing.'}), 503
+
+    job = JobService.enqueue('payroll.payslips', {
+        'company_id': selected_company_id,
+        'entry_ids': ids,
+    }, company_id=selected_company_id, user_id=current_user.id)
+    return job_accepted(job)
+
+@payroll_bp.route('/payslips/print-run')
+@login_required
+def print_run():
+    """Render every finalized payslip of a period as one printable PDF
+
+    ``?format=index`` returns the page range of each payslip instead, so
+    individual payslips can be extracted from the combined document.
+    """
+    period = request.args.get('period')
+
+    selected_company_id = session.get('selected_company_id')
+    if not selected_company_id:
+        flash('Please select a company.', 'warning')
+        return redirect(url_for('payroll.index'))
+
+    if not period:
+        flash('Please select a period.', 'warning')
+        return redirect(url_for('payroll.reports'))
+
+    if not WEASYPRINT_AVAILABLE:
+        flash('PDF generation is not available. WeasyPrint dependencies are missing.', 'error')
+        return redirect(url_for('payroll.reports'))
+
+    entries = PayslipRenderService.load_period_entries(selected_company_id, period)
+    if not entries:
+        flash('No finalized payslips found for the selected period.', 'warning')
+        return redirect(url_for('payroll.reports', period=period))
+
+    run = PayslipPrintRun(entries)
+    if request.args.get('format') == 'index':
+        return jsonify({'period': period, 'payslips': run.layout()})
+
+    response = make_response(run.write_pdf())
+    response.headers['Content-Type'] = 'application/pdf'
+    response.headers['Content-Disposition'] = f'inline; filename=payslips_{period}.pdf'
+    return response
+
 @payroll_bp.route('/eft/download')
 @login_required
 def generate_eft_file():
@@ -579,18 +563,7 @@ def reports_and_exports():
         flash('Please select a company.', 'warning')
         return redirect(url_for('payroll.index'))
 
-    query = PayrollEntry.query.join(Employee).filter(
-        Employee.company_id == selected_company_id,
-        PayrollEntry.is_verified == True
-    )
-
-    if period:
-        query = query.filter(PayrollEntry.month_year == period)
-
-    payroll_entries = query.all()
-    print(
-        f"Loaded {len(payroll_entries)} entries for company {selected_company_id} and period {period}"
-    )
+    payroll_entries = ReportQuery.payroll_rows(selected_company_id, period=period, order_by_name=False)
 
     return render_template('payroll/reports.html', payroll_entries=payroll_entries)
 
@@ -607,7 +580,7 @@ def bulk_actions():
 
     entries = PayrollEntry.query.filter(
         PayrollEntry.id.in_(entry_ids),
-        PayrollEntry.employee.has(company_id=selected_company_id)
+        PayrollEntry.company_id == selected_company_id
     ).all()
 
     if action == 'finalize':
@@ -616,6 +589,13 @@ def bulk_actions():
         db.session.commit()
         flash(f'{len(entries)} entries finalized.', 'success')
 
+        # Render finalized payslips in the background so later downloads are served from the store
+        if WEASYPRINT_AVAILABLE and entries:
+            JobService.enqueue('payroll.store_payslips', {
+                'company_id': selected_company_id,
+                'entry_ids': [entry.id for entry in entries],
+            }, company_id=selected_company_id, user_id=current_user.id)
+
     elif action == 'payslips':
         return redirect(url_for('payroll.download_payslips', ids=",".join(entry_ids)))
     elif action == 'eft':
@@ -1,15 +1,19 @@
-from flask import Blueprint, render_template, session, redirect, url_for, flash, request, jsonify, make_response
+from flask import Blueprint, render_template, session, redirect, url_for, flash, request, jsonify, Response, stream_with_context
 from flask_login import login_required
-from app.models import Company, Employee, PayrollEntry, Beneficiary, EmployeeRecurringDeduction
+from app.models import Company, Employee, PayrollEntry, Beneficiary
+from app.services.report_export_service import ReportExportService, beneficiary_totals_for_period
+from app.services.report_query import ReportQuery
+from app.services.job_service import JobService
+from app.routes.jobs import job_accepted
+from flask_login import current_user
 from app import db
-from sqlalchemy import func, desc
+from sqlalchemy import desc
 from datetime import date, datetime, timedelta
 import calendar
-import csv
-import io
 
 reports_bp = Blueprint('reports', __name__, url_prefix='/reports')
 
+
 @reports_bp.route('/')
 @login_required
 def reports_dashboard():
@@ -27,16 +31,10 @@ def reports_dashboard():
     
     payroll_entries = []
     if period:
-        query = db.session.query(PayrollEntry)\
-            .join(Employee)\
-            .filter(Employee.company_id == selected_company_id)\
-            .filter(PayrollEntry.is_verified == True)
-
-        query = query.filter(PayrollEntry.month_year == period)
-        if selected_employee:
-            query = query.filter(PayrollEntry.employee_id == int(selected_employee))
-
-        payroll_entries = query.order_by(Employee.first_name, Employee.last_name).all()
+        payroll_entries = ReportQuery.payroll_rows(
+            selected_company_id, period=period,
+            employee_id=int(selected_employee) if selected_employee else None
+        )
     
     # Get all employees for the company
     employees = Employee.query.filter_by(company_id=selected_company_id).all()
@@ -46,31 +44,14 @@ def reports_dashboard():
     
     # Calculate beneficiary payment totals for current period
     beneficiary_totals = {}
-    for entry in payroll_entries:
-        deductions = EmployeeRecurringDeduction.query.filter_by(
-            employee_id=entry.employee_id,
-            is_active=True
-        ).all()
-        
-        for deduction in deductions:
-            if deduction.beneficiary_id:
-                beneficiary_name = deduction.beneficiary.name
-                if beneficiary_name not in beneficiary_totals:
-                    beneficiary_totals[beneficiary_name] = {
-                        'total': 0,
-                        'type': deduction.beneficiary.type,
-                        'beneficiary_id': deduction.beneficiary_id
-                    }
-                
-                if deduction.amount_type == 'fixed':
-                    beneficiary_totals[beneficiary_name]['total'] += deduction.value or 0
-                elif deduction.amount_type == 'percent':
-                    beneficiary_totals[beneficiary_name]['total'] += (entry.gross_pay * (deduction.value or 0) / 100)
+    if period:
+        beneficiary_totals = beneficiary_totals_for_period(
+            selected_company_id, period, int(selected_employee) if selected_employee else None
+        )
     
     # Get available periods (months with payroll data)
     available_periods = db.session.query(PayrollEntry.month_year)\
-        .join(Employee)\
-        .filter(Employee.company_id == selected_company_id)\
+        .filter(PayrollEntry.company_id == selected_company_id)\
         .filter(PayrollEntry.is_verified == True)\
         .distinct()\
         .order_by(desc(PayrollEntry.month_year))\
@@ -93,6 +74,14 @@ def reports_dashboard():
         date=date,
     )
 
+def csv_export_response(report, company_id, period=None):
+    """Stream a report as a CSV download while its rows are read"""
+    return Response(
+        stream_with_context(ReportExportService.iter_csv(report, company_id, period)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={ReportExportService.filename(report, period)}'}
+    )
+
 @reports_bp.route('/export/payroll.csv')
 @login_required
 def export_payroll_csv():
@@ -102,46 +91,7 @@ def export_payroll_csv():
         return redirect(url_for('reports.reports_dashboard'))
 
     period = request.args.get('period')
-    
-    query = db.session.query(PayrollEntry)\
-        .join(Employee)\
-        .filter(Employee.company_id == selected_company_id)\
-        .filter(PayrollEntry.is_verified == True)
-    
-    if period:
-        query = query.filter(PayrollEntry.month_year == period)
-    
-    entries = query.all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Employee ID', 'Employee Name', 'Gross Pay', 'PAYE', 'UIF', 'SDL', 
-                     'Other Deductions', 'Net Pay', 'Period', 'Status'])
-    
-    # Write data
-    for entry in entries:
-        writer.writerow([
-            entry.employee.employee_id,
-            f"{entry.employee.first_name} {entry.employee.last_name}",
-            entry.gross_pay,
-            entry.paye,
-            entry.uif,
-            entry.sdl,
-            (entry.deductions_other or 0) + (entry.union_fee or 0),
-            entry.net_pay,
-            entry.month_year or entry.pay_period_start.strftime('%Y-%m'),
-            'Finalized' if entry.is_finalized else 'Verified'
-        ])
-    
-    output.seek(0)
-    
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = f'attachment; filename=payroll_summary_{period or "all"}.csv'
-    
-    return response
+    return csv_export_response('payroll', selected_company_id, period)
 
 @reports_bp.route('/export/leave.csv')
 @login_required
@@ -151,39 +101,8 @@ def export_leave_csv():
         flash('Please select a company.', 'warning')
         return redirect(url_for('reports.reports_dashboard'))
 
-    company = Company.query.get_or_404(selected_company_id)
-    employees = Employee.query.filter_by(company_id=selected_company_id).all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Employee ID', 'Employee Name', 'Annual Leave Days', 'Sick Leave Days', 
-                     'Hire Date', 'Service Period (Years)'])
-    
-    # Write data
-    for employee in employees:
-        service_years = 0
-        if employee.start_date:
-            service_days = (date.today() - employee.start_date).days
-            service_years = round(service_days / 365, 1)
-        
-        writer.writerow([
-            employee.employee_id,
-            f"{employee.first_name} {employee.last_name}",
-            employee.annual_leave_days or company.default_annual_leave_days or 15,
-            employee.sick_leave_days or company.default_sick_leave_days or 10,
-            employee.start_date.strftime('%Y-%m-%d') if employee.start_date else 'N/A',
-            service_years
-        ])
-    
-    output.seek(0)
-    
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = 'attachment; filename=leave_summary.csv'
-    
-    return response
+    Company.query.get_or_404(selected_company_id)
+    return csv_export_response('leave', selected_company_id)
 
 @reports_bp.route('/export/deductions.csv')
 @login_required
@@ -193,44 +112,7 @@ def export_deductions_csv():
         flash('Please select a company.', 'warning')
         return redirect(url_for('reports.reports_dashboard'))
 
-    employees = Employee.query.filter_by(company_id=selected_company_id).all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Employee ID', 'Employee Name', 'Beneficiary', 'Deduction Type', 
-                     'Amount Type', 'Amount', 'Status'])
-    
-    # Write data
-    for employee in employees:
-        for deduction in employee.recurring_deductions:
-            if deduction.is_active:
-                amount_display = ''
-                if deduction.amount_type == 'fixed':
-                    amount_display = f"R{deduction.value or 0:.2f}"
-                elif deduction.amount_type == 'percent':
-                    amount_display = f"{deduction.value or 0}%"
-                else:
-                    amount_display = 'Calculated'
-                
-                writer.writerow([
-                    employee.employee_id,
-                    f"{employee.first_name} {employee.last_name}",
-                    deduction.beneficiary.name if deduction.beneficiary else 'N/A',
-                    deduction.beneficiary.type if deduction.beneficiary else 'Other',
-                    deduction.amount_type.title(),
-                    amount_display,
-                    'Active'
-                ])
-    
-    output.seek(0)
-    
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = 'attachment; filename=recurring_deductions.csv'
-    
-    return response
+    return csv_export_response('deductions', selected_company_id)
 
 @reports_bp.route('/export/employee_status.csv')
 @login_required
@@ -240,33 +122,7 @@ def export_employee_status_csv():
         flash('Please select a company.', 'warning')
         return redirect(url_for('reports.reports_dashboard'))
 
-    employees = Employee.query.filter_by(company_id=selected_company_id).all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Employee ID', 'Employee Name', 'Status', 'UIF Contribution', 
-                     'Hire Date', 'Employment Type'])
-    
-    # Write data
-    for employee in employees:
-        writer.writerow([
-            employee.employee_id,
-            f"{employee.first_name} {employee.last_name}",
-            'Active' if not employee.end_date else 'Inactive',
-            'Contributing' if employee.uif_contributing else 'Exempt',
-            employee.start_date.strftime('%Y-%m-%d') if employee.start_date else 'N/A',
-            employee.employment_type or 'Full-time'
-        ])
-    
-    output.seek(0)
-    
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = 'attachment; filename=employee_status.csv'
-    
-    return response
+    return csv_export_response('employee_status', selected_company_id)
 
 @reports_bp.route('/export/beneficiary.csv')
 @login_required
@@ -277,67 +133,7 @@ def export_beneficiary_csv():
         return redirect(url_for('reports.reports_dashboard'))
 
     period = request.args.get('period')
-    
-    # Get payroll entries for the period
-    query = db.session.query(PayrollEntry)\
-        .join(Employee)\
-        .filter(Employee.company_id == selected_company_id)\
-        .filter(PayrollEntry.is_verified == True)
-    
-    if period:
-        query = query.filter(PayrollEntry.month_year == period)
-    
-    payroll_entries = query.all()
-    
-    # Calculate beneficiary totals
-    beneficiary_totals = {}
-    for entry in payroll_entries:
-        deductions = EmployeeRecurringDeduction.query.filter_by(
-            employee_id=entry.employee_id,
-            is_active=True
-        ).all()
-        
-        for deduction in deductions:
-            if deduction.beneficiary_id:
-                beneficiary_name = deduction.beneficiary.name
-                if beneficiary_name not in beneficiary_totals:
-                    beneficiary_totals[beneficiary_name] = {
-                        'total': 0,
-                        'type': deduction.beneficiary.type,
-                        'beneficiary': deduction.beneficiary
-                    }
-                
-                if deduction.amount_type == 'fixed':
-                    beneficiary_totals[beneficiary_name]['total'] += deduction.value or 0
-                elif deduction.amount_type == 'percent':
-                    beneficiary_totals[beneficiary_name]['total'] += (entry.gross_pay * (deduction.value or 0) / 100)
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Beneficiary Name', 'Type', 'Total Amount', 'Bank Name', 
-                     'Account Number', 'EFT Export Enabled'])
-    
-    # Write data
-    for name, data in beneficiary_totals.items():
-        beneficiary = data['beneficiary']
-        writer.writerow([
-            name,
-            data['type'],
-            f"R{data['total']:.2f}",
-            beneficiary.bank_name or 'N/A',
-            beneficiary.account_number or 'N/A',
-            'Yes' if beneficiary.include_in_eft_export else 'No'
-        ])
-    
-    output.seek(0)
-    
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = f'attachment; filename=beneficiary_payments_{period or "all"}.csv'
-    
-    return response
+    return csv_export_response('beneficiary', selected_company_id, period)
 
 @reports_bp.route('/export/eft_file')
 @login_required
@@ -349,49 +145,26 @@ def generate_eft_file():
 
     period = request.args.get('period')
     
-    query = db.session.query(PayrollEntry)\
-        .join(Employee)\
-        .filter(Employee.company_id == selected_company_id)\
-        .filter(PayrollEntry.is_verified == True)\
-        .filter(Employee.bank_name.isnot(None))\
-        .filter(Employee.account_number.isnot(None))
-    
-    if period:
-        query = query.filter(PayrollEntry.month_year == period)
-    
-    entries = query.all()
-    
-    if not entries:
+    if not ReportExportService.has_eft_entries(selected_company_id, period):
         flash('No EFT-eligible employees found for the selected period.', 'warning')
         return redirect(url_for('reports.reports_dashboard'))
     
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header for EFT file
-    writer.writerow(['Employee Name', 'Bank Name', 'Account Number', 'Branch Code', 
-                     'Account Type', 'Amount', 'Reference', 'Email'])
-    
-    # Write employee payment data
-    for entry in entries:
-        employee = entry.employee
-        reference = f"SAL-{employee.employee_id}-{entry.month_year or entry.pay_period_start.strftime('%Y%m')}"
-        
-        writer.writerow([
-            f"{employee.first_name} {employee.last_name}",
-            employee.bank_name,
-            employee.account_number,
-            employee.branch_code or '',
-            employee.account_type or 'Savings',
-            entry.net_pay,
-            reference,
-            employee.email or ''
-        ])
-    
-    output.seek(0)
-    
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = f'attachment; filename=eft_file_{period or "all"}_{date.today().strftime("%Y%m%d")}.csv'
-    
-    return response
\ No newline at end of file
+    return csv_export_response('eft', selected_company_id, period)
+
+@reports_bp.route('/export/<report>/async')
+@login_required
+def export_async(report):
+    """Queue a CSV export as a background job and return its id"""
+    selected_company_id = session.get('selected_company_id')
+    if not selected_company_id:
+        return jsonify({'success': False, 'message': 'No company selected'}), 400
+
+    if report not in ReportExportService.EXPORTS:
+        return jsonify({'success': False, 'message': f'Unknown report: {report}'}), 404
+
+    job = JobService.enqueue('reports.export', {
+        'company_id': selected_company_id,
+        'report': report,
+        'period': request.args.get('period'),
+    }, company_id=selected_company_id, user_id=current_user.id)
+    return job_accepted(job)
@@ -0,0 +1,48 @@
+"""
+Bulk Upsert - Dialect-aware INSERT ... ON CONFLICT for ORM models
+"""
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+
+_INSERT_CONSTRUCTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def upsert_statement(model, conflict_columns, update_columns=None, combine=None):
+    """INSERT ... ON CONFLICT statement for ``model`` on the session's database
+
+    Rows conflicting on ``conflict_columns`` (which must be covered by a
+    unique index) are skipped, or have ``update_columns`` overwritten with
+    the incoming values when given. ``combine`` maps further columns to a
+    function of the stored and incoming column that gives the new value,
+    such as ``operator.add`` to apply deltas atomically.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in _INSERT_CONSTRUCTS:
+        raise NotImplementedError(f'Upsert is not supported on {dialect}')
+
+    stmt = _INSERT_CONSTRUCTS[dialect](model)
+    set_ = {column: stmt.excluded[column] for column in update_columns or ()}
+    for column, merge in (combine or {}).items():
+        set_[column] = merge(stmt.table.c[column], stmt.excluded[column])
+    if set_:
+        return stmt.on_conflict_do_update(index_elements=list(conflict_columns), set_=set_)
+    return stmt.on_conflict_do_nothing(index_elements=list(conflict_columns))
+
+
+def bulk_upsert(model, rows, conflict_columns, update_columns=None, returning=None, combine=None):
+    """Upsert a list of row dictionaries in one statement
+
+    With ``returning`` columns, the rows actually inserted or updated are
+    returned; rows skipped on conflict are not.
+    """
+    if not rows:
+        return []
+    stmt = upsert_statement(model, conflict_columns, update_columns, combine)
+    if returning:
+        return db.session.execute(stmt.returning(*returning), rows).all()
+    db.session.execute(stmt, rows)
+    return []
@@ -99,9 +99,7 @@ class CompanyService:
                 company_id=company_id, 
                 employment_status='Active'
             ).count(),
-            'total_payroll_entries': PayrollEntry.query.join(Employee).filter(
-                Employee.company_id == company_id
-            ).count()
+            'total_payroll_entries': PayrollEntry.query.filter_by(company_id=company_id).count()
         }
         
         return stats
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""Commit-time notice of the companies whose employees changed.
+
+Session flushes record the company of every employee added, modified or
+deleted. When the outermost transaction commits, each registered callback
+receives the set of company ids; a rollback discards them. Writes that bypass
+the unit of work, such as bulk inserts, report their companies through
+:func:`employees_changed`.
+"""
+
+from flask import has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.employee import Employee
+
+SESSION_KEY = 'changed_employee_companies'
+
+_callbacks = []
+
+
+def on_employees_committed(callback):
+    """Register ``callback(company_ids)`` to run after employee changes commit"""
+    _callbacks.append(callback)
+    return callback
+
+
+def employees_changed(session, company_ids):
+    """Report changes to the companies' employees made outside the ORM unit of work"""
+    session.info.setdefault(SESSION_KEY, set()).update(company_ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_companies(session, flush_context):
+    company_ids = set()
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Employee):
+            company_ids.add(obj.company_id)
+    for obj in session.dirty:
+        if isinstance(obj, Employee) and session.is_modified(obj):
+            # An employee moved between companies changes both
+            company_ids.update(inspect(obj).attrs['company_id'].history.deleted or ())
+            company_ids.add(obj.company_id)
+    if company_ids:
+        employees_changed(session, company_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_changed_companies(session):
+    company_ids = session.info.pop(SESSION_KEY, None)
+    if company_ids and has_app_context():
+        for callback in _callbacks:
+            callback(company_ids)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_changed_companies(session, previous_transaction):
+    # Savepoint rollbacks keep the outer transaction's changes pending
+    if previous_transaction.parent is None:
+        session.info.pop(SESSION_KEY, None)
@@ -0,0 +1,171 @@
+"""Company-prefixed employee ID generation
+
+IDs are numbered from a per-company :class:`EmployeeIdSequence` row that is
+seeded from the company's existing employees the first time it is needed.
+"""
+import hashlib
+import re
+
+from app import db
+from app.models.company import Company
+from app.models.employee import Employee
+from app.models.employee_id_sequence import EmployeeIdSequence
+from app.services.bulk_upsert import bulk_upsert
+
+
+def slugify_company_name(company_name):
+    """Convert company name to a slug format"""
+    # Remove special characters and convert to lowercase
+    slug = re.sub(r'[^a-zA-Z0-9\s]', '', company_name.lower())
+    # Replace spaces with hyphens
+    slug = re.sub(r'\s+', '-', slug.strip())
+    return slug
+
+
+def generate_unique_company_prefix(company_id, company_name):
+    """Generate a unique 5-character prefix for the company"""
+    # First try to generate from company name
+    slug = slugify_company_name(company_name)
+    
+    # Extract characters for prefix (skip hyphens, take consonants first, then vowels)
+    chars = []
+    consonants = []
+    vowels = []
+    
+    for char in slug:
+        if char.isalpha():
+            if char in 'aeiou':
+                vowels.append(char.upper())
+            else:
+                consonants.append(char.upper())
+    
+    # Prefer consonants first, then vowels
+    chars = consonants + vowels
+    
+    # Try different combinations to get 5 unique characters
+    if len(chars) >= 5:
+        prefix = ''.join(chars[:5])
+    elif len(chars) >= 3:
+        # Pad with first letters repeated or use company ID hash
+        prefix = ''.join(chars[:3])
+        # Add digits from company ID
+        prefix += str(company_id).zfill(2)[:2]
+    else:
+        # Fallback: use hash of company name + ID
+        hash_input = f"{company_name}_{company_id}".encode()
+        hash_hex = hashlib.md5(hash_input).hexdigest()
+        prefix = ''.join(c.upper() for c in hash_hex if c.isalpha())[:5]
+        if len(prefix) < 5:
+            prefix = prefix + hash_hex[:5-len(prefix)].upper()
+    
+    # Ensure exactly 5 characters
+    prefix = prefix[:5].ljust(5, 'X')
+    
+    return prefix
+
+
+def check_prefix_uniqueness(prefix, company_id):
+    """Check if prefix is unique across all companies except current one"""
+    # Check if any other company is already using this prefix
+    existing = db.session.query(Employee.employee_id).filter(
+        Employee.employee_id.like(f"{prefix}-EMP%"),
+        Employee.company_id != company_id
+    ).first()
+    if existing is not None:
+        return False
+
+    # Or has already claimed it for its ID sequence
+    claimed = db.session.query(EmployeeIdSequence.company_id).filter(
+        EmployeeIdSequence.prefix == prefix,
+        EmployeeIdSequence.company_id != company_id
+    ).first()
+    return claimed is None
+
+
+def employee_id_prefix(company):
+    """Return the company's employee ID prefix, unique across companies"""
+    company_id = company.id
+
+    # Generate base prefix
+    base_prefix = generate_unique_company_prefix(company_id, company.name)
+    
+    # Ensure prefix uniqueness across companies
+    prefix = base_prefix
+    counter = 1
+    while not check_prefix_uniqueness(prefix, company_id):
+        # If not unique, modify slightly
+        if counter == 1:
+            prefix = base_prefix[:-1] + str(company_id % 10)
+        else:
+            # Use hash fallback
+            hash_input = f"{company.name}_{company_id}_{counter}".encode()
+            hash_hex = hashlib.md5(hash_input).hexdigest()
+            prefix = ''.join(c.upper() for c in hash_hex if c.isalpha())[:5]
+            if len(prefix) < 5:
+                prefix = prefix + hash_hex[:5-len(prefix)].upper()
+        counter += 1
+        if counter > 10:  # Safety break
+            break
+
+    return prefix
+
+def _sequence_start(company):
+    """Prefix and first free sequence number for a company without a sequence row
+
+    The sequence starts after both the company's head count and the highest
+    number already issued under its prefix, so it continues existing IDs.
+    """
+    prefix = employee_id_prefix(company)
+    marker = f"{prefix}-EMP"
+
+    employee_count = Employee.query.filter_by(company_id=company.id).count()
+    issued = db.session.query(Employee.employee_id)\
+        .filter(Employee.employee_id.like(f"{marker}%"))\
+        .all()
+    highest = max((int(value[len(marker):]) for (value,) in issued
+                   if value[len(marker):].isdigit()), default=0)
+
+    return prefix, max(employee_count, highest) + 1
+
+
+def format_employee_id(prefix, seq):
+    """Employee ID for a company prefix and sequence number"""
+    return f"{prefix}-EMP{seq:03d}"
+
+
+def allocate_employee_ids(company, count):
+    """Reserve ``count`` consecutive employee IDs for the company
+
+    One atomic UPDATE claims the whole block, so concurrent requests never
+    receive the same ID and the cost does not grow with the company's size.
+    The reservation is part of the caller's transaction and is released if
+    it rolls back.
+    """
+    if count <= 0:
+        return []
+    reserved = EmployeeIdSequence.reserve(company.id, count)
+    if reserved is None:
+        prefix, start = _sequence_start(company)
+        # A concurrent request may seed the row first; its values win
+        bulk_upsert(EmployeeIdSequence, [{'company_id': company.id, 'prefix': prefix, 'next_value': start}],
+                    ['company_id'])
+        reserved = EmployeeIdSequence.reserve(company.id, count)
+    prefix, first = reserved
+    return [format_employee_id(prefix, seq) for seq in range(first, first + count)]
+
+
+def generate_employee_id(company_id):
+    """Reserve the next employee ID for the given company"""
+    company = db.session.get(Company, company_id)
+    if not company:
+        raise ValueError("Company not found")
+    return allocate_employee_ids(company, 1)[0]
+
+
+def preview_employee_id(company_id):
+    """The ID the company's next employee will most likely get, without reserving it"""
+    company = db.session.get(Company, company_id)
+    if not company:
+        raise ValueError("Company not found")
+    sequence = EmployeeIdSequence.peek(company_id)
+    return format_employee_id(*(sequence or _sequence_start(company)))
@@ -0,0 +1,685 @@
+"""Employee spreadsheet import: field mappings, scalar validators and the
+column-wise validation pipeline used by the import preview.
+
+:func:`validate_import_frame` checks a whole uploaded sheet with pandas
+column operations instead of walking it row by row. It produces exactly the
+rows and per-row error lists of :func:`validate_import_rows`, the row-wise
+reference kept for comparison by tests and `flask benchmark-import`.
+
+:func:`commit_import_batch` writes a reviewed batch's confirmed rows in
+chunked bulk inserts, checking duplicates against values preloaded up front.
+"""
+
+import json
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, update
+from sqlalchemy.exc import DBAPIError
+
+from app import db
+from app.models.company import Company
+from app.models.employee import Employee
+from app.models.import_batch import ImportBatch, ImportRow
+from app.services.employee_id_service import allocate_employee_ids
+from app.services.employee_search import reindex_employees
+from app.services.employee_changes import employees_changed
+
+# Mapping between spreadsheet headers and model fields
+IMPORT_HEADER_MAP = {
+    'First Name': 'first_name',
+    'Last Name': 'last_name',
+    'South African ID Number': 'id_number',
+    'Tax Number': 'tax_number',
+    'Cell Number': 'cell_number',
+    'Email Address': 'email',
+    'Date of Birth': 'date_of_birth',
+    'Gender': 'gender',
+    'Marital Status': 'marital_status',
+    'Department': 'department',
+    'Job Title': 'job_title',
+    'Start Date': 'start_date',
+    'Employment Type': 'employment_type',
+    'Salary Type': 'salary_type',
+    'Hourly Rate': 'hourly_rate',
+    'Monthly Salary': 'monthly_salary',
+    'Bank Name': 'bank_name',
+    'Account Number': 'account_number',
+    'Account Type': 'account_type',
+    'Annual Leave Days': 'annual_leave_days',
+}
+
+# Normalization lookup tables
+GENDER_MAP = {
+    'm': 'Male',
+    'male': 'Male',
+    'f': 'Female',
+    'female': 'Female'
+}
+
+STATUS_MAP = {
+    'single': 'Single',
+    'married': 'Married',
+    'divorced': 'Divorced',
+    'widowed': 'Widowed',
+}
+
+BANK_MAP = {
+    'absa': 'ABSA',
+    'fnb': 'FNB',
+    'standard bank': 'Standard Bank',
+    'capitec': 'Capitec Bank',
+    'nedbank': 'Nedbank',
+}
+
+
+def validate_sa_cell_number(cell_number: str) -> tuple[bool, str]:
+    """Validate South African cell number format and return validity and error message"""
+    if not cell_number:
+        return False, "Cell number is required"
+    
+    # Check if matches the full regex pattern for both formats
+    pattern = r'^(\+27|0)[6-8][0-9]{8}$'
+    if re.match(pattern, cell_number.strip()):
+        return True, ""
+    
+    return False, "Please enter a valid South African mobile number (0791234567 or +27791234567)."
+
+def normalize_phone(val: str) -> str:
+    """Normalize a South African phone number to +27 format"""
+    if not val:
+        return ''
+    
+    # Remove all non-digit characters
+    digits = re.sub(r'\D', '', str(val))
+    
+    # Handle different input formats
+    if digits.startswith('27') and len(digits) == 11:
+        # Already in 27xxxxxxxxx format
+        pass
+    elif digits.startswith('0') and len(digits) == 10:
+        # SA format 0xxxxxxxxx -> convert to 27xxxxxxxxx
+        digits = '27' + digits[1:]
+    elif len(digits) == 9:
+        # Missing leading 0, assume SA format -> add 27
+        digits = '27' + digits
+    else:
+        # Invalid format, return as-is
+        return val
+    
+    return '+' + digits if digits else ''
+
+
+def parse_date(val):
+    """Parse a date from various common formats"""
+    if pd.isna(val) or val == '':
+        return None
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d'):
+        try:
+            return datetime.strptime(str(val), fmt).date()
+        except Exception:
+            continue
+    try:
+        return pd.to_datetime(val, dayfirst=True).date()
+    except Exception:
+        return None
+
+
+def clean_import_value(val):
+    """Clean up raw values imported from Excel."""
+    if pd.isna(val) or val is None:
+        return ''
+    val = str(val).strip()
+    if val.startswith("'"):
+        val = val.lstrip("'")
+    return val
+
+def validate_south_african_id(id_number):
+    """Validate South African ID number format and basic structure"""
+    # Check if ID is exactly 13 digits
+    if not id_number or len(id_number) != 13 or not id_number.isdigit():
+        return False, "ID number must be exactly 13 digits"
+    
+    # Extract date components (YYMMDD)
+    try:
+        year = int(id_number[:2])
+        month = int(id_number[2:4])
+        day = int(id_number[4:6])
+        
+        # Determine century (if year > 21, assume 19xx, else 20xx)
+        full_year = 1900 + year if year > 21 else 2000 + year
+        
+        # Validate date components - basic range checks
+        if month < 1 or month > 12:
+            return False, "Invalid month in ID number"
+        
+        if day < 1 or day > 31:
+            return False, "Invalid day in ID number"
+        
+        # Check if date is not in the future (with some flexibility)
+        try:
+            test_date = date(full_year, month, day)
+            if test_date > date.today():
+                return False, "Date of birth cannot be in the future"
+        except ValueError:
+            # Allow some flexibility for dates that might be edge cases
+            pass
+            
+    except ValueError:
+        return False, "Invalid date format in ID number"
+    
+    # Extract gender sequence (digits 7-10) - basic range check
+    try:
+        gender_sequence = int(id_number[6:10])
+        if gender_sequence < 0 or gender_sequence > 9999:
+            return False, "Invalid gender sequence in ID number"
+    except ValueError:
+        return False, "Invalid gender sequence in ID number"
+    
+    # Skip checksum validation as it's often problematic with real IDs
+    # Focus on format and basic structure validation instead
+    
+    return True, "Valid South African ID number"
+
+def extract_info_from_id(id_number):
+    """Extract date of birth and gender from valid South African ID number"""
+    if len(id_number) != 13 or not id_number.isdigit():
+        return None, None
+    
+    # Extract date components
+    year = int(id_number[:2])
+    month = int(id_number[2:4])
+    day = int(id_number[4:6])
+    
+    # Determine century
+    full_year = 1900 + year if year > 21 else 2000 + year
+    
+    try:
+        birth_date = date(full_year, month, day)
+    except ValueError:
+        return None, None
+    
+    # Extract gender (digits 7-10: >= 5000 = Male, < 5000 = Female)
+    gender_sequence = int(id_number[6:10])
+    gender = "Male" if gender_sequence >= 5000 else "Female"
+    
+    return birth_date, gender
+
+
+CELL_NUMBER_PATTERN = r'^(\+27|0)[6-8][0-9]{8}$'
+CELL_NUMBER_ERROR = "Please enter a valid South African mobile number (0791234567 or +27791234567)."
+
+# Strict spellings of the parse_date formats, tried in the same order
+DATE_PATTERNS = (
+    r'^(?P<year>[0-9]{4})-(?P<month>[0-9]{1,2})-(?P<day>[0-9]{1,2})$',
+    r'^(?P<day>[0-9]{1,2})/(?P<month>[0-9]{1,2})/(?P<year>[0-9]{4})$',
+    r'^(?P<day>[0-9]{1,2})-(?P<month>[0-9]{1,2})-(?P<year>[0-9]{4})$',
+    r'^(?P<year>[0-9]{4})/(?P<month>[0-9]{1,2})/(?P<day>[0-9]{1,2})$',
+)
+
+
+def validate_import_rows(df):
+    """Row-wise reference validation of an import sheet (the original pipeline)"""
+    rows = []
+    for index, raw_row in df.iterrows():
+        data = {}
+        errors = []
+        for hdr, field in IMPORT_HEADER_MAP.items():
+            raw_val = raw_row.get(hdr, '')
+            data[field] = clean_import_value(raw_val)
+
+        # Validate and normalize cell number
+        cell_number = data.get('cell_number', '').strip()
+        if cell_number:
+            cell_valid, cell_error = validate_sa_cell_number(cell_number)
+            if not cell_valid:
+                errors.append(f"Cell number: {cell_error}")
+            else:
+                data['cell_number'] = normalize_phone(cell_number)
+        else:
+            errors.append("Cell number is required")
+        if data.get('gender'):
+            g = data['gender'].strip().lower()
+            data['gender'] = GENDER_MAP.get(g, g.title())
+        if data.get('marital_status'):
+            m = data['marital_status'].strip().lower()
+            data['marital_status'] = STATUS_MAP.get(m, m.title())
+        if data.get('bank_name'):
+            b = data['bank_name'].strip().lower()
+            for k, v in BANK_MAP.items():
+                if k in b:
+                    data['bank_name'] = v
+                    break
+        id_number = data.get('id_number')
+        if id_number:
+            valid, msg = validate_south_african_id(str(id_number))
+            if not valid:
+                errors.append(msg)
+            else:
+                birth, gen = extract_info_from_id(str(id_number))
+                if birth and not data.get('date_of_birth'):
+                    data['date_of_birth'] = birth
+                if gen and not data.get('gender'):
+                    data['gender'] = gen
+        if data.get('date_of_birth'):
+            dob = parse_date(data['date_of_birth'])
+            if dob:
+                data['date_of_birth'] = dob
+            else:
+                errors.append('Invalid date of birth')
+                data['date_of_birth'] = None
+        if data.get('start_date'):
+            sd = parse_date(data['start_date'])
+            if sd:
+                data['start_date'] = sd
+            else:
+                errors.append('Invalid start date')
+                data['start_date'] = None
+        rows.append({'data': data, 'errors': errors, 'status': 'pending'})
+    return rows
+
+
+def clean_import_column(column):
+    """:func:`clean_import_value` over a whole column"""
+    missing = column.isna()
+    if missing.any():
+        column = column.where(~missing, '')
+    # Stripping quotes from a value without a leading quote is a no-op
+    return column.astype(str).str.strip().str.lstrip("'")
+
+
+def _build_dates(years, months, days):
+    """Dates from integer parts as an object array; invalid dates become None"""
+    stamps = pd.to_datetime(pd.DataFrame({'year': years, 'month': months, 'day': days}), errors='coerce')
+    dates = np.asarray(stamps.dt.date, dtype=object)
+    dates[stamps.isna().values] = None
+    return dates
+
+
+def parse_date_column(column):
+    """:func:`parse_date` over a column of non-empty strings
+
+    Values in one of the strict formats are converted in bulk; anything else
+    (loose spellings, out-of-range parts) goes through :func:`parse_date`
+    once per distinct value, so results match it exactly.
+    """
+    parsed = pd.Series(None, index=column.index, dtype=object)
+    remaining = pd.Series(True, index=column.index)
+    for pattern in DATE_PATTERNS:
+        parts = column[remaining].str.extract(pattern).dropna()
+        if parts.empty:
+            continue
+        dates = _build_dates(parts['year'].astype(int).values, parts['month'].astype(int).values,
+                             parts['day'].astype(int).values)
+        converted = pd.Series(dates, index=parts.index, dtype=object).dropna()
+        parsed[converted.index] = converted
+        remaining[converted.index] = False
+
+    leftovers = column[remaining]
+    if not leftovers.empty:
+        lookup = {value: parse_date(value) for value in leftovers.unique()}
+        parsed[leftovers.index] = leftovers.map(lookup)
+    return parsed
+
+
+def _validate_id_numbers(ids, today):
+    """Vectorized :func:`validate_south_african_id` and :func:`extract_info_from_id`
+
+    Returns ``(errors, birth, gender)`` Series: the error message (or None)
+    per ID, and the date of birth and gender extracted from valid IDs.
+    """
+    errors = pd.Series(None, index=ids.index, dtype=object)
+    birth = pd.Series(None, index=ids.index, dtype=object)
+    gender = pd.Series(None, index=ids.index, dtype=object)
+    if ids.empty:
+        return errors, birth, gender
+
+    well_formed = (ids.str.len() == 13) & ids.str.isdigit()
+    errors[~well_formed] = "ID number must be exactly 13 digits"
+    ascii_digits = ids.str.fullmatch(r'[0-9]{13}').astype(bool)
+
+    # Non-ASCII digit strings are rare; leave them to the scalar validators
+    unusual = ids[well_formed & ~ascii_digits]
+    for index, id_number in unusual.items():
+        valid, msg = validate_south_african_id(id_number)
+        if not valid:
+            errors[index] = msg
+        else:
+            birth[index], gender[index] = extract_info_from_id(id_number)
+
+    ids = ids[ascii_digits]
+    if ids.empty:
+        return errors, birth, gender
+    year = ids.str.slice(0, 2).astype(int).values
+    month = ids.str.slice(2, 4).astype(int).values
+    day = ids.str.slice(4, 6).astype(int).values
+    sequence = ids.str.slice(6, 10).astype(int).values
+    full_year = np.where(year > 21, 1900 + year, 2000 + year)
+
+    bad_month = (month < 1) | (month > 12)
+    bad_day = ~bad_month & ((day < 1) | (day > 31))
+    dates = _build_dates(full_year, np.where(bad_month, 1, month), np.where(bad_day, 1, day))
+    dates[bad_month | bad_day] = None
+    future = np.array([d is not None and d > today for d in dates], dtype=bool)
+
+    message = np.full(len(ids), None, dtype=object)
+    message[future] = "Date of birth cannot be in the future"
+    message[bad_day] = "Invalid day in ID number"
+    message[bad_month] = "Invalid month in ID number"
+    errors[ids.index] = message
+    # A valid ID with an impossible date (e.g. 30 February) yields neither birth date nor gender
+    extracted = (message == None) & (dates != None)  # noqa: E711
+    birth[ids.index[extracted]] = dates[extracted]
+    gender[ids.index[extracted]] = np.where(sequence[extracted] >= 5000, 'Male', 'Female')
+    return errors, birth, gender
+
+
+def validate_import_frame(df, today=None):
+    """Validate and normalize an import sheet column by column
+
+    Returns one ``{'data', 'errors', 'status'}`` dict per row, identical to
+    :func:`validate_import_rows`.
+    """
+    today = today or date.today()
+    n = len(df)
+    data = pd.DataFrame(index=df.index)
+    for hdr, field in IMPORT_HEADER_MAP.items():
+        if hdr in df.columns:
+            data[field] = clean_import_column(df[hdr])
+        else:
+            data[field] = pd.Series('', index=df.index, dtype=object)
+    data = data.astype(object)
+    errors = [[] for _ in range(n)]
+    positions = pd.Series(np.arange(n), index=df.index)
+
+    def add_errors(messages):
+        for position, message in zip(positions[messages.index], messages):
+            errors[position].append(message)
+
+    # Cell number
+    cell = data['cell_number'].str.strip()
+    present = cell != ''
+    valid_cell = present & cell.str.match(CELL_NUMBER_PATTERN)
+    data.loc[valid_cell, 'cell_number'] = '+27' + cell[valid_cell].str[-9:]
+    add_errors(pd.Series(np.where(present[~valid_cell], f"Cell number: {CELL_NUMBER_ERROR}",
+                                  "Cell number is required"), index=cell.index[~valid_cell]))
+
+    # Lookup-table normalization
+    for field, lookup in (('gender', GENDER_MAP), ('marital_status', STATUS_MAP)):
+        column = data[field]
+        given = column != ''
+        key = column[given].str.strip().str.lower()
+        data.loc[given, field] = key.map(lookup).fillna(key.str.title())
+    bank = data['bank_name']
+    key = bank[bank != ''].str.strip().str.lower()
+    matched = pd.Series(False, index=key.index)
+    for name, canonical in BANK_MAP.items():
+        hit = ~matched & key.str.contains(name, regex=False)
+        data.loc[hit[hit].index, 'bank_name'] = canonical
+        matched |= hit
+
+    # ID numbers: validation, then fill date of birth and gender when blank
+    ids = data['id_number'][data['id_number'] != '']
+    id_errors, birth, gender = _validate_id_numbers(ids, today)
+    id_errors_by_row = pd.Series(None, index=df.index, dtype=object)
+    id_errors_by_row[id_errors.index] = id_errors
+    birth = birth.dropna()
+    fill_birth = birth[data.loc[birth.index, 'date_of_birth'] == '']
+    fill_gender = gender.dropna()
+    fill_gender = fill_gender[data.loc[fill_gender.index, 'gender'] == '']
+    data.loc[fill_birth.index, 'date_of_birth'] = fill_birth
+    data.loc[fill_gender.index, 'gender'] = fill_gender
+
+    # Dates; ID-derived birth dates are already parsed
+    date_errors = {}
+    for field, message in (('date_of_birth', 'Invalid date of birth'), ('start_date', 'Invalid start date')):
+        column = data[field]
+        text = column[column.map(lambda value: isinstance(value, str) and value != '')]
+        parsed = parse_date_column(text)
+        data.loc[parsed.index, field] = parsed
+        failed = parsed.index[parsed.isna()]
+        data.loc[failed, field] = None
+        date_errors[field] = pd.Series(message, index=failed, dtype=object)
+
+    # Errors in the order the row-wise pipeline reports them
+    add_errors(id_errors_by_row.dropna())
+    add_errors(date_errors['date_of_birth'])
+    add_errors(date_errors['start_date'])
+
+    fields = list(data.columns)
+    values = zip(*(data[field].tolist() for field in fields))
+    return [
+        {'data': dict(zip(fields, record)), 'errors': row_errors, 'status': 'pending'}
+        for record, row_errors in zip(values, errors)
+    ]
+
+
+def revalidate_import_data(data):
+    """Re-run the import validation for one row of (possibly edited) field values
+
+    Values already normalized by a previous pass validate to themselves, so
+    a reviewed row can be checked again after edits. Returns ``(data, errors)``.
+    """
+    values = {header: data.get(field) for header, field in IMPORT_HEADER_MAP.items()}
+    row = validate_import_frame(pd.DataFrame([values], dtype=object))[0]
+    return row['data'], row['errors']
+
+# Company defaults filled into blank fields when a batch applies defaults
+COMPANY_DEFAULT_MAP = {
+    'salary_type': 'default_salary_type',
+    'monthly_salary': 'default_salary',
+    'annual_leave_days': 'default_annual_leave_days',
+    'overtime_multiplier': 'overtime_multiplier',
+    'sunday_multiplier': 'sunday_multiplier',
+    'holiday_multiplier': 'public_holiday_multiplier',
+}
+
+# Employee columns that may not be blank on import
+REQUIRED_IMPORT_FIELDS = ('first_name', 'last_name', 'cell_number', 'start_date')
+
+
+def build_employee_values(data, company=None, apply_defaults=False):
+    """Map one staged row's data onto Employee column values
+
+    Raises ``ValueError`` for values that cannot be converted or stored.
+    """
+    data = {field: clean_import_value(data.get(field)) for field in IMPORT_HEADER_MAP.values()}
+    data['cell_number'] = normalize_phone(data.get('cell_number'))
+    if apply_defaults and company:
+        for field, attr in COMPANY_DEFAULT_MAP.items():
+            if not data.get(field) and getattr(company, attr, None) is not None:
+                data[field] = getattr(company, attr)
+
+    salary_type = str(data.get('salary_type') or 'monthly').lower()
+    salary = data.get('monthly_salary') if salary_type == 'monthly' else data.get('hourly_rate')
+    try:
+        salary = Decimal(str(salary)) if salary else Decimal('0')
+        annual_leave_days = int(data.get('annual_leave_days') or 15)
+    except (InvalidOperation, ValueError):
+        raise ValueError('Salary and annual leave days must be numbers')
+
+    values = {
+        'first_name': data.get('first_name'),
+        'last_name': data.get('last_name'),
+        'id_number': str(data.get('id_number') or ''),
+        'tax_number': str(data.get('tax_number')) if data.get('tax_number') else None,
+        'cell_number': data.get('cell_number'),
+        'email': data.get('email') or None,
+        'date_of_birth': parse_date(data.get('date_of_birth')) if data.get('date_of_birth') else None,
+        'gender': data.get('gender') or None,
+        'marital_status': data.get('marital_status') or None,
+        'department': data.get('department') or '',
+        'job_title': data.get('job_title') or '',
+        'start_date': parse_date(data.get('start_date')) if data.get('start_date') else None,
+        'employment_type': data.get('employment_type') or 'Full-Time',
+        'salary_type': salary_type,
+        'salary': salary,
+        'bank_name': data.get('bank_name') or '',
+        'account_number': str(data.get('account_number') or ''),
+        'account_type': data.get('account_type') or 'Savings',
+        'annual_leave_days': annual_leave_days,
+    }
+
+    for field in REQUIRED_IMPORT_FIELDS:
+        if not values[field]:
+            raise ValueError(f'{field.replace("_", " ").capitalize()} is required')
+    for field, value in values.items():
+        length = getattr(Employee.__table__.c[field].type, 'length', None)
+        if length and isinstance(value, str) and len(value) > length:
+            raise ValueError(f'{field.replace("_", " ").capitalize()} is longer than {length} characters')
+    return values
+
+
+def _existing_values(column, company_id=None, candidates=None, chunk_size=1000):
+    """Set of ``column`` values already stored, for a company or among candidates"""
+    if company_id is not None:
+        query = db.session.query(column).filter(Employee.company_id == company_id, column.isnot(None))
+        return {value for (value,) in query}
+    candidates = list(candidates or ())
+    found = set()
+    for start in range(0, len(candidates), chunk_size):
+        chunk = candidates[start:start + chunk_size]
+        found.update(value for (value,) in db.session.query(column).filter(column.in_(chunk)))
+    return found
+
+
+def _insert_employees(rows):
+    """Insert employee value dicts in one statement, returning ``{employee_id: id}``"""
+    stmt = insert(Employee).returning(Employee.employee_id, Employee.id)
+    return dict(db.session.execute(stmt, rows).all())
+
+
+def commit_import_batch(batch, chunk_size=1000):
+    """Create employees for a staged batch's confirmed rows; the caller commits
+
+    Duplicate ID and tax numbers are detected against values loaded once for
+    the whole batch, employee IDs are allocated as one contiguous block, and
+    rows are inserted ``chunk_size`` at a time inside a savepoint. A chunk the
+    database still rejects is retried row by row, so only the offending rows
+    are marked failed. Returns a summary of the counts and per-row failures.
+    """
+    company = db.session.get(Company, batch.company_id)
+    staged = db.session.query(ImportRow.id, ImportRow.row_number, ImportRow.data_json)\
+        .filter(ImportRow.batch_id == batch.id, ImportRow.status == ImportRow.STATUS_CONFIRMED)\
+        .order_by(ImportRow.row_number)\
+        .all()
+
+    outcomes = {}
+    candidates = []
+    for row_id, row_number, data_json in staged:
+        try:
+            values = build_employee_values(json.loads(data_json), company, batch.apply_defaults)
+        except ValueError as e:
+            outcomes[row_id] = (ImportRow.STATUS_FAILED, str(e), None)
+            continue
+        candidates.append((row_id, row_number, values))
+
+    # Duplicates: ID numbers within the company, tax numbers system-wide
+    seen_ids = _existing_values(Employee.id_number, company_id=batch.company_id)
+    seen_taxes = _existing_values(Employee.tax_number, candidates=sorted(
+        {values['tax_number'] for _, _, values in candidates if values['tax_number']}), chunk_size=chunk_size)
+    first_row = {}
+    accepted = []
+    for row_id, row_number, values in candidates:
+        message = None
+        id_number, tax_number = values['id_number'], values['tax_number']
+        if id_number and ('id', id_number) in first_row:
+            message = f'Duplicate ID number {id_number} (row {first_row[("id", id_number)]})'
+        elif id_number and id_number in seen_ids:
+            message = f'An employee with ID number {id_number} already exists'
+        elif tax_number and ('tax', tax_number) in first_row:
+            message = f'Duplicate tax number {tax_number} (row {first_row[("tax", tax_number)]})'
+        elif tax_number and tax_number in seen_taxes:
+            message = f'An employee with tax number {tax_number} already exists'
+        if message:
+            outcomes[row_id] = (ImportRow.STATUS_FAILED, message, None)
+            continue
+        if id_number:
+            first_row[('id', id_number)] = row_number
+        if tax_number:
+            first_row[('tax', tax_number)] = row_number
+        accepted.append((row_id, values))
+
+    employee_ids = allocate_employee_ids(company, len(accepted))
+    for (row_id, values), employee_id in zip(accepted, employee_ids):
+        values.update(company_id=batch.company_id, employee_id=employee_id)
+
+    for start in range(0, len(accepted), chunk_size):
+        chunk = accepted[start:start + chunk_size]
+        try:
+            with db.session.begin_nested():
+                ids = _insert_employees([values for _, values in chunk])
+            for row_id, values in chunk:
+                outcomes[row_id] = (ImportRow.STATUS_IMPORTED, None, ids[values['employee_id']])
+        except DBAPIError:
+            for row_id, values in chunk:
+                try:
+                    with db.session.begin_nested():
+                        ids = _insert_employees([values])
+                    outcomes[row_id] = (ImportRow.STATUS_IMPORTED, None, ids[values['employee_id']])
+                except DBAPIError as e:
+                    outcomes[row_id] = (ImportRow.STATUS_FAILED, str(e.orig)[:500], None)
+
+    # Bulk inserts bypass the unit of work, so update the search indexes and caches here
+    reindex_employees(db.session, [pk for status, _, pk in outcomes.values() if status == ImportRow.STATUS_IMPORTED])
+    employees_changed(db.session, {batch.company_id})
+
+    if outcomes:
+        db.session.execute(update(ImportRow), [
+            {'id': row_id, 'status': status, 'message': message, 'employee_id': pk}
+            for row_id, (status, message, pk) in outcomes.items()
+        ])
+    batch.status = ImportBatch.STATUS_IMPORTED
+    batch.imported_at = datetime.utcnow()
+
+    numbers = {row_id: row_number for row_id, row_number, _ in staged}
+    failures = sorted((numbers[row_id], message) for row_id, (status, message, _) in outcomes.items()
+                      if status == ImportRow.STATUS_FAILED)
+    return {
+        'imported': len(outcomes) - len(failures),
+        'failed': len(failures),
+        'skipped': batch.row_count - len(staged),
+        'failures': failures,
+    }
+
+
+def generate_import_sheet(rows, seed=0):
+    """Synthetic import sheet with a mix of valid and invalid values, for benchmarks"""
+    rng = np.random.default_rng(seed)
+
+    def pick(*choices):
+        return rng.choice(np.array(choices, dtype=object), rows)
+
+    births = pd.to_datetime('1960-01-01') + pd.to_timedelta(rng.integers(0, 16000, rows), unit='D')
+    id_numbers = (births.strftime('%y%m%d') + pd.Series(rng.integers(0, 10000, rows)).map('{:04d}'.format).values
+                  + pd.Series(rng.integers(0, 1000, rows)).map('{:03d}'.format).values)
+    id_numbers = np.where(rng.random(rows) < 0.05, id_numbers.str.slice(0, 12), id_numbers)
+    cells = pd.Series(rng.integers(600000000, 899999999, rows)).astype(str).values
+    start_dates = pd.to_datetime('2015-01-01') + pd.to_timedelta(rng.integers(0, 3650, rows), unit='D')
+
+    return pd.DataFrame({
+        'First Name': pick('Thabo', 'Ayanda', 'Pieter', 'Lerato', 'Johan'),
+        'Last Name': pick('Nkosi', 'van der Merwe', 'Dlamini', 'Botha', 'Naidoo'),
+        'South African ID Number': id_numbers,
+        'Tax Number': pd.Series(rng.integers(1000000000, 9999999999, rows)).astype(str).values,
+        'Cell Number': np.where(rng.random(rows) < 0.9, '0' + cells, pick('12345', '', '+2771234567')),
+        'Email Address': pick('a@example.com', '', 'b@example.com'),
+        'Date of Birth': np.where(rng.random(rows) < 0.5, '', births.strftime('%d/%m/%Y')),
+        'Gender': pick('M', 'female', '', 'Other'),
+        'Marital Status': pick('single', 'MARRIED', '', 'partnered'),
+        'Department': pick('IT', 'Finance', 'Operations'),
+        'Job Title': pick('Clerk', 'Manager', 'Developer'),
+        'Start Date': np.where(rng.random(rows) < 0.97, start_dates.strftime('%Y-%m-%d'),
+                               pick('31/02/2020', 'next week', '2020/13/01')),
+        'Employment Type': pick('Full-Time', 'Part-Time'),
+        'Salary Type': pick('monthly', 'hourly'),
+        'Hourly Rate': pick('', '55.50'),
+        'Monthly Salary': pick('18500', '', '32000'),
+        'Bank Name': pick('ABSA Bank', 'fnb', 'Capitec', 'Investec', ''),
+        'Account Number': pd.Series(rng.integers(10000000, 99999999, rows)).astype(str).values,
+        'Account Type': pick('Savings', 'Cheque'),
+        'Annual Leave Days': pick('15', '21', ''),
+    })
@@ -0,0 +1,219 @@
+"""
+Employee Search - Indexed name/ID search with pluggable database backends
+
+Searching employees with ``ilike('%q%')`` cannot use an index, so every
+keystroke scans the employees table. A backend chosen per application at
+start-up serves the search from an index instead:
+
+* ``fts5`` - an SQLite FTS5 table keyed by employee id, kept in sync by a
+  session ``after_flush`` listener. Each search word matches as a prefix and
+  hits are ranked with bm25, weighting names above ID numbers.
+* ``trigram`` - a PostgreSQL ``pg_trgm`` GIN index over the search columns,
+  maintained by the database. It serves substring matches and fuzzy
+  (word-similarity) matches ranked by similarity.
+* ``ilike`` - the original substring scan, used when neither is available.
+
+Set ``EMPLOYEE_SEARCH_BACKEND`` to force a backend; the default ``auto``
+picks the best one the database supports.
+"""
+import logging
+import re
+
+from flask import current_app
+from sqlalchemy import (
+    Column, Integer, MetaData, Table, Text, case, event, func, inspect, literal, literal_column, or_, select, text,
+)
+from sqlalchemy.orm import Session
+
+from app.models.employee import Employee
+
+logger = logging.getLogger(__name__)
+
+# Columns a search term is matched against, most significant first
+SEARCH_COLUMNS = ('first_name', 'last_name', 'employee_id', 'id_number', 'tax_number')
+
+# Rows reindexed per statement
+SYNC_CHUNK_SIZE = 500
+
+
+def _search_words(term):
+    """Words of a search term, split the way the FTS5 tokenizer splits text"""
+    return re.findall(r'\w+', term or '')
+
+
+class IlikeSearch:
+    """Substring match on every search column; no index, prefix matches ranked first"""
+    name = 'ilike'
+
+    def available(self, connection):
+        return True
+
+    def install(self, connection):
+        pass
+
+    def rebuild(self, connection):
+        return 0
+
+    def sync(self, connection, employee_ids):
+        pass
+
+    def remove(self, connection, employee_ids):
+        pass
+
+    def apply(self, query, term):
+        """Filter ``query`` to employees matching ``term``; returns ``(query, rank_order)``"""
+        columns = [getattr(Employee, name) for name in SEARCH_COLUMNS]
+        query = query.filter(or_(*(column.ilike(f'%{term}%') for column in columns)))
+        rank = case((or_(*(column.ilike(f'{term}%') for column in columns)), 0), else_=1)
+        return query, [rank]
+
+
+class Fts5Search(IlikeSearch):
+    """SQLite FTS5 index of the search columns with bm25-ranked prefix matching"""
+    name = 'fts5'
+
+    table = Table(
+        'employee_search', MetaData(),
+        Column('rowid', Integer, primary_key=True),
+        *(Column(name, Text) for name in SEARCH_COLUMNS),
+    )
+    # bm25 weights in SEARCH_COLUMNS order: names outrank ID and tax numbers
+    WEIGHTS = (10.0, 10.0, 5.0, 2.0, 2.0)
+
+    def available(self, connection):
+        if connection.dialect.name != 'sqlite':
+            return False
+        options = connection.exec_driver_sql('PRAGMA compile_options').scalars().all()
+        return 'ENABLE_FTS5' in options
+
+    def install(self, connection):
+        """Create the FTS table, filling it from employees when it is new"""
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'employee_search'"
+        ).first()
+        if exists:
+            return
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE employee_search USING fts5({', '.join(SEARCH_COLUMNS)}, prefix = '2 3')"
+        )
+        self.rebuild(connection)
+
+    def rebuild(self, connection):
+        """Re-fill the FTS table from the employees table; returns the rows indexed"""
+        connection.execute(self.table.delete())
+        return connection.execute(self.table.insert().from_select(
+            ['rowid', *SEARCH_COLUMNS], select(Employee.id, *(getattr(Employee, name) for name in SEARCH_COLUMNS))
+        )).rowcount
+
+    def sync(self, connection, employee_ids):
+        employee_ids = sorted(employee_ids)
+        for start in range(0, len(employee_ids), SYNC_CHUNK_SIZE):
+            chunk = employee_ids[start:start + SYNC_CHUNK_SIZE]
+            connection.execute(self.table.delete().where(self.table.c.rowid.in_(chunk)))
+            connection.execute(self.table.insert().from_select(
+                ['rowid', *SEARCH_COLUMNS],
+                select(Employee.id, *(getattr(Employee, name) for name in SEARCH_COLUMNS))
+                .where(Employee.id.in_(chunk))
+            ))
+
+    def remove(self, connection, employee_ids):
+        employee_ids = sorted(employee_ids)
+        for start in range(0, len(employee_ids), SYNC_CHUNK_SIZE):
+            chunk = employee_ids[start:start + SYNC_CHUNK_SIZE]
+            connection.execute(self.table.delete().where(self.table.c.rowid.in_(chunk)))
+
+    def apply(self, query, term):
+        words = _search_words(term)
+        if not words:
+            return super().apply(query, term)
+        # Every word must match the start of a token in some column
+        match = ' '.join(f'"{word}"*' for word in words)
+        fts = literal_column('employee_search')
+        hits = select(
+            self.table.c.rowid.label('employee_id'),
+            func.bm25(fts, *self.WEIGHTS).label('rank'),
+        ).where(fts.op('MATCH')(match)).subquery()
+        return query.join(hits, hits.c.employee_id == Employee.id), [hits.c.rank]
+
+
+class TrigramSearch(IlikeSearch):
+    """PostgreSQL pg_trgm index for substring and fuzzy matching, ranked by similarity"""
+    name = 'trigram'
+
+    INDEX_NAME = 'ix_employees_search_trgm'
+
+    @staticmethod
+    def expression(table=None):
+        """Lower-cased search columns as one string; queries must repeat the index expression"""
+        prefix = f'{table}.' if table else ''
+        columns = " || ' ' || ".join(f"coalesce({prefix}{name}, '')" for name in SEARCH_COLUMNS)
+        return f'lower({columns})'
+
+    def available(self, connection):
+        if connection.dialect.name != 'postgresql':
+            return False
+        return connection.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+
+    def install(self, connection):
+        connection.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS {self.INDEX_NAME} ON employees USING gin (({self.expression()}) gin_trgm_ops)"
+        )
+
+    def apply(self, query, term):
+        document = literal_column(self.expression(Employee.__tablename__))
+        needle = (term or '').lower()
+        # Substring matches, plus words within pg_trgm.word_similarity_threshold of the term
+        query = query.filter(or_(document.like(f'%{needle}%'), literal(needle).op('<%')(document)))
+        return query, [func.word_similarity(needle, document).desc()]
+
+
+BACKENDS = {backend.name: backend for backend in (Fts5Search(), TrigramSearch(), IlikeSearch())}
+
+
+def init_employee_search(app, db):
+    """Pick the app's search backend and create its index if needed"""
+    choice = app.config.get('EMPLOYEE_SEARCH_BACKEND', 'auto')
+    candidates = list(BACKENDS.values()) if choice == 'auto' else [BACKENDS[choice], BACKENDS['ilike']]
+    with db.engine.begin() as connection:
+        for backend in candidates:
+            if not backend.available(connection):
+                continue
+            try:
+                with connection.begin_nested():
+                    backend.install(connection)
+            except Exception as e:
+                logger.warning('Employee search backend %s unavailable: %s', backend.name, e)
+                continue
+            app.extensions['employee_search'] = backend
+            return backend
+
+
+def search_backend():
+    """The current application's employee search backend"""
+    return current_app.extensions.get('employee_search', BACKENDS['ilike'])
+
+
+def reindex_employees(session, employee_ids):
+    """Refresh the index rows of employees written without the ORM unit of work"""
+    if employee_ids:
+        search_backend().sync(session.connection(), employee_ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_employee_search(session, flush_context):
+    """Mirror added, renamed and deleted employees into the search index"""
+    changed = {obj.id for obj in session.new if isinstance(obj, Employee)}
+    changed |= {
+        obj.id for obj in session.dirty
+        if isinstance(obj, Employee) and any(inspect(obj).attrs[name].history.has_changes() for name in SEARCH_COLUMNS)
+    }
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, Employee)}
+    if not (changed or deleted):
+        return
+
+    backend = search_backend()
+    connection = session.connection()
+    if deleted:
+        backend.remove(connection, deleted)
+    if changed - deleted:
+        backend.sync(connection, changed - deleted)
@@ -1,12 +1,54 @@
-from app import db
-from app.models import Employee, PayrollEntry
+from app import db, cache
+from app.models import CacheVersion, Employee, PayrollEntry
+from app.services.employee_changes import on_employees_committed
+from app.services.employee_search import search_backend
 from datetime import date
-from sqlalchemy import func, desc, or_
+from sqlalchemy import func, desc, tuple_
 from decimal import Decimal
+import base64
+import hashlib
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Employee list order; keyset cursors hold these values of a page's edge row
+LIST_ORDER = (Employee.last_name, Employee.first_name, Employee.id)
+
+# Cached employee list totals, stamped with a per-company version in cache_versions
+COUNT_CACHE_TIMEOUT = 600
+
+
+def encode_cursor(direction, employee):
+    """Opaque token for the list position just past ``employee`` in ``direction``"""
+    key = [direction, employee.last_name, employee.first_name, employee.id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """``(direction, key)`` from a cursor token; a missing or invalid token starts at the first page"""
+    if cursor:
+        try:
+            direction, *key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            if direction in ('next', 'prev') and len(key) == len(LIST_ORDER):
+                return direction, key
+        except (ValueError, TypeError):
+            pass
+    return 'next', None
+
+
+def _count_version(company_id):
+    """Current count version of a company, shared by all processes through the database"""
+    name = f'employee_count:{company_id}'
+    return CacheVersion.current([name])[name]
+
+
+@on_employees_committed
+def _bump_count_versions(company_ids):
+    """Invalidate every cached total of the companies in all processes"""
+    CacheVersion.bump(f'employee_count:{company_id}' for company_id in company_ids)
+
+
 class EmployeeService:
     """Service class for employee-related business logic"""
     
@@ -112,7 +154,7 @@ class EmployeeService:
     @staticmethod
     def get_dashboard_stats(company_id=None):
         """Get dashboard statistics scoped to company"""
-        from app.models import PayrollEntry, Company, Employee
+        from app.models import PayrollPeriodSummary, Company, Employee
         from datetime import datetime, date
         
         query = Employee.query
@@ -121,41 +163,18 @@ class EmployeeService:
 
         total_employees = query.count()
 
-        # Retrieve payroll entries scoped to the company
-        if company_id:
-            payroll_query = db.session.query(PayrollEntry)\
-                .join(Employee)\
-                .filter(Employee.company_id == company_id)
-        else:
-            payroll_query = db.session.query(PayrollEntry).join(Employee)
-        payroll_entry_count = payroll_query.count()
-        logger.debug("Payroll entries returned: %s", payroll_entry_count)
-        print(f"[DEBUG] Payroll entries for company {company_id}: {payroll_entry_count}")
-        
-        # Calculate total monthly payroll from verified PayrollEntry records
+        # Verified payroll total and unverified count for the current month from the period summaries
         current_month = datetime.now().month
         current_year = datetime.now().year
-        
-        payroll_query = PayrollEntry.query.filter(
-            func.extract('month', PayrollEntry.created_at) == current_month,
-            func.extract('year', PayrollEntry.created_at) == current_year,
-            PayrollEntry.is_verified == True
-        )
-        if company_id:
-            payroll_query = payroll_query.join(Employee).filter(Employee.company_id == company_id)
-        
-        verified_entries = payroll_query.all()
-        total_monthly_payroll = sum(entry.net_pay for entry in verified_entries if entry.net_pay)
-        
-        # Count unverified payroll entries for current period
-        unverified_query = PayrollEntry.query.filter(
-            func.extract('month', PayrollEntry.created_at) == current_month,
-            func.extract('year', PayrollEntry.created_at) == current_year,
-            PayrollEntry.is_verified == False
-        )
+
+        payroll_totals = db.session.query(
+            func.coalesce(func.sum(PayrollPeriodSummary.verified_net_pay), 0),
+            func.coalesce(func.sum(PayrollPeriodSummary.headcount - PayrollPeriodSummary.verified_count), 0),
+        ).filter(PayrollPeriodSummary.month_year == datetime.now().strftime('%Y-%m'))
         if company_id:
-            unverified_query = unverified_query.join(Employee).filter(Employee.company_id == company_id)
-        unverified_entries = unverified_query.count()
+            payroll_totals = payroll_totals.filter(PayrollPeriodSummary.company_id == company_id)
+
+        total_monthly_payroll, unverified_entries = payroll_totals.one()
         
         # Get next payroll date from company settings
         next_payroll_date = "N/A"
@@ -200,8 +219,8 @@ class EmployeeService:
         return query.order_by(desc(Employee.start_date)).limit(limit).all()
     
     @staticmethod
-    def get_employees_paginated(search='', department='', status='', page=1, per_page=10, company_id=None):
-        """Get paginated employee list with search and filters"""
+    def filter_employees(search='', department='', company_id=None):
+        """Employee query with the list page's company, search and department filters"""
         
         query = Employee.query
         
@@ -211,29 +230,44 @@ class EmployeeService:
         
         # Apply search filter
         if search:
-            search_filter = or_(
-                Employee.first_name.ilike(f'%{search}%'),
-                Employee.last_name.ilike(f'%{search}%'),
-                Employee.employee_id.ilike(f'%{search}%'),
-                Employee.id_number.ilike(f'%{search}%'),
-                Employee.tax_number.ilike(f'%{search}%')
-            )
-            query = query.filter(search_filter)
+            query, _ = search_backend().apply(query, search)
         
         # Apply department filter
         if department:
             query = query.filter(Employee.department == department)
         
+        return query
+    
+    @staticmethod
+    def count_employees(search='', department='', company_id=None):
+        """Number of employees matching the list filters, cached until the company's employees change"""
+        
+        filters = hashlib.sha1(json.dumps([search, department]).encode()).hexdigest()
+        key = f'employee_count:{company_id}:{_count_version(company_id)}:{filters}'
+        total = cache.get(key)
+        if total is None:
+            query = EmployeeService.filter_employees(search, department, company_id)
+            total = query.order_by(None).count()
+            cache.set(key, total, timeout=COUNT_CACHE_TIMEOUT)
+        return total
+    
+    @staticmethod
+    def get_employees_paginated(search='', department='', status='', page=1, per_page=10, company_id=None):
+        """Get paginated employee list with search and filters"""
+        
+        query = EmployeeService.filter_employees(search, department, company_id)
+        
         # Order by last name, then first name
-        query = query.order_by(Employee.last_name, Employee.first_name)
+        query = query.order_by(*LIST_ORDER)
         
-        # Paginate results using Flask-SQLAlchemy helper
-        pagination = db.paginate(
-            query,
+        # Paginate results using Flask-SQLAlchemy helper, with the cached total
+        pagination = query.paginate(
             page=page,
             per_page=per_page,
-            error_out=False
+            error_out=False,
+            count=False
         )
+        pagination.total = EmployeeService.count_employees(search, department, company_id)
         
         return {
             'employees': pagination.items,
@@ -249,6 +283,43 @@ class EmployeeService:
             }
         }
     
+    @staticmethod
+    def get_employees_keyset(search='', department='', status='', cursor=None, per_page=10, company_id=None):
+        """Get one page of the employee list by keyset pagination
+        
+        Pages are ordered on (last_name, first_name, id) and located by a
+        cursor from a previous page's ``next_cursor`` or ``prev_cursor``, so
+        deep pages cost the same as the first one instead of an OFFSET scan.
+        """
+        
+        query = EmployeeService.filter_employees(search, department, company_id)
+        direction, key = decode_cursor(cursor)
+        
+        if direction == 'prev':
+            if key:
+                query = query.filter(tuple_(*LIST_ORDER) < tuple_(*key))
+            employees = query.order_by(*(column.desc() for column in LIST_ORDER)).limit(per_page + 1).all()
+            has_prev, has_next = len(employees) > per_page, key is not None
+            employees = employees[:per_page][::-1]
+        else:
+            if key:
+                query = query.filter(tuple_(*LIST_ORDER) > tuple_(*key))
+            employees = query.order_by(*LIST_ORDER).limit(per_page + 1).all()
+            has_prev, has_next = key is not None, len(employees) > per_page
+            employees = employees[:per_page]
+        
+        return {
+            'employees': employees,
+            'pagination': {
+                'per_page': per_page,
+                'total': EmployeeService.count_employees(search, department, company_id),
+                'has_prev': has_prev and bool(employees),
+                'has_next': has_next and bool(employees),
+                'prev_cursor': encode_cursor('prev', employees[0]) if employees else None,
+                'next_cursor': encode_cursor('next', employees[-1]) if employees else None,
+            }
+        }
+    
     @staticmethod
     def get_employee_by_id(employee_id):
         """Get employee by ID"""
@@ -256,21 +327,14 @@ class EmployeeService:
     
     @staticmethod
     def search_employees(query, limit=10, company_id=None):
-        """Search employees by name, ID, or tax number"""
-        
-        search_filter = or_(
-            Employee.first_name.ilike(f'%{query}%'),
-            Employee.last_name.ilike(f'%{query}%'),
-            Employee.employee_id.ilike(f'%{query}%'),
-            Employee.id_number.ilike(f'%{query}%'),
-            Employee.tax_number.ilike(f'%{query}%')
-        )
+        """Search employees by name, ID, or tax number, best matches first"""
         
-        query_obj = Employee.query.filter(search_filter)
+        query_obj = Employee.query
         if company_id:
             query_obj = query_obj.filter_by(company_id=company_id)
+        query_obj, rank_order = search_backend().apply(query_obj, query)
         
-        return query_obj.limit(limit).all()
+        return query_obj.order_by(*rank_order, Employee.last_name, Employee.first_name).limit(limit).all()
     
     @staticmethod
     def get_departments(company_id=None):
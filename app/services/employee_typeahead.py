@@ -0,0 +1,153 @@
+"""
+Employee Typeahead - In-process prefix index for the employee search box
+
+``/employees/search`` runs on every keystroke. Each company's employees are
+loaded once into a sorted array of normalized keys (first name, last name,
+full name, employee ID and ID number), so a lookup is a binary search in
+memory with no database round trip.
+
+Indexes are built lazily and kept for the most recently searched companies.
+Each index is stamped with the company's ``employee_typeahead:{company_id}``
+:class:`CacheVersion`, which is bumped when a transaction that added, changed
+or deleted one of the company's employees commits, so every worker process
+rebuilds after ``CACHE_VERSION_TTL`` seconds at most. Indexes also expire
+after ``EMPLOYEE_TYPEAHEAD_TTL`` seconds.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+
+from flask import current_app
+
+from app import db
+from app.models.cache_version import CacheVersion
+from app.models.employee import Employee
+from app.services.employee_changes import on_employees_committed
+
+# Fields returned for each match
+RESULT_FIELDS = ('id', 'employee_id', 'first_name', 'last_name', 'id_number', 'department', 'job_title',
+                 'employment_status')
+
+
+def normalize(value):
+    """Lower-cased text with runs of whitespace collapsed"""
+    return ' '.join(str(value).casefold().split()) if value else ''
+
+
+class CompanyTypeahead:
+    """Sorted prefix keys over one company's employees"""
+
+    def __init__(self, rows, version=0):
+        self.version = version
+        self.results = {}
+        entries = []
+        for row in rows:
+            result = dict(zip(RESULT_FIELDS, row))
+            result['full_name'] = f"{result['first_name']} {result['last_name']}"
+            self.results[result['id']] = result
+            for key in (result['first_name'], result['last_name'], result['full_name'],
+                        result['employee_id'], result['id_number']):
+                key = normalize(key)
+                if key:
+                    entries.append((key, result['id']))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.ids = [employee_id for _, employee_id in entries]
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def load(cls, company_id, version=0):
+        """Build the index for a company in one query"""
+        rows = db.session.query(*(getattr(Employee, field) for field in RESULT_FIELDS))\
+            .filter(Employee.company_id == company_id)\
+            .all()
+        return cls(rows, version)
+
+    def search(self, query, limit=10):
+        """Employees with a key starting with ``query``, in key order"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        matches = []
+        seen = set()
+        for position in range(bisect_left(self.keys, prefix), len(self.keys)):
+            if not self.keys[position].startswith(prefix):
+                break
+            employee_id = self.ids[position]
+            if employee_id not in seen:
+                seen.add(employee_id)
+                matches.append(self.results[employee_id])
+                if len(matches) == limit:
+                    break
+        return matches
+
+
+class TypeaheadCache:
+    """LRU of company typeahead indexes, shared by the threads of one process"""
+
+    def __init__(self, max_companies=64, ttl=300):
+        self.max_companies = max_companies
+        self.ttl = ttl
+        self._indexes = OrderedDict()
+        # Bumped by every invalidation so builds that raced one are not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, company_id):
+        """The company's index, building it on first use, after it expires or when its version moves"""
+        version = _index_version(company_id)
+        with self._lock:
+            index = self._indexes.get(company_id)
+            if (index is not None and index.version == version
+                    and time.monotonic() - index.built_at < self.ttl):
+                self._indexes.move_to_end(company_id)
+                return index
+            generation = self._generation
+
+        index = CompanyTypeahead.load(company_id, version)
+        with self._lock:
+            if self._generation == generation:
+                self._indexes[company_id] = index
+                self._indexes.move_to_end(company_id)
+                while len(self._indexes) > self.max_companies:
+                    self._indexes.popitem(last=False)
+        return index
+
+    def search(self, company_id, query, limit=10):
+        """Typeahead matches for ``query`` among the company's employees"""
+        return self.get(company_id).search(query, limit)
+
+    def invalidate(self, company_ids):
+        """Drop the companies' indexes so the next search rebuilds them"""
+        with self._lock:
+            self._generation += 1
+            for company_id in company_ids:
+                self._indexes.pop(company_id, None)
+
+
+def init_employee_typeahead(app):
+    """Create the app's typeahead cache from its configuration"""
+    app.extensions['employee_typeahead'] = TypeaheadCache(
+        max_companies=app.config.get('EMPLOYEE_TYPEAHEAD_COMPANIES', 64),
+        ttl=app.config.get('EMPLOYEE_TYPEAHEAD_TTL', 300),
+    )
+
+
+def typeahead_cache():
+    """The current application's typeahead cache"""
+    return current_app.extensions['employee_typeahead']
+
+
+def _index_version(company_id):
+    """Current typeahead version of a company, shared by all processes through the database"""
+    name = f'employee_typeahead:{company_id}'
+    return CacheVersion.current([name])[name]
+
+
+@on_employees_committed
+def _drop_changed_indexes(company_ids):
+    """Invalidate the companies' indexes in all processes"""
+    CacheVersion.bump(f'employee_typeahead:{company_id}' for company_id in company_ids)
+    if 'employee_typeahead' in current_app.extensions:
+        typeahead_cache().invalidate(company_ids)
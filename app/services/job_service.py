@@ -0,0 +1,239 @@
+"""Database-backed background jobs.
+
+Jobs are rows in the ``jobs`` table. Web requests enqueue them and return the
+job id straight away; ``flask run-jobs`` claims queued rows with a conditional
+UPDATE (safe across workers on SQLite and PostgreSQL without a broker) and
+runs the handler registered for the job type.
+"""
+
+import logging
+import os
+import shutil
+import socket
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import update
+
+from app import db
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job has been cancelled"""
+
+
+class JobContext:
+    """Handle passed to job handlers for params, progress, cancellation and result files"""
+
+    def __init__(self, job):
+        self.job = job
+
+    @property
+    def params(self):
+        return self.job.params
+
+    def progress(self, percent, message=None):
+        """Record progress and stop the handler if the job was cancelled
+
+        Commits the session, so call it between units of work.
+        """
+        db.session.execute(
+            update(Job)
+            .where(Job.id == self.job.id)
+            .values(progress=max(0, min(100, int(percent))), progress_message=message, heartbeat_at=datetime.utcnow())
+        )
+        db.session.commit()
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        cancelled = db.session.query(Job.cancel_requested).filter(Job.id == self.job.id).scalar()
+        if cancelled:
+            raise JobCancelled()
+
+    def result_file(self, filename, mimetype='application/octet-stream'):
+        """Path to write the job's downloadable result to"""
+        directory = os.path.join(JobService.results_dir(), str(self.job.id))
+        os.makedirs(directory, exist_ok=True)
+        self.job.result_path = os.path.join(directory, filename)
+        self.job.result_filename = filename
+        self.job.result_mimetype = mimetype
+        return self.job.result_path
+
+
+class JobService:
+    """Enqueue, claim, run and cancel background jobs"""
+
+    STALE_AFTER = timedelta(minutes=30)
+
+    _handlers = {}
+
+    @staticmethod
+    def handler(job_type):
+        """Register a function ``handler(ctx)`` for a job type"""
+        def decorator(func):
+            JobService._handlers[job_type] = func
+            return func
+        return decorator
+
+    @staticmethod
+    def get_handler(job_type):
+        # Handlers register themselves on import
+        import app.tasks.jobs  # noqa: F401
+        return JobService._handlers.get(job_type)
+
+    @staticmethod
+    def results_dir():
+        return current_app.config.get('JOB_RESULTS_DIR') or os.path.join(current_app.instance_path, 'jobs')
+
+    @staticmethod
+    def enqueue(job_type, params=None, company_id=None, user_id=None):
+        """Queue a job and return it"""
+        if JobService.get_handler(job_type) is None:
+            raise ValueError(f'Unknown job type: {job_type}')
+
+        job = Job(job_type=job_type, company_id=company_id, created_by=user_id)
+        job.params = params
+        db.session.add(job)
+        db.session.commit()
+        logger.info("Queued job %s (%s)", job.id, job_type)
+        return job
+
+    @staticmethod
+    def get_for_user(job_id, user):
+        """A job the user created or whose company they can access, else None"""
+        job = db.session.get(Job, job_id)
+        if job is None:
+            return None
+        if job.created_by == user.id or (job.company_id and user.has_company_access(job.company_id)):
+            return job
+        return None
+
+    @staticmethod
+    def cancel(job):
+        """Cancel a queued job immediately or ask a running one to stop"""
+        if job.status == Job.STATUS_QUEUED:
+            claimed = db.session.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.status == Job.STATUS_QUEUED)
+                .values(status=Job.STATUS_CANCELLED, cancel_requested=True, finished_at=datetime.utcnow())
+            ).rowcount
+            if not claimed:
+                # A worker picked it up in the meantime
+                job.cancel_requested = True
+        elif job.status == Job.STATUS_RUNNING:
+            job.cancel_requested = True
+        db.session.commit()
+        db.session.refresh(job)
+        return job
+
+    @staticmethod
+    def claim_next(worker_id):
+        """Atomically move the oldest queued job to running for this worker"""
+        while True:
+            job_id = db.session.query(Job.id)\
+                .filter(Job.status == Job.STATUS_QUEUED)\
+                .order_by(Job.created_at, Job.id)\
+                .limit(1)\
+                .scalar()
+            if job_id is None:
+                return None
+
+            now = datetime.utcnow()
+            claimed = db.session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == Job.STATUS_QUEUED)
+                .values(status=Job.STATUS_RUNNING, worker_id=worker_id, started_at=now, heartbeat_at=now)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                job = db.session.get(Job, job_id)
+                db.session.refresh(job)
+                return job
+            # Another worker won the race; try the next one
+
+    @staticmethod
+    def run(job):
+        """Execute a claimed job and record its outcome"""
+        handler = JobService.get_handler(job.job_type)
+        ctx = JobContext(job)
+        try:
+            if handler is None:
+                raise ValueError(f'Unknown job type: {job.job_type}')
+            with current_app.test_request_context():
+                result = handler(ctx)
+            job.result = result
+            job.status = Job.STATUS_SUCCEEDED
+            job.progress = 100
+        except JobCancelled:
+            JobService._discard(job)
+            job.status = Job.STATUS_CANCELLED
+            logger.info("Job %s cancelled", job.id)
+        except Exception as e:
+            JobService._discard(job)
+            job.status = Job.STATUS_FAILED
+            job.error = f'{e}\n{traceback.format_exc()}'
+            logger.error("Job %s (%s) failed: %s", job.id, job.job_type, e)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return job
+
+    @staticmethod
+    def run_pending(worker_id=None, limit=None):
+        """Run queued jobs in this process until the queue is empty; returns the count"""
+        worker_id = worker_id or JobService.worker_name()
+        count = 0
+        while limit is None or count < limit:
+            job = JobService.claim_next(worker_id)
+            if job is None:
+                break
+            JobService.run(job)
+            count += 1
+        return count
+
+    @staticmethod
+    def requeue_stale(older_than=None):
+        """Put running jobs whose worker stopped heartbeating back in the queue"""
+        cutoff = datetime.utcnow() - (older_than or JobService.STALE_AFTER)
+        requeued = db.session.execute(
+            update(Job)
+            .where(Job.status == Job.STATUS_RUNNING, Job.heartbeat_at < cutoff)
+            .values(status=Job.STATUS_QUEUED, worker_id=None, started_at=None)
+        ).rowcount
+        db.session.commit()
+        return requeued
+
+    @staticmethod
+    def remove_company_jobs(company_id):
+        """Delete a company's jobs and result files ahead of deleting the company; the caller commits
+
+        Running jobs are asked to stop and detached from the company instead,
+        so their worker can still record the outcome.
+        """
+        for job in Job.query.filter_by(company_id=company_id).all():
+            if job.status == Job.STATUS_RUNNING:
+                job.cancel_requested = True
+                job.company_id = None
+                continue
+            if job.result_path:
+                shutil.rmtree(os.path.dirname(job.result_path), ignore_errors=True)
+            db.session.delete(job)
+
+    @staticmethod
+    def worker_name():
+        return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+
+    @staticmethod
+    def _discard(job):
+        """Roll back a failed handler's work and delete any partial result file"""
+        result_path = job.result_path
+        db.session.rollback()
+        if result_path:
+            shutil.rmtree(os.path.dirname(result_path), ignore_errors=True)
+        job.result_path = None
+        job.result_filename = None
+        job.result_mimetype = None
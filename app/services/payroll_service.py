@@ -2,7 +2,14 @@
 
 from datetime import date
 from decimal import Decimal
-from app.models import Employee, PayrollEntry
+from sqlalchemy import select
+from app import db
+from app.models import Employee, PayrollEntry, YtdLedger
+
+# Ledger columns read into YTD results
+YTD_LEDGER_FIELDS = (
+    "gross_pay", "paye", "uif", "sdl", "net_pay", "fringe_benefit", "bonus", "allowances",
+)
 
 
 def calculate_medical_aid_deduction(employee):
@@ -23,16 +30,54 @@ def calculate_medical_aid_deduction(employee):
     int
         The monthly medical aid deduction amount in Rand.
     """
+    deductions = list(employee.recurring_deductions)
+    if not any(
+        d.is_active and d.beneficiary and d.beneficiary.type == "Medical Aid"
+        for d in deductions
+    ):
+        return 0
+
+    from app.services.sars_config_resolver import SARSConfigResolver
+
+    return calculate_medical_aid_deduction_from(
+        deductions,
+        getattr(employee, "medical_aid_info", None),
+        SARSConfigResolver.resolve_global(),
+        fallback_dependants=getattr(employee, 'medical_aid_dependants', 0) or 0,
+    )
+
+
+def calculate_medical_aid_deduction_from(deductions, info, sars_config, fallback_dependants=0):
+    """Medical aid deduction from already-loaded employee data.
+
+    Same rules as :func:`calculate_medical_aid_deduction`, but works on
+    preloaded recurring deductions, medical aid info and a resolved SARS
+    config so batch callers do not trigger per-employee queries.
+
+    Parameters
+    ----------
+    deductions : iterable
+        The employee's recurring deductions (beneficiaries loaded).
+    info : :class:`~app.models.employee_medical_aid_info.EmployeeMedicalAidInfo` or ``None``
+        Medical aid configuration for the employee.
+    sars_config : dict
+        Effective SARS configuration providing the medical credits.
+    fallback_dependants : int
+        Dependants to use when no medical aid info exists.
+
+    Returns
+    -------
+    int or float
+        The monthly medical aid deduction amount in Rand.
+    """
     # Check if the employee has an active medical aid deduction
     has_medical_aid = any(
         d.is_active and d.beneficiary and d.beneficiary.type == "Medical Aid"
-        for d in employee.recurring_deductions
+        for d in deductions
     )
     if not has_medical_aid:
         return 0
 
-    info = getattr(employee, "medical_aid_info", None)
-
     if info and not info.use_sars_calculation:
         total = 0
         if info.employer_contribution_override:
@@ -47,15 +92,11 @@ def calculate_medical_aid_deduction(employee):
             info.additional_dependants or 0
         )
     else:
-        # Check if Employee has medical_aid_dependants field, fallback to 0
-        dependants = getattr(employee, 'medical_aid_dependants', 0) or 0
-
-    from app.services.sars_service import SARSService
-    sars_config = SARSService.get_global_sars_config()
-    
-    primary_credit = float(sars_config.medical_primary_credit)
-    dependant_credit = float(sars_config.medical_dependant_credit)
-    
+        dependants = fallback_dependants
+
+    primary_credit = float(sars_config['medical_primary_credit'])
+    dependant_credit = float(sars_config['medical_dependant_credit'])
+
     if dependants == 0:
         return primary_credit
     elif dependants == 1:
@@ -103,6 +144,72 @@ def calculate_medical_aid_fringe_benefit(info):
 
     return 0.0
 
+def _ytd_totals(row=None):
+    """YTD result dictionary from a row of ledger-style totals (all zero without a row)"""
+    def amount(field):
+        return Decimal(str(getattr(row, field) or 0)) if row is not None else Decimal("0")
+
+    def r(value):
+        return round(float(value), 2)
+
+    gross_pay = amount("gross_pay")
+    fringe = amount("fringe_benefit")
+    return {
+        "gross_pay_ytd": r(gross_pay),
+        "paye_ytd": r(amount("paye")),
+        "uif_ytd": r(amount("uif")),
+        "sdl_ytd": r(amount("sdl")),
+        "net_pay_ytd": r(amount("net_pay")),
+        "fringe_benefit_ytd": r(fringe),
+        "taxable_income_ytd": r(gross_pay + fringe),
+        "bonus_ytd": r(amount("bonus")),
+        "allowances_ytd": r(amount("allowances")),
+    }
+
+
+def get_ytd_totals(company_id, tax_year):
+    """YTD totals for every employee of a company from the tax-year ledger.
+
+    Parameters
+    ----------
+    company_id : int
+        Company to read totals for.
+    tax_year : int
+        Calendar year the SARS tax year starts in (2025 for 2025/2026).
+
+    Returns
+    -------
+    dict
+        Employee ID mapped to the same totals as :func:`calculate_ytd_totals`.
+        Employees without finalized entries in the tax year are absent.
+    """
+    rows = db.session.execute(
+        select(YtdLedger.employee_id, *[getattr(YtdLedger, field) for field in YTD_LEDGER_FIELDS])
+        .where(YtdLedger.company_id == company_id)
+        .where(YtdLedger.tax_year == tax_year)
+    )
+    return {row.employee_id: _ytd_totals(row) for row in rows}
+
+
+def sum_ytd_totals(start, end, company_id=None, employee_id=None):
+    """Finalized payroll totals per employee for an ad hoc date range, summed in SQL.
+
+    Entries are included when their pay period starts between ``start`` and
+    ``end`` inclusive. Returns a dictionary keyed by employee ID like
+    :func:`get_ytd_totals`.
+    """
+    stmt = select(PayrollEntry.employee_id, *YtdLedger.totals_columns())\
+        .where(PayrollEntry.is_finalized == True)\
+        .where(PayrollEntry.pay_period_start >= start)\
+        .where(PayrollEntry.pay_period_start <= end)\
+        .group_by(PayrollEntry.employee_id)
+    if company_id is not None:
+        stmt = stmt.where(PayrollEntry.company_id == company_id)
+    if employee_id is not None:
+        stmt = stmt.where(PayrollEntry.employee_id == employee_id)
+    return {row.employee_id: _ytd_totals(row) for row in db.session.execute(stmt)}
+
+
 def calculate_ytd_totals(employee_id, tax_year_start):
     """Calculate year-to-date payroll totals for an employee.
 
@@ -122,62 +229,8 @@ def calculate_ytd_totals(employee_id, tax_year_start):
     # Fetch employee and handle missing records gracefully
     employee = Employee.query.get(employee_id)
     if not employee:
-        return {
-            "gross_pay_ytd": 0.0,
-            "paye_ytd": 0.0,
-            "uif_ytd": 0.0,
-            "sdl_ytd": 0.0,
-            "net_pay_ytd": 0.0,
-            "fringe_benefit_ytd": 0.0,
-            "taxable_income_ytd": 0.0,
-            "bonus_ytd": 0.0,
-            "allowances_ytd": 0.0,
-        }
+        return _ytd_totals()
 
     effective_start = max(employee.start_date, tax_year_start)
-    today = date.today()
-
-    entries = (
-        PayrollEntry.query.filter(
-            PayrollEntry.employee_id == employee.id,
-            PayrollEntry.is_finalized.is_(True),
-            PayrollEntry.pay_period_start >= effective_start,
-            PayrollEntry.pay_period_start <= today,
-        ).all()
-    )
-
-    gross_pay = Decimal("0")
-    paye = Decimal("0")
-    uif = Decimal("0")
-    sdl = Decimal("0")
-    net_pay = Decimal("0")
-    fringe = Decimal("0")
-    bonus = Decimal("0")
-    allowances = Decimal("0")
-
-    for entry in entries:
-        gross_pay += Decimal(str(entry.gross_pay or 0))
-        paye += Decimal(str(entry.paye or 0))
-        uif += Decimal(str(entry.uif or 0))
-        sdl += Decimal(str(entry.sdl or 0))
-        net_pay += Decimal(str(entry.net_pay or 0))
-        fringe += Decimal(str(entry.fringe_benefit_medical or 0))
-        bonus += Decimal(str(entry.bonus_amount or 0))
-        allowances += Decimal(str(entry.allowances or 0))
-
-    taxable_income = gross_pay + fringe
-
-    def r(value):
-        return round(float(value), 2)
-
-    return {
-        "gross_pay_ytd": r(gross_pay),
-        "paye_ytd": r(paye),
-        "uif_ytd": r(uif),
-        "sdl_ytd": r(sdl),
-        "net_pay_ytd": r(net_pay),
-        "fringe_benefit_ytd": r(fringe),
-        "taxable_income_ytd": r(taxable_income),
-        "bonus_ytd": r(bonus),
-        "allowances_ytd": r(allowances),
-    }
+    totals = sum_ytd_totals(effective_start, date.today(), employee_id=employee.id)
+    return totals.get(employee.id) or _ytd_totals()
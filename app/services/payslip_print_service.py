@@ -0,0 +1,73 @@
+"""Single-document payslip print runs.
+
+A print run lays out every payslip of a period as pages of one PDF. The
+payslip stylesheet is parsed once and shared, together with one font
+configuration, across every payslip instead of being re-parsed per employee.
+"""
+
+from datetime import datetime
+
+from flask import current_app
+
+from app.services.payslip_render_service import PayslipRenderService
+
+
+class PayslipPrintRun:
+    """Combined payslip PDF for a list of entries with a page-range index"""
+
+    def __init__(self, entries, current_date=None):
+        self.entries = entries
+        self.current_date = current_date or datetime.now()
+        self.index = []
+        self._document = None
+
+    @staticmethod
+    def stylesheet_source():
+        """The payslip stylesheet shared by standalone payslips and print runs"""
+        return current_app.jinja_env.get_template('payslip.css').render()
+
+    def layout(self):
+        """Lay out every payslip with shared CSS and fonts, building the page index"""
+        from weasyprint import CSS, HTML
+        from weasyprint.text.fonts import FontConfiguration
+
+        font_config = FontConfiguration()
+        stylesheet = CSS(string=PayslipPrintRun.stylesheet_source(), font_config=font_config)
+
+        documents = []
+        pages = []
+        self.index = []
+        for entry in self.entries:
+            html = PayslipRenderService.render_html(entry, self.current_date, print_run=True)
+            document = HTML(string=html).render(stylesheets=[stylesheet], font_config=font_config)
+            documents.append(document)
+            self.index.append({
+                'entry_id': entry.id,
+                'employee_id': entry.employee.employee_id,
+                'employee_name': entry.employee.full_name,
+                'filename': PayslipRenderService.payslip_filename(entry),
+                'first_page': len(pages) + 1,
+                'last_page': len(pages) + len(document.pages),
+            })
+            pages.extend(document.pages)
+
+        self._document = documents[0].copy(pages) if documents else None
+        return self.index
+
+    def write_pdf(self):
+        """The whole print run as one PDF"""
+        if self._document is None:
+            self.layout()
+        if self._document is None:
+            return None
+        return self._document.write_pdf()
+
+    def extract_pdf(self, entry_id):
+        """One payslip from the print run as its own PDF, using the page index"""
+        if self._document is None:
+            self.layout()
+        for item in self.index:
+            if item['entry_id'] == entry_id:
+                pages = self._document.pages[item['first_page'] - 1:item['last_page']]
+                return self._document.copy(pages).write_pdf()
+        return None
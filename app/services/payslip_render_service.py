@@ -0,0 +1,214 @@
+"""Parallel payslip PDF rendering with streamed ZIP output.
+
+Payslip HTML is rendered in the web process from entries loaded up front,
+then converted to PDF by a pool of pre-warmed worker processes. Finished PDFs
+are written straight into a ZIP stream, so memory is bounded by the number of
+payslips in flight rather than by the headcount.
+"""
+
+import logging
+import multiprocessing
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from flask import current_app, render_template
+from sqlalchemy.orm import joinedload
+
+from app.models import Employee, PayrollEntry
+from app.services.payslip_store import PayslipStore
+
+logger = logging.getLogger(__name__)
+
+
+def render_pdf(html):
+    """Convert payslip HTML to PDF bytes (runs inside pool workers)"""
+    from weasyprint import HTML
+    return HTML(string=html).write_pdf()
+
+
+def _warm_worker():
+    """Load WeasyPrint and its fonts once per worker process"""
+    try:
+        render_pdf('<html><body><p>warm-up</p></body></html>')
+    except Exception as e:
+        logger.warning("Payslip worker warm-up failed: %s", e)
+
+
+class _ZipStream:
+    """Write-only buffer that lets ``zipfile`` write to an unseekable stream"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class PayslipRenderService:
+    """Render payslip PDFs in parallel and stream them as a ZIP archive"""
+
+    _executor = None
+    _executor_workers = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def load_entries(entry_ids, company_id):
+        """Finalized entries with everything the payslip template needs eagerly loaded"""
+        return PayrollEntry.query\
+            .options(joinedload(PayrollEntry.employee).joinedload(Employee.company))\
+            .join(Employee)\
+            .filter(PayrollEntry.id.in_(entry_ids))\
+            .filter(PayrollEntry.company_id == company_id)\
+            .filter(PayrollEntry.is_finalized == True)\
+            .order_by(Employee.last_name, Employee.first_name)\
+            .all()
+
+    @staticmethod
+    def payslip_filename(entry):
+        """Archive member name for an entry's payslip"""
+        return f"{entry.employee.full_name}_Payslip_{entry.month_year}.pdf".replace(" ", "_")
+
+    @staticmethod
+    def load_period_entries(company_id, month_year):
+        """Finalized entries of a company for one ``YYYY-MM`` period, eagerly loaded"""
+        return PayrollEntry.query\
+            .options(joinedload(PayrollEntry.employee).joinedload(Employee.company))\
+            .join(Employee)\
+            .filter(PayrollEntry.company_id == company_id)\
+            .filter(PayrollEntry.month_year == month_year)\
+            .filter(PayrollEntry.is_finalized == True)\
+            .order_by(Employee.last_name, Employee.first_name)\
+            .all()
+
+    @staticmethod
+    def render_html(entry, current_date=None, print_run=False):
+        """Render the payslip template for one entry
+
+        ``print_run`` leaves out the inline stylesheet so a print run can apply
+        one shared, pre-parsed stylesheet instead.
+        """
+        return render_template('payslip.html',
+                               employee=entry.employee,
+                               entry=entry,
+                               company=entry.employee.company,
+                               current_date=current_date or datetime.now(),
+                               print_run=print_run)
+
+    @staticmethod
+    def get_executor(workers):
+        """Shared process pool, created on first use with pre-warmed workers"""
+        with PayslipRenderService._lock:
+            if PayslipRenderService._executor is None or PayslipRenderService._executor_workers != workers:
+                if PayslipRenderService._executor is not None:
+                    PayslipRenderService._executor.shutdown(wait=False)
+                # Spawned workers never inherit the web process's DB connections
+                PayslipRenderService._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_warm_worker,
+                )
+                PayslipRenderService._executor_workers = workers
+            return PayslipRenderService._executor
+
+    @staticmethod
+    def shutdown():
+        """Stop the worker pool"""
+        with PayslipRenderService._lock:
+            if PayslipRenderService._executor is not None:
+                PayslipRenderService._executor.shutdown(wait=False)
+            PayslipRenderService._executor = None
+            PayslipRenderService._executor_workers = 0
+
+    @staticmethod
+    def iter_pdfs(documents, workers=None, render=render_pdf):
+        """Yield ``(key, pdf)`` for ``(key, html)`` documents as each PDF finishes
+
+        At most ``workers * 2`` documents are in flight at once; with no workers
+        the PDFs are rendered serially in the calling process.
+        """
+        if workers is None:
+            workers = current_app.config.get('PAYSLIP_RENDER_WORKERS', 0)
+
+        if workers <= 0:
+            for key, html in documents:
+                yield key, render(html)
+            return
+
+        executor = PayslipRenderService.get_executor(workers)
+        max_in_flight = workers * 2
+        pending = {}
+        documents = iter(documents)
+        exhausted = False
+        try:
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_in_flight:
+                    try:
+                        key, html = next(documents)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[executor.submit(render, html)] = key
+
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+        except BrokenProcessPool:
+            PayslipRenderService.shutdown()
+            raise
+        finally:
+            for future in pending:
+                future.cancel()
+
+    @staticmethod
+    def iter_entry_pdfs(entries, current_date=None, workers=None):
+        """Yield ``(filename, pdf)`` per entry, serving stored PDFs and storing new ones"""
+        current_date = current_date or datetime.now()
+        misses = []
+        for entry in entries:
+            fingerprint = PayslipStore.fingerprint(entry)
+            path = PayslipStore.get(entry, fingerprint)
+            if path is None:
+                misses.append((entry, fingerprint))
+                continue
+            with open(path, 'rb') as stored:
+                yield PayslipRenderService.payslip_filename(entry), stored.read()
+
+        documents = (
+            ((entry, fingerprint), PayslipRenderService.render_html(entry, current_date))
+            for entry, fingerprint in misses
+        )
+        for (entry, fingerprint), pdf in PayslipRenderService.iter_pdfs(documents, workers):
+            PayslipStore.put(entry, pdf, fingerprint)
+            yield PayslipRenderService.payslip_filename(entry), pdf
+
+    @staticmethod
+    def store_finalized(entries, workers=None):
+        """Render and store PDFs for newly finalized entries; returns the number rendered"""
+        rendered = 0
+        for _ in PayslipRenderService.iter_entry_pdfs(entries, workers=workers):
+            rendered += 1
+        return rendered
+
+    @staticmethod
+    def stream_zip(pdfs):
+        """Yield ZIP archive bytes for ``(filename, pdf)`` pairs as they arrive"""
+        stream = _ZipStream()
+        with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for filename, pdf in pdfs:
+                zip_file.writestr(filename, pdf)
+                yield stream.drain()
+        yield stream.drain()
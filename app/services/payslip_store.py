@@ -0,0 +1,213 @@
+"""Content-addressed store for finalized payslip PDFs.
+
+Each PDF is filed under ``instance/payslips/<entry id>/<fingerprint>.pdf``
+where the fingerprint hashes every entry, employee and company field the
+payslip template reads. Any change to those fields yields a new fingerprint,
+so a stale PDF is never served; updating an entry also evicts its directory.
+The store is bounded by ``PAYSLIP_STORE_MAX_BYTES`` with least-recently-used
+eviction based on file modification times, which are touched on every hit.
+Each process tracks the store size from the bytes it writes and only walks
+the directory tree when that estimate passes the limit, or when its last walk
+is older than ``RESCAN_SECONDS`` so writes by other processes are counted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app.models.payroll_entry import PayrollEntry
+
+logger = logging.getLogger(__name__)
+
+# Columns read by templates/payslip.html. The template's medical aid scheme, number and
+# contribution lines refer to employee columns that no longer exist and always render
+# empty, so only real columns are hashed; fingerprints must not trigger queries
+ENTRY_FIELDS = (
+    'id', 'pay_period_start', 'pay_period_end', 'ordinary_hours', 'overtime_hours', 'sunday_hours',
+    'public_holiday_hours', 'hourly_rate', 'pieces_produced', 'piece_rate', 'allowances', 'paye', 'uif',
+    'sdl', 'union_fee', 'fringe_benefit_medical', 'medical_aid_tax_credit', 'gross_pay', 'total_deductions',
+    'net_pay',
+)
+EMPLOYEE_FIELDS = (
+    'id', 'employee_id', 'first_name', 'last_name', 'id_number', 'tax_number', 'department', 'job_title',
+    'employment_status', 'salary_type', 'bank_name',
+)
+COMPANY_FIELDS = (
+    'id', 'name', 'address', 'email', 'phone', 'registration_number', 'overtime_multiplier',
+    'sunday_multiplier', 'public_holiday_multiplier', 'uif_percent', 'sdl_percent',
+)
+
+
+class PayslipStore:
+    """Size-bounded LRU file store for finalized payslip PDFs"""
+
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+    RESCAN_SECONDS = 60
+
+    hits = 0
+    misses = 0
+    _lock = threading.Lock()
+    # Store root -> (estimated bytes, monotonic time of the last walk)
+    _sizes = {}
+
+    @staticmethod
+    def root():
+        """Directory holding the stored PDFs"""
+        return current_app.config.get('PAYSLIP_STORE_DIR') or os.path.join(current_app.instance_path, 'payslips')
+
+    @staticmethod
+    def max_bytes():
+        return current_app.config.get('PAYSLIP_STORE_MAX_BYTES', PayslipStore.DEFAULT_MAX_BYTES)
+
+    @staticmethod
+    def fingerprint(entry):
+        """Hash of the entry, employee and company fields rendered on the payslip"""
+        employee = entry.employee
+        company = employee.company
+        payload = [
+            [str(getattr(entry, field)) for field in ENTRY_FIELDS],
+            [str(getattr(employee, field)) for field in EMPLOYEE_FIELDS],
+            [str(getattr(company, field)) for field in COMPANY_FIELDS],
+        ]
+        return hashlib.sha256(json.dumps(payload).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def path_for(entry_id, fingerprint):
+        return os.path.join(PayslipStore.root(), str(entry_id), f'{fingerprint}.pdf')
+
+    @staticmethod
+    def get(entry, fingerprint=None):
+        """Path of the stored PDF for a finalized entry, or None on a miss"""
+        if not entry.is_finalized:
+            return None
+
+        path = PayslipStore.path_for(entry.id, fingerprint or PayslipStore.fingerprint(entry))
+        try:
+            # Touch on read so eviction drops the least recently used PDFs first
+            os.utime(path)
+        except FileNotFoundError:
+            PayslipStore._count(hit=False)
+            return None
+        PayslipStore._count(hit=True)
+        return path
+
+    @staticmethod
+    def put(entry, pdf, fingerprint=None):
+        """Store the PDF for a finalized entry and return its path"""
+        if not entry.is_finalized:
+            return None
+
+        path = PayslipStore.path_for(entry.id, fingerprint or PayslipStore.fingerprint(entry))
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write atomically so concurrent readers never see a partial PDF
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(pdf)
+        os.replace(tmp_path, path)
+
+        root = PayslipStore.root()
+        with PayslipStore._lock:
+            known = PayslipStore._sizes.get(root)
+            if known is not None:
+                known = (known[0] + len(pdf), known[1])
+                PayslipStore._sizes[root] = known
+        if (known is None or known[0] > PayslipStore.max_bytes()
+                or time.monotonic() - known[1] >= PayslipStore.RESCAN_SECONDS):
+            PayslipStore.enforce_limit()
+        return path
+
+    @staticmethod
+    def evict(entry_id):
+        """Remove every stored PDF for an entry"""
+        shutil.rmtree(os.path.join(PayslipStore.root(), str(entry_id)), ignore_errors=True)
+
+    @staticmethod
+    def enforce_limit():
+        """Delete least recently used PDFs until the store fits its size limit"""
+        files = PayslipStore._files()
+        total = sum(size for _, size, _ in files)
+        limit = PayslipStore.max_bytes()
+
+        removed = 0
+        if total > limit:
+            for path, size, _ in sorted(files, key=lambda item: item[2]):
+                if total <= limit:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                total -= size
+                removed += 1
+
+        with PayslipStore._lock:
+            PayslipStore._sizes[PayslipStore.root()] = (total, time.monotonic())
+        return removed
+
+    @staticmethod
+    def stats():
+        """Hit/miss counters for this process and the current store size"""
+        files = PayslipStore._files()
+        lookups = PayslipStore.hits + PayslipStore.misses
+        return {
+            'hits': PayslipStore.hits,
+            'misses': PayslipStore.misses,
+            'hit_rate': round(PayslipStore.hits / lookups, 4) if lookups else 0.0,
+            'files': len(files),
+            'bytes': sum(size for _, size, _ in files),
+            'max_bytes': PayslipStore.max_bytes(),
+        }
+
+    @staticmethod
+    def reset_stats():
+        with PayslipStore._lock:
+            PayslipStore.hits = 0
+            PayslipStore.misses = 0
+
+    @staticmethod
+    def _count(hit):
+        with PayslipStore._lock:
+            if hit:
+                PayslipStore.hits += 1
+            else:
+                PayslipStore.misses += 1
+
+    @staticmethod
+    def _files():
+        files = []
+        for directory, _, names in os.walk(PayslipStore.root()):
+            for name in names:
+                if not name.endswith('.pdf'):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+
+@event.listens_for(PayrollEntry, 'after_update')
+@event.listens_for(PayrollEntry, 'after_delete')
+def _evict_stored_payslip(mapper, connection, target):
+    """Edited, un-finalized or deleted entries drop their stored PDFs"""
+    session = object_session(target)
+    if session is not None and target in session.dirty and not session.is_modified(target, include_collections=False):
+        return
+    try:
+        PayslipStore.evict(target.id)
+    except RuntimeError:
+        # Outside an application context there is no store to evict from
+        pass
@@ -0,0 +1,153 @@
+"""Portfolio payroll runs across many companies at once.
+
+Each company's period is processed by :class:`PayrollBatchCalculator` in a
+pool of spawned worker processes. Every worker builds its own application and
+so has its own engine and database session; companies commit independently,
+so a failure in one tenant never rolls back another. Results are yielded as
+each company finishes, which lets callers stream progress.
+"""
+
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from decimal import Decimal
+
+from flask import current_app
+
+from app import db
+from app.models import Company
+
+logger = logging.getLogger(__name__)
+
+TOTAL_FIELDS = ('gross_pay', 'paye', 'uif', 'sdl', 'net_pay')
+
+# Application of the current pool worker process, built by _init_worker
+_worker_app = None
+
+
+def _init_worker(config_name):
+    """Build a private application (engine, session, cache) for a pool worker"""
+    global _worker_app
+    from app import create_app
+    _worker_app = create_app(config_name)
+
+
+def process_company(company_id, period_start, period_end):
+    """Run one company's payroll period and commit it; never raises
+
+    Returns the batch summary with ``status`` ``'succeeded'``, or the error
+    with ``status`` ``'failed'`` after rolling back that company's work.
+    """
+    from app.services.payroll_batch_service import PayrollBatchCalculator
+
+    try:
+        summary = PayrollBatchCalculator(company_id, period_start, period_end).run()
+        return dict(summary, status='succeeded')
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Portfolio payroll run failed for company %s: %s", company_id, e)
+        return {'company_id': company_id, 'status': 'failed', 'error': str(e)}
+
+
+def _process_in_worker(company_id, period_start, period_end):
+    """Pool task: process one company inside the worker's own app context"""
+    with _worker_app.app_context():
+        try:
+            return process_company(company_id, period_start, period_end)
+        finally:
+            db.session.remove()
+
+
+class PortfolioPayrollRun:
+    """Process one pay period for a list of companies concurrently"""
+
+    def __init__(self, company_ids, period_start, period_end, workers=None):
+        self.company_ids = list(dict.fromkeys(company_ids))
+        self.period_start = period_start
+        self.period_end = period_end
+        if workers is None:
+            workers = current_app.config.get('PORTFOLIO_PAYROLL_WORKERS', 0)
+        # Worker processes cannot share a private in-memory SQLite database
+        if current_app.config.get('SQLALCHEMY_DATABASE_URI', '').startswith('sqlite:///:memory:'):
+            workers = 0
+        self.workers = min(workers, len(self.company_ids))
+
+    def iter_results(self):
+        """Yield each company's result as soon as it finishes
+
+        With no workers the companies are processed serially in the calling
+        process. Companies not yet started are cancelled if the caller stops
+        iterating.
+        """
+        if self.workers <= 0:
+            for company_id in self.company_ids:
+                yield process_company(company_id, self.period_start, self.period_end)
+            return
+
+        # Spawned workers never inherit the web process's DB connections
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(current_app.config['CONFIG_NAME'],),
+        )
+        pending = {
+            executor.submit(_process_in_worker, company_id, self.period_start, self.period_end): company_id
+            for company_id in self.company_ids
+        }
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    company_id = pending.pop(future)
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        # The worker itself died (e.g. BrokenProcessPool)
+                        yield {'company_id': company_id, 'status': 'failed', 'error': str(e)}
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def run(self, progress=None):
+        """Process every company and return a consolidated summary
+
+        ``progress(done, total, result)`` is called after each company.
+        """
+        started = time.perf_counter()
+        names = dict(
+            db.session.query(Company.id, Company.name).filter(Company.id.in_(self.company_ids)).all()
+        )
+        # Release the read transaction before workers start writing
+        db.session.commit()
+
+        results = []
+        for result in self.iter_results():
+            result['company_name'] = names.get(result['company_id'])
+            results.append(result)
+            if progress is not None:
+                progress(len(results), len(self.company_ids), result)
+
+        succeeded = [result for result in results if result['status'] == 'succeeded']
+        summary = {
+            'period_start': self.period_start.isoformat(),
+            'period_end': self.period_end.isoformat(),
+            'companies': len(self.company_ids),
+            'succeeded': len(succeeded),
+            'failed': [
+                {'company_id': r['company_id'], 'company_name': r['company_name'], 'error': r['error']}
+                for r in results if r['status'] == 'failed'
+            ],
+            'employees': sum(result['employees'] for result in succeeded),
+            'created': sum(result['created'] for result in succeeded),
+            'totals': {
+                field: float(sum((Decimal(str(result['totals'][field])) for result in succeeded), Decimal('0')))
+                for field in TOTAL_FIELDS
+            },
+            'results': results,
+            'workers': self.workers,
+            'total_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+        logger.info("Portfolio payroll run for %s companies: %s created, %s failed",
+                    summary['companies'], summary['created'], len(summary['failed']))
+        return summary
@@ -4,7 +4,7 @@ Optimizes database queries and provides caching for improved performance
 """
 from flask import current_app
 from app import db, cache
-from app.models import Company, Employee, PayrollEntry, ComplianceReminder
+from app.models import Company, Employee, PayrollEntry, PayrollPeriodSummary, ComplianceReminder
 from sqlalchemy import func, desc, case, and_, distinct
 from datetime import datetime, timedelta
 import calendar
@@ -190,7 +190,6 @@ class PortfolioService:
             Company.name,
             Company.industry,
             func.count(distinct(Employee.id)).label('employee_count'),
-            func.max(PayrollEntry.pay_period_end).label('last_payroll'),
             func.count(case(
                 (Employee.tax_number.is_(None), Employee.id)
             )).label('missing_tax_numbers'),
@@ -199,25 +198,26 @@ class PortfolioService:
                     Employee.medical_aid_member == True,
                     EmployeeMedicalAidInfo.id.is_(None)
                 ), Employee.id)
-            )).label('missing_medical_aid'),
-            func.sum(case(
-                (PayrollEntry.net_pay.isnot(None), PayrollEntry.net_pay),
-                else_=0
-            )).label('total_payroll'),
-            func.count(case(
-                (PayrollEntry.is_verified == False, PayrollEntry.id)
-            )).label('unverified_entries'),
-            func.count(case(
-                (PayrollEntry.is_finalized == True, PayrollEntry.id)
-            )).label('finalized_entries')
+            )).label('missing_medical_aid')
         ).select_from(Company)\
          .outerjoin(Employee, Company.id == Employee.company_id)\
          .outerjoin(EmployeeMedicalAidInfo, Employee.id == EmployeeMedicalAidInfo.employee_id)\
-         .outerjoin(PayrollEntry, Employee.id == PayrollEntry.employee_id)\
          .filter(Company.id.in_(user_company_ids))\
          .group_by(Company.id, Company.name, Company.industry)\
          .all()
         
+        # Payroll totals come from the per-month summaries rather than every entry
+        payroll_results = db.session.query(
+            PayrollPeriodSummary.company_id,
+            func.max(PayrollPeriodSummary.last_pay_period_end).label('last_payroll'),
+            func.sum(PayrollPeriodSummary.net_pay).label('total_payroll'),
+            func.sum(PayrollPeriodSummary.headcount - PayrollPeriodSummary.verified_count).label('unverified_entries'),
+            func.sum(PayrollPeriodSummary.finalized_count).label('finalized_entries')
+        ).filter(PayrollPeriodSummary.company_id.in_(user_company_ids))\
+         .group_by(PayrollPeriodSummary.company_id)\
+         .all()
+        payroll_data = {r.company_id: r for r in payroll_results}
+        
         # Get compliance data in separate query for better performance
         compliance_data = {}
         if user_company_ids:
@@ -239,6 +239,12 @@ class PortfolioService:
         total_employees = 0
         
         for result in results:
+            payroll = payroll_data.get(result.id)
+            last_payroll = payroll.last_payroll if payroll else None
+            total_payroll = payroll.total_payroll if payroll else 0
+            unverified_entries = payroll.unverified_entries if payroll else 0
+            finalized_entries = payroll.finalized_entries if payroll else 0
+            
             # Calculate pending issues from aggregated data
             pending_issues = result.missing_tax_numbers
             if result.missing_medical_aid:
@@ -248,7 +254,7 @@ class PortfolioService:
             current_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
             payroll_overdue = False
             if result.employee_count > 0:
-                if not result.last_payroll or result.last_payroll < current_month_start.date():
+                if not last_payroll or last_payroll < current_month_start.date():
                     pending_issues += 1
                     payroll_overdue = True
             
@@ -257,12 +263,12 @@ class PortfolioService:
             payroll_status_text = 'No Payroll'
             payroll_badge_class = 'bg-secondary'
             
-            if result.last_payroll:
-                if result.finalized_entries > 0:
+            if last_payroll:
+                if finalized_entries > 0:
                     payroll_status = 'finalized'
                     payroll_status_text = 'Finalized'
                     payroll_badge_class = 'bg-success'
-                elif result.unverified_entries > 0:
+                elif unverified_entries > 0:
                     payroll_status = 'pending'
                     payroll_status_text = 'Pending'
                     payroll_badge_class = 'bg-warning'
@@ -277,10 +283,10 @@ class PortfolioService:
             
             # Calculate estimated monthly payroll (average of last 3 months)
             monthly_estimate = 0
-            if result.total_payroll:
+            if total_payroll:
                 # Simple estimate: total payroll divided by number of months with data
                 months_with_data = 3  # Assume 3 months of data for estimation
-                monthly_estimate = float(result.total_payroll) / months_with_data
+                monthly_estimate = float(total_payroll) / months_with_data
             
             # Get compliance status with CSS class and tooltip
             overdue_compliance = compliance_data.get(result.id, 0)
@@ -301,7 +307,7 @@ class PortfolioService:
                 'name': result.name,
                 'industry': result.industry,
                 'employee_count': result.employee_count or 0,
-                'last_payroll_date': result.last_payroll,
+                'last_payroll_date': last_payroll,
                 'pending_issues': pending_issues,
                 'payroll_status': payroll_status,
                 'payroll_status_text': payroll_status_text,
@@ -311,9 +317,9 @@ class PortfolioService:
                 'compliance_class': compliance_class,
                 'compliance_tooltip': compliance_tooltip,
                 'overdue_compliance': overdue_compliance,
-                'total_payroll': float(result.total_payroll) if result.total_payroll else 0,
-                'finalized_entries': result.finalized_entries or 0,
-                'unverified_entries': result.unverified_entries or 0
+                'total_payroll': float(total_payroll) if total_payroll else 0,
+                'finalized_entries': finalized_entries or 0,
+                'unverified_entries': unverified_entries or 0
             })
             
             total_employees += result.employee_count or 0
@@ -0,0 +1,281 @@
+"""
+Report Export Service - Streaming CSV report rows shared by the report routes and background jobs
+"""
+import csv
+import io
+from datetime import date
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models import Company, Employee, PayrollEntry, PayrollEntryDeduction, Beneficiary, EmployeeRecurringDeduction
+
+
+def beneficiary_totals_for_period(company_id, period=None, employee_id=None):
+    """Beneficiary payment totals from the deduction lines of verified entries"""
+    query = db.session.query(Beneficiary, func.sum(PayrollEntryDeduction.amount).label('total'))\
+        .join(PayrollEntryDeduction, PayrollEntryDeduction.beneficiary_id == Beneficiary.id)\
+        .join(PayrollEntry, PayrollEntry.id == PayrollEntryDeduction.payroll_entry_id)\
+        .filter(PayrollEntry.company_id == company_id)\
+        .filter(PayrollEntry.is_verified == True)
+
+    if period:
+        query = query.filter(PayrollEntry.month_year == period)
+    if employee_id:
+        query = query.filter(PayrollEntry.employee_id == employee_id)
+
+    beneficiary_totals = {}
+    for beneficiary, total in query.group_by(Beneficiary.id).order_by(Beneficiary.name).all():
+        beneficiary_totals[beneficiary.name] = {
+            'total': total or 0,
+            'type': beneficiary.type,
+            'beneficiary_id': beneficiary.id,
+            'beneficiary': beneficiary
+        }
+    return beneficiary_totals
+
+
+class ReportExportService:
+    """Builds CSV exports for a company as header + data rows
+
+    Data rows come from column-only ``select()`` projections fetched in
+    batches of ``YIELD_PER`` (a server-side cursor on PostgreSQL), so an
+    export streams in constant memory however many rows it covers.
+    """
+
+    YIELD_PER = 1000
+
+    # report name -> (rows method, filename template)
+    EXPORTS = {
+        'payroll': ('payroll_rows', 'payroll_summary_{period}.csv'),
+        'leave': ('leave_rows', 'leave_summary.csv'),
+        'deductions': ('deduction_rows', 'recurring_deductions.csv'),
+        'employee_status': ('employee_status_rows', 'employee_status.csv'),
+        'beneficiary': ('beneficiary_rows', 'beneficiary_payments_{period}.csv'),
+        'eft': ('eft_rows', 'eft_file_{period}_{today}.csv'),
+    }
+
+    @staticmethod
+    def filename(report, period=None):
+        """Download filename for a report"""
+        template = ReportExportService.EXPORTS[report][1]
+        return template.format(period=period or 'all', today=date.today().strftime('%Y%m%d'))
+
+    @staticmethod
+    def rows(report, company_id, period=None):
+        """Header and data rows for a report"""
+        method = getattr(ReportExportService, ReportExportService.EXPORTS[report][0])
+        return method(company_id, period)
+
+    @staticmethod
+    def write_csv(report, company_id, period, fileobj):
+        """Write a report as CSV to a text file object; returns the number of data rows"""
+        writer = csv.writer(fileobj)
+        count = -1
+        for row in ReportExportService.rows(report, company_id, period):
+            writer.writerow(row)
+            count += 1
+        return max(count, 0)
+
+    @staticmethod
+    def iter_csv(report, company_id, period=None, chunk_size=64 * 1024):
+        """Yield a report as CSV text in chunks of roughly ``chunk_size`` characters"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in ReportExportService.rows(report, company_id, period):
+            writer.writerow(row)
+            if buffer.tell() >= chunk_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @staticmethod
+    def to_csv(report, company_id, period=None):
+        """A report as a CSV string"""
+        return ''.join(ReportExportService.iter_csv(report, company_id, period))
+
+    @staticmethod
+    def stream(stmt):
+        """Execute a column-only select, fetching rows in batches through a server-side cursor"""
+        return db.session.execute(stmt.execution_options(yield_per=ReportExportService.YIELD_PER))
+
+    @staticmethod
+    def _verified_entries_select(company_id, period, *columns):
+        stmt = select(*columns)\
+            .select_from(PayrollEntry)\
+            .join(Employee, Employee.id == PayrollEntry.employee_id)\
+            .where(PayrollEntry.company_id == company_id)\
+            .where(PayrollEntry.is_verified == True)\
+            .order_by(PayrollEntry.id)
+        if period:
+            stmt = stmt.where(PayrollEntry.month_year == period)
+        return stmt
+
+    @staticmethod
+    def _eft_entries_select(company_id, period, *columns):
+        return ReportExportService._verified_entries_select(company_id, period, *columns)\
+            .where(Employee.bank_name.isnot(None))\
+            .where(Employee.account_number.isnot(None))
+
+    @staticmethod
+    def has_eft_entries(company_id, period=None):
+        """Whether any verified entry in the period can be paid by EFT"""
+        stmt = ReportExportService._eft_entries_select(company_id, period, PayrollEntry.id).limit(1)
+        return db.session.execute(stmt).first() is not None
+
+    @staticmethod
+    def payroll_rows(company_id, period=None):
+        yield ['Employee ID', 'Employee Name', 'Gross Pay', 'PAYE', 'UIF', 'SDL',
+               'Other Deductions', 'Net Pay', 'Period', 'Status']
+
+        stmt = ReportExportService._verified_entries_select(
+            company_id, period,
+            Employee.employee_id, Employee.first_name, Employee.last_name,
+            PayrollEntry.gross_pay, PayrollEntry.paye, PayrollEntry.uif, PayrollEntry.sdl,
+            PayrollEntry.deductions_other, PayrollEntry.union_fee, PayrollEntry.net_pay,
+            PayrollEntry.month_year, PayrollEntry.pay_period_start, PayrollEntry.is_finalized,
+        )
+        for row in ReportExportService.stream(stmt):
+            yield [
+                row.employee_id,
+                f"{row.first_name} {row.last_name}",
+                row.gross_pay,
+                row.paye,
+                row.uif,
+                row.sdl,
+                (row.deductions_other or 0) + (row.union_fee or 0),
+                row.net_pay,
+                row.month_year or row.pay_period_start.strftime('%Y-%m'),
+                'Finalized' if row.is_finalized else 'Verified'
+            ]
+
+    @staticmethod
+    def leave_rows(company_id, period=None):
+        defaults = db.session.execute(
+            select(Company.default_annual_leave_days, Company.default_sick_leave_days)
+            .where(Company.id == company_id)
+        ).one()
+        yield ['Employee ID', 'Employee Name', 'Annual Leave Days', 'Sick Leave Days',
+               'Hire Date', 'Service Period (Years)']
+
+        stmt = select(
+            Employee.employee_id, Employee.first_name, Employee.last_name,
+            Employee.annual_leave_days, Employee.start_date,
+        ).where(Employee.company_id == company_id).order_by(Employee.id)
+
+        today = date.today()
+        for row in ReportExportService.stream(stmt):
+            service_years = 0
+            if row.start_date:
+                service_days = (today - row.start_date).days
+                service_years = round(service_days / 365, 1)
+
+            yield [
+                row.employee_id,
+                f"{row.first_name} {row.last_name}",
+                row.annual_leave_days or defaults.default_annual_leave_days or 15,
+                # Employees have no sick leave override; use the company default
+                defaults.default_sick_leave_days or 10,
+                row.start_date.strftime('%Y-%m-%d') if row.start_date else 'N/A',
+                service_years
+            ]
+
+    @staticmethod
+    def deduction_rows(company_id, period=None):
+        yield ['Employee ID', 'Employee Name', 'Beneficiary', 'Deduction Type',
+               'Amount Type', 'Amount', 'Status']
+
+        stmt = select(
+            Employee.employee_id, Employee.first_name, Employee.last_name,
+            Beneficiary.name.label('beneficiary_name'), Beneficiary.type.label('beneficiary_type'),
+            EmployeeRecurringDeduction.amount_type, EmployeeRecurringDeduction.value,
+        )\
+            .select_from(EmployeeRecurringDeduction)\
+            .join(Employee, Employee.id == EmployeeRecurringDeduction.employee_id)\
+            .outerjoin(Beneficiary, Beneficiary.id == EmployeeRecurringDeduction.beneficiary_id)\
+            .where(Employee.company_id == company_id)\
+            .where(EmployeeRecurringDeduction.is_active == True)\
+            .order_by(Employee.id, EmployeeRecurringDeduction.id)
+
+        for row in ReportExportService.stream(stmt):
+            amount_display = ''
+            if row.amount_type == 'fixed':
+                amount_display = f"R{row.value or 0:.2f}"
+            elif row.amount_type == 'percent':
+                amount_display = f"{row.value or 0}%"
+            else:
+                amount_display = 'Calculated'
+
+            yield [
+                row.employee_id,
+                f"{row.first_name} {row.last_name}",
+                row.beneficiary_name or 'N/A',
+                row.beneficiary_type or 'Other',
+                row.amount_type.title(),
+                amount_display,
+                'Active'
+            ]
+
+    @staticmethod
+    def employee_status_rows(company_id, period=None):
+        yield ['Employee ID', 'Employee Name', 'Status', 'UIF Contribution',
+               'Hire Date', 'Employment Type']
+
+        stmt = select(
+            Employee.employee_id, Employee.first_name, Employee.last_name, Employee.end_date,
+            Employee.uif_contributing, Employee.start_date, Employee.employment_type,
+        ).where(Employee.company_id == company_id).order_by(Employee.id)
+
+        for row in ReportExportService.stream(stmt):
+            yield [
+                row.employee_id,
+                f"{row.first_name} {row.last_name}",
+                'Active' if not row.end_date else 'Inactive',
+                'Contributing' if row.uif_contributing else 'Exempt',
+                row.start_date.strftime('%Y-%m-%d') if row.start_date else 'N/A',
+                row.employment_type or 'Full-time'
+            ]
+
+    @staticmethod
+    def beneficiary_rows(company_id, period=None):
+        yield ['Beneficiary Name', 'Type', 'Total Amount', 'Bank Name',
+               'Account Number', 'EFT Export Enabled']
+
+        for name, data in beneficiary_totals_for_period(company_id, period).items():
+            beneficiary = data['beneficiary']
+            yield [
+                name,
+                data['type'],
+                f"R{data['total']:.2f}",
+                beneficiary.bank_name or 'N/A',
+                beneficiary.account_number or 'N/A',
+                'Yes' if beneficiary.include_in_eft_export else 'No'
+            ]
+
+    @staticmethod
+    def eft_rows(company_id, period=None):
+        yield ['Employee Name', 'Bank Name', 'Account Number', 'Branch Code',
+               'Account Type', 'Amount', 'Reference', 'Email']
+
+        stmt = ReportExportService._eft_entries_select(
+            company_id, period,
+            Employee.employee_id, Employee.first_name, Employee.last_name, Employee.bank_name,
+            Employee.account_number, Employee.account_type, Employee.email,
+            PayrollEntry.net_pay, PayrollEntry.month_year, PayrollEntry.pay_period_start,
+        )
+
+        for row in ReportExportService.stream(stmt):
+            reference = f"SAL-{row.employee_id}-{row.month_year or row.pay_period_start.strftime('%Y%m')}"
+
+            yield [
+                f"{row.first_name} {row.last_name}",
+                row.bank_name,
+                row.account_number,
+                '',  # Branch codes are not captured per employee
+                row.account_type or 'Savings',
+                row.net_pay,
+                reference,
+                row.email or ''
+            ]
@@ -0,0 +1,152 @@
+"""
+Report Query - Lightweight projection rows for report pages
+
+Report pages only read a handful of payroll entry and employee fields, so
+these queries select just those columns and wrap each result in a small
+``__slots__`` object shaped like ``PayrollEntry`` (``row.employee.full_name``
+etc.) that templates can use unchanged, without ORM identity-map or
+lazy-load overhead.
+"""
+from sqlalchemy import func, select
+
+from app import db
+from app.models import Employee, PayrollEntry, PayrollPeriodSummary
+
+
+class EmployeeRef:
+    """Employee fields shown next to a payroll row"""
+
+    __slots__ = ('id', 'employee_id', 'first_name', 'last_name', 'bank_name', 'account_number')
+
+    def __init__(self, id, employee_id, first_name, last_name, bank_name, account_number):
+        self.id = id
+        self.employee_id = employee_id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.bank_name = bank_name
+        self.account_number = account_number
+
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}"
+
+
+class PayrollRow:
+    """Read-only payroll entry row for report tables and totals"""
+
+    __slots__ = (
+        'id', 'employee_id', 'month_year', 'pay_period_start', 'pay_period_end',
+        'gross_pay', 'paye', 'uif', 'sdl', 'deductions_other', 'union_fee', 'net_pay',
+        'is_verified', 'is_finalized', 'employee',
+    )
+
+    def __init__(self, row):
+        for field in PayrollRow.__slots__[:-1]:
+            setattr(self, field, getattr(row, field))
+        self.employee = EmployeeRef(
+            row.employee_id, row.employee_code, row.first_name, row.last_name,
+            row.bank_name, row.account_number,
+        )
+
+    def __repr__(self):
+        return f'<PayrollRow {self.id} {self.employee.employee_id} {self.month_year}>'
+
+
+class ReportQuery:
+    """Column-only queries returning lightweight report rows"""
+
+    PAYROLL_COLUMNS = (
+        PayrollEntry.id,
+        PayrollEntry.employee_id,
+        PayrollEntry.month_year,
+        PayrollEntry.pay_period_start,
+        PayrollEntry.pay_period_end,
+        func.coalesce(PayrollEntry.gross_pay, 0).label('gross_pay'),
+        PayrollEntry.paye,
+        PayrollEntry.uif,
+        PayrollEntry.sdl,
+        PayrollEntry.deductions_other,
+        PayrollEntry.union_fee,
+        PayrollEntry.net_pay,
+        PayrollEntry.is_verified,
+        PayrollEntry.is_finalized,
+        Employee.employee_id.label('employee_code'),
+        Employee.first_name,
+        Employee.last_name,
+        Employee.bank_name,
+        Employee.account_number,
+    )
+
+    @staticmethod
+    def payroll_rows(company_id, period=None, employee_id=None, verified_only=True,
+                     period_start=None, period_end=None, order_by_name=True, periods=None):
+        """Payroll rows for a company, optionally limited to a month, employee or date range"""
+        stmt = select(*ReportQuery.PAYROLL_COLUMNS)\
+            .select_from(PayrollEntry)\
+            .join(Employee, Employee.id == PayrollEntry.employee_id)\
+            .where(PayrollEntry.company_id == company_id)
+
+        if verified_only:
+            stmt = stmt.where(PayrollEntry.is_verified == True)
+        if period:
+            stmt = stmt.where(PayrollEntry.month_year == period)
+        if periods is not None:
+            stmt = stmt.where(PayrollEntry.month_year.in_(periods))
+        if employee_id:
+            stmt = stmt.where(PayrollEntry.employee_id == employee_id)
+        if period_start:
+            stmt = stmt.where(PayrollEntry.pay_period_start >= period_start)
+        if period_end:
+            stmt = stmt.where(PayrollEntry.pay_period_end <= period_end)
+
+        if order_by_name:
+            stmt = stmt.order_by(Employee.first_name, Employee.last_name, PayrollEntry.id)
+        else:
+            stmt = stmt.order_by(PayrollEntry.id)
+
+        return [PayrollRow(row) for row in db.session.execute(stmt)]
+
+    @staticmethod
+    def summary_columns():
+        """Monthly totals columns read from the period summary table"""
+        return (
+            PayrollPeriodSummary.headcount.label('employee_count'),
+            PayrollPeriodSummary.gross_pay,
+            PayrollPeriodSummary.paye,
+            PayrollPeriodSummary.uif,
+            PayrollPeriodSummary.sdl,
+            PayrollPeriodSummary.other_deductions,
+            PayrollPeriodSummary.net_pay,
+        )
+
+    @staticmethod
+    def period_totals(company_id, period):
+        """Totals for one ``YYYY-MM`` payroll month"""
+        stmt = select(*ReportQuery.summary_columns())\
+            .where(PayrollPeriodSummary.company_id == company_id)\
+            .where(PayrollPeriodSummary.month_year == period)
+        row = db.session.execute(stmt).first()
+        if row is None:
+            return {column.name: 0 for column in ReportQuery.summary_columns()}
+        return dict(row._mapping)
+
+    @staticmethod
+    def period_history(company_id, before, limit=12):
+        """Monthly totals and rows for the ``limit`` payroll months before ``before``
+
+        Summaries come from the period summary table; detail rows for every
+        month are fetched in one query and partitioned by ``month_year`` here,
+        so this runs the same on SQLite and PostgreSQL.
+        """
+        stmt = select(PayrollPeriodSummary.month_year.label('period'), *ReportQuery.summary_columns())\
+            .where(PayrollPeriodSummary.company_id == company_id)\
+            .where(PayrollPeriodSummary.month_year < before)\
+            .order_by(PayrollPeriodSummary.month_year.desc())\
+            .limit(limit)
+        summaries = db.session.execute(stmt).all()
+
+        entries = {summary.period: [] for summary in summaries}
+        if entries:
+            for row in ReportQuery.payroll_rows(company_id, verified_only=False, periods=list(entries)):
+                entries[row.month_year].append(row)
+        return summaries, entries
@@ -0,0 +1,116 @@
+"""Cached resolution of effective SARS configuration per company.
+
+Resolved configs live in a per-process dictionary (L1) and in Flask-Caching
+(L2), both stamped with the shared ``sars_config`` cache version stored in
+the database. Writers bump the version; every process rereads it at most
+``CACHE_VERSION_TTL`` seconds later and then discards its stale entries. L1
+entries also expire after that many seconds.
+"""
+
+import threading
+import time
+
+from flask import current_app
+
+from app import cache
+from app.models.cache_version import CacheVersion
+from app.models.sars_config import SARSConfig, GlobalSARSConfig
+
+VERSION_NAME = 'sars_config'
+GLOBAL_KEY = 'global'
+
+
+class SARSConfigResolver:
+    """Read-only resolver for effective SARS configuration"""
+
+    CACHE_TIMEOUT = 3600
+
+    _lock = threading.Lock()
+
+    @staticmethod
+    def current_version():
+        """Get the shared config version"""
+        return CacheVersion.current([VERSION_NAME])[VERSION_NAME]
+
+    @staticmethod
+    def bump_version():
+        """Invalidate every cached config in all processes"""
+        CacheVersion.bump([VERSION_NAME])
+        with SARSConfigResolver._lock:
+            SARSConfigResolver._local().clear()
+        return SARSConfigResolver.current_version()
+
+    @staticmethod
+    def resolve(company_id):
+        """Effective SARS config for one company without writing to the database"""
+        return SARSConfigResolver.resolve_many([company_id])[company_id]
+
+    @staticmethod
+    def resolve_global():
+        """Global SARS config in ``GlobalSARSConfig.to_dict`` form"""
+        version = SARSConfigResolver.current_version()
+        config = SARSConfigResolver._get_cached(GLOBAL_KEY, version)
+        if config is None:
+            config = GlobalSARSConfig.get_current().to_dict()
+            SARSConfigResolver._store(GLOBAL_KEY, version, config)
+        return dict(config)
+
+    @staticmethod
+    def resolve_many(company_ids):
+        """Effective SARS configs for several companies with at most one query for misses"""
+        version = SARSConfigResolver.current_version()
+        resolved = {}
+        missing = []
+        for company_id in dict.fromkeys(company_ids):
+            config = SARSConfigResolver._get_cached(company_id, version)
+            if config is None:
+                missing.append(company_id)
+            else:
+                resolved[company_id] = dict(config)
+
+        if missing:
+            global_config = GlobalSARSConfig.get_current()
+            overrides = {
+                config.company_id: config
+                for config in SARSConfig.query.filter(SARSConfig.company_id.in_(missing)).all()
+            }
+            for company_id in missing:
+                # Companies without an override row resolve against a transient default
+                company_config = overrides.get(company_id) or SARSConfig(company_id=company_id)
+                config = company_config.get_effective_config(global_config)
+                SARSConfigResolver._store(company_id, version, config)
+                resolved[company_id] = dict(config)
+
+        return resolved
+
+    @staticmethod
+    def _local():
+        """L1 entries of the current application: ``{key: (version, config, stored_at)}``"""
+        return current_app.extensions.setdefault('sars_config_l1', {})
+
+    @staticmethod
+    def _cache_key(key, version):
+        return f'sars_config:{version}:{key}'
+
+    @staticmethod
+    def _get_cached(key, version):
+        entry = SARSConfigResolver._local().get(key)
+        ttl = current_app.config.get('CACHE_VERSION_TTL', CacheVersion.DEFAULT_TTL)
+        if entry and entry[0] == version and time.monotonic() - entry[2] < ttl:
+            return entry[1]
+
+        config = cache.get(SARSConfigResolver._cache_key(key, version))
+        if config is not None:
+            with SARSConfigResolver._lock:
+                SARSConfigResolver._local()[key] = (version, config, time.monotonic())
+        return config
+
+    @staticmethod
+    def _store(key, version, config):
+        with SARSConfigResolver._lock:
+            SARSConfigResolver._local()[key] = (version, config, time.monotonic())
+        cache.set(
+            SARSConfigResolver._cache_key(key, version),
+            config,
+            timeout=SARSConfigResolver.CACHE_TIMEOUT,
+        )
@@ -1,4 +1,5 @@
 from app.models.sars_config import SARSConfig, GlobalSARSConfig
+from app.services.sars_config_resolver import SARSConfigResolver
 from app import db
 from decimal import Decimal
 
@@ -9,8 +10,12 @@ class SARSService:
     @staticmethod
     def get_company_sars_config(company_id):
         """Get effective SARS configuration for a company with global fallbacks"""
-        company_config = SARSConfig.get_for_company(company_id)
-        return company_config.get_effective_config()
+        return SARSConfigResolver.resolve(company_id)
+    
+    @staticmethod
+    def get_company_sars_configs(company_ids):
+        """Get effective SARS configuration for several companies in one query"""
+        return SARSConfigResolver.resolve_many(company_ids)
     
     @staticmethod
     def get_global_sars_config():
@@ -42,8 +47,19 @@ class SARSService:
                     setattr(config, field, None)
         
         db.session.commit()
+        SARSConfigResolver.bump_version()
         return config
     
+    @staticmethod
+    def as_rate(percent):
+        """Normalise a configured percentage to a decimal rate
+
+        Global defaults store 1% as ``1.000`` while the admin form stores
+        ``0.010``; anything of 1 or more is treated as a whole percentage.
+        """
+        value = Decimal(str(percent))
+        return value / 100 if value >= 1 else value
+    
     @staticmethod
     def calculate_uif_deduction(gross_salary, company_id=None):
         """Calculate UIF deduction using company or global configuration"""
@@ -56,7 +72,7 @@ class SARSService:
         eligible_salary = min(Decimal(str(gross_salary)), Decimal(str(config['uif_salary_cap'])))
         
         # Calculate UIF (convert percentage to decimal)
-        uif_rate = Decimal(str(config['uif_percent'])) / 100 if config['uif_percent'] > 1 else Decimal(str(config['uif_percent']))
+        uif_rate = SARSService.as_rate(config['uif_percent'])
         uif_amount = eligible_salary * uif_rate
         
         # Apply monthly cap
@@ -71,7 +87,7 @@ class SARSService:
             config = SARSService.get_global_sars_config().to_dict()
         
         # Calculate SDL (convert percentage to decimal)
-        sdl_rate = Decimal(str(config['sdl_percent'])) / 100 if config['sdl_percent'] > 1 else Decimal(str(config['sdl_percent']))
+        sdl_rate = SARSService.as_rate(config['sdl_percent'])
         return Decimal(str(gross_salary)) * sdl_rate
     
     @staticmethod
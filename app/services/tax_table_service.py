@@ -0,0 +1,131 @@
+"""Compiled PAYE tax tables shared by every PAYE calculation.
+
+Each process compiles a year's table once and stamps it with the shared
+``tax_tables`` cache version. Commits that change tax tables or brackets bump
+the version, so every process recompiles at most ``CACHE_VERSION_TTL`` seconds
+later.
+"""
+
+import logging
+import threading
+from bisect import bisect_right
+from decimal import Decimal
+
+from flask import has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.cache_version import CacheVersion
+from app.models.tax_table import TaxTable, TaxBracket
+
+logger = logging.getLogger(__name__)
+
+VERSION_NAME = 'tax_tables'
+SESSION_KEY = 'tax_tables_changed'
+
+
+class CompiledTaxTable:
+    """Tax brackets precompiled into parallel arrays for bisect lookups.
+
+    ``base_tax[i]`` holds the tax payable on income up to ``thresholds[i]`` so a
+    lookup is one binary search plus one multiplication.
+    """
+
+    __slots__ = ('tax_year', 'thresholds', 'base_tax', 'rates')
+
+    def __init__(self, tax_year, brackets):
+        thresholds = []
+        base_tax = []
+        rates = []
+        cumulative = Decimal('0')
+        for threshold, rate in sorted(brackets):
+            threshold = Decimal(str(threshold))
+            rate = Decimal(str(rate))
+            if thresholds:
+                cumulative += (threshold - thresholds[-1]) * rates[-1]
+            thresholds.append(threshold)
+            base_tax.append(cumulative)
+            rates.append(rate)
+
+        self.tax_year = tax_year
+        self.thresholds = tuple(thresholds)
+        self.base_tax = tuple(base_tax)
+        self.rates = tuple(rates)
+
+    def paye(self, taxable_income):
+        """Monthly PAYE before credits for the given taxable income"""
+        if not isinstance(taxable_income, Decimal):
+            taxable_income = Decimal(str(taxable_income))
+        index = bisect_right(self.thresholds, taxable_income) - 1
+        if index < 0:
+            return Decimal('0')
+        return self.base_tax[index] + (taxable_income - self.thresholds[index]) * self.rates[index]
+
+
+class TaxTableService:
+    """Single entry point for PAYE lookups with a per-process compiled cache"""
+
+    # ``{tax_year: (version, compiled)}``
+    _compiled = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_table(tax_year=None):
+        """Get the compiled table for a tax year (defaults to the global SARS tax year)"""
+        if tax_year is None:
+            from app.models.sars_config import GlobalSARSConfig
+            tax_year = GlobalSARSConfig.get_current().tax_year_display
+
+        version = CacheVersion.current([VERSION_NAME])[VERSION_NAME]
+        entry = TaxTableService._compiled.get(tax_year)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        # Plain columns, so brackets already loaded in this session cannot hide another process's edits
+        brackets = db.session.query(TaxBracket.threshold, TaxBracket.rate)\
+            .join(TaxTable, TaxBracket.tax_table_id == TaxTable.id)\
+            .filter(TaxTable.tax_year == tax_year, TaxTable.is_active == True)\
+            .all()
+        if not brackets:
+            # Not cached, so the year's table is picked up as soon as it is added
+            logger.warning("No tax table for %s; using default %s brackets", tax_year, TaxTable.DEFAULT_TAX_YEAR)
+            return CompiledTaxTable(tax_year, TaxTable.DEFAULT_BRACKETS)
+
+        compiled = CompiledTaxTable(tax_year, [tuple(bracket) for bracket in brackets])
+        with TaxTableService._lock:
+            TaxTableService._compiled[tax_year] = (version, compiled)
+        return compiled
+
+    @staticmethod
+    def calculate_paye(taxable_income, tax_year=None):
+        """Calculate monthly PAYE (before medical tax credits) for a tax year"""
+        return TaxTableService.get_table(tax_year).paye(taxable_income)
+
+    @staticmethod
+    def clear_cache():
+        """Drop compiled tables so the next lookup recompiles from the database"""
+        with TaxTableService._lock:
+            TaxTableService._compiled.clear()
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_tax_table_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (TaxTable, TaxBracket)):
+            session.info[SESSION_KEY] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_compiled_tables(session):
+    # Bumped only once the change is visible, so no process compiles the old brackets under the new version
+    if session.info.pop(SESSION_KEY, False) and has_app_context():
+        CacheVersion.bump([VERSION_NAME])
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_tax_table_changes(session, previous_transaction):
+    # Savepoint rollbacks keep the outer transaction's changes pending
+    if previous_transaction.parent is None:
+        session.info.pop(SESSION_KEY, None)
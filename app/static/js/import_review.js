@@ -1,58 +1,78 @@
 document.addEventListener('DOMContentLoaded', () => {
-  const rows = document.querySelectorAll('[data-index]');
+  const cards = document.querySelectorAll('.import-row');
   const importAllBtn = document.getElementById('importAllBtn');
+  const pendingCount = document.getElementById('pendingCount');
   const editModalEl = document.getElementById('importEditModal');
   const editForm = document.getElementById('importEditForm');
-  let currentIndex = null;
+  const csrfToken = editForm.querySelector('input[name="csrf_token"]').value;
+  const editFields = [
+    'first_name', 'last_name', 'id_number', 'cell_number', 'department', 'job_title', 'start_date',
+    'salary_type', 'monthly_salary', 'hourly_rate', 'bank_name', 'account_number', 'account_type',
+    'annual_leave_days'
+  ];
+  const badgeClasses = {confirmed: 'bg-success', skipped: 'bg-warning', pending: 'bg-secondary'};
 
-  function updateImportButton() {
-    const allReviewed = Array.from(rows).every(r => r.querySelector('input[name^="status_"]').value !== 'pending');
-    importAllBtn.disabled = !allReviewed;
+  function cardFor(rowId) {
+    return document.querySelector(`.import-row[data-row-id="${rowId}"]`);
   }
 
-  rows.forEach(card => {
-    const index = card.getAttribute('data-index');
-    card.querySelector('.confirm-row').addEventListener('click', () => {
-      card.querySelector('#status-' + index).textContent = '✅ Confirmed';
-      card.querySelector('#status-' + index).className = 'status-badge badge bg-success';
-      document.getElementById('input-status-' + index).value = 'confirmed';
-      updateImportButton();
-    });
-    card.querySelector('.skip-row').addEventListener('click', () => {
-      card.querySelector('#status-' + index).textContent = '❌ Skipped';
-      card.querySelector('#status-' + index).className = 'status-badge badge bg-warning';
-      document.getElementById('input-status-' + index).value = 'skipped';
-      updateImportButton();
-    });
-    card.querySelector('.delete-row').addEventListener('click', () => {
-      card.remove();
-      updateImportButton();
-    });
-    card.querySelector('.edit-row').addEventListener('click', () => {
-      currentIndex = index;
-      loadRowData(index);
-      const modal = new bootstrap.Modal(editModalEl);
-      modal.show();
+  // Save a row's status and/or edited values on the server and refresh its card
+  function updateRow(card, values) {
+    const body = new FormData();
+    body.append('csrf_token', csrfToken);
+    Object.entries(values).forEach(([key, value]) => body.append(key, value));
+    return fetch(card.dataset.updateUrl, {method: 'POST', body})
+      .then(response => response.json())
+      .then(result => {
+        if (!result.success) {
+          alert(result.message || 'Unable to update row');
+          return;
+        }
+        renderRow(card, result.row);
+        const pending = result.counts.pending || 0;
+        pendingCount.textContent = pending;
+        if (importAllBtn) importAllBtn.disabled = pending > 0;
+      });
+  }
+
+  function renderRow(card, row) {
+    card.dataset.row = JSON.stringify(row.data);
+    const badge = card.querySelector('.status-badge');
+    badge.textContent = row.status.charAt(0).toUpperCase() + row.status.slice(1);
+    badge.className = 'status-badge badge ' + (badgeClasses[row.status] || 'bg-secondary');
+
+    let errors = card.querySelector('.row-errors');
+    if (!errors) {
+      errors = document.createElement('ul');
+      errors.className = 'text-danger small mb-2 row-errors';
+      card.querySelector('.card-body').prepend(errors);
+    }
+    errors.replaceChildren(...row.errors.map(message => {
+      const item = document.createElement('li');
+      item.textContent = message;
+      return item;
+    }));
+  }
+
+  cards.forEach(card => {
+    card.querySelectorAll('.set-status').forEach(button => {
+      button.addEventListener('click', () => updateRow(card, {status: button.dataset.status}));
     });
+    const editButton = card.querySelector('.edit-row');
+    if (editButton) {
+      editButton.addEventListener('click', () => {
+        loadRowData(card);
+        bootstrap.Modal.getOrCreateInstance(editModalEl).show();
+      });
+    }
   });
 
-  function loadRowData(index) {
-    document.getElementById('editRowIndex').value = index;
-    const getVal = f => document.getElementById(`row-${index}-${f}`).value;
-    document.getElementById('edit_first_name').value = getVal('first_name');
-    document.getElementById('edit_last_name').value = getVal('last_name');
-    document.getElementById('edit_id_number').value = getVal('id_number');
-    document.getElementById('edit_cell_number').value = getVal('cell_number');
-    document.getElementById('edit_department').value = getVal('department');
-    document.getElementById('edit_job_title').value = getVal('job_title');
-    document.getElementById('edit_start_date').value = getVal('start_date');
-    document.getElementById('edit_salary_type').value = getVal('salary_type');
-    document.getElementById('edit_monthly_salary').value = getVal('monthly_salary');
-    document.getElementById('edit_hourly_rate').value = getVal('hourly_rate');
-    document.getElementById('edit_bank_name').value = getVal('bank_name');
-    document.getElementById('edit_account_number').value = getVal('account_number');
-    document.getElementById('edit_account_type').value = getVal('account_type');
-    document.getElementById('edit_annual_leave_days').value = getVal('annual_leave_days');
+  function loadRowData(card) {
+    const data = JSON.parse(card.dataset.row);
+    document.getElementById('editRowIndex').value = card.dataset.rowId;
+    editFields.forEach(field => {
+      document.getElementById('edit_' + field).value = data[field] || '';
+    });
     toggleSalaryFields();
   }
 
@@ -66,23 +86,11 @@ document.addEventListener('DOMContentLoaded', () => {
 
   editForm.addEventListener('submit', e => {
     e.preventDefault();
-    const idx = document.getElementById('editRowIndex').value;
-    const setVal = (f, val) => document.getElementById(`row-${idx}-${f}`).value = val;
-    setVal('first_name', document.getElementById('edit_first_name').value);
-    setVal('last_name', document.getElementById('edit_last_name').value);
-    setVal('id_number', document.getElementById('edit_id_number').value);
-    setVal('cell_number', document.getElementById('edit_cell_number').value);
-    setVal('department', document.getElementById('edit_department').value);
-    setVal('job_title', document.getElementById('edit_job_title').value);
-    setVal('start_date', document.getElementById('edit_start_date').value);
-    setVal('salary_type', document.getElementById('edit_salary_type').value);
-    setVal('monthly_salary', document.getElementById('edit_monthly_salary').value);
-    setVal('hourly_rate', document.getElementById('edit_hourly_rate').value);
-    setVal('bank_name', document.getElementById('edit_bank_name').value);
-    setVal('account_number', document.getElementById('edit_account_number').value);
-    setVal('account_type', document.getElementById('edit_account_type').value);
-    setVal('annual_leave_days', document.getElementById('edit_annual_leave_days').value);
-    const modal = bootstrap.Modal.getInstance(editModalEl);
-    modal.hide();
+    const card = cardFor(document.getElementById('editRowIndex').value);
+    const values = {};
+    editFields.forEach(field => {
+      values[field] = document.getElementById('edit_' + field).value;
+    });
+    updateRow(card, values).then(() => bootstrap.Modal.getInstance(editModalEl).hide());
   });
 });
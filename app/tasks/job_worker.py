@@ -0,0 +1,59 @@
+import logging
+import threading
+import time
+
+from app.services.job_service import JobService
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """Local worker that runs queued jobs on a pool of threads"""
+
+    def __init__(self, app, concurrency=2, poll_interval=2.0):
+        self.app = app
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.name = JobService.worker_name()
+        self.running = False
+        self.threads = []
+
+    def start(self):
+        """Start the worker threads"""
+        if self.running:
+            logger.warning("Job worker is already running")
+            return
+
+        with self.app.app_context():
+            requeued = JobService.requeue_stale()
+            if requeued:
+                logger.info("Requeued %s stale jobs", requeued)
+
+        self.running = True
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._run_loop, args=(f'{self.name}/{index}',), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        logger.info("Job worker %s started with %s threads", self.name, self.concurrency)
+
+    def stop(self):
+        """Stop claiming new jobs and wait for running ones to finish"""
+        self.running = False
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        logger.info("Job worker %s stopped", self.name)
+
+    def _run_loop(self, worker_id):
+        """Claim and run jobs until stopped"""
+        while self.running:
+            try:
+                with self.app.app_context():
+                    job = JobService.claim_next(worker_id)
+                    if job is not None:
+                        logger.info("Worker %s running job %s (%s)", worker_id, job.id, job.job_type)
+                        JobService.run(job)
+                        continue
+            except Exception as e:
+                logger.error(f"Error in job worker loop: {str(e)}")
+            time.sleep(self.poll_interval)
@@ -0,0 +1,106 @@
+"""Background job handlers run by `flask run-jobs`"""
+import time
+from datetime import datetime
+
+from app.services.job_service import JobService
+
+# Payslip ZIP progress is recorded every this many payslips or seconds, whichever comes first
+PAYSLIP_PROGRESS_EVERY = 25
+PAYSLIP_PROGRESS_SECONDS = 2.0
+
+
+@JobService.handler('payroll.process')
+def process_payroll(ctx):
+    """Run the payroll batch for one company and period"""
+    from app.services.payroll_batch_service import PayrollBatchCalculator
+
+    params = ctx.params
+    period_start = datetime.strptime(params['period_start'], '%Y-%m-%d').date()
+    period_end = datetime.strptime(params['period_end'], '%Y-%m-%d').date()
+
+    ctx.progress(5, 'Calculating payroll')
+    return PayrollBatchCalculator(params['company_id'], period_start, period_end).run()
+
+
+@JobService.handler('payroll.portfolio')
+def process_portfolio_payroll(ctx):
+    """Run one payroll period for many companies on a pool of worker processes"""
+    from app.services.portfolio_payroll_service import PortfolioPayrollRun
+
+    params = ctx.params
+    period_start = datetime.strptime(params['period_start'], '%Y-%m-%d').date()
+    period_end = datetime.strptime(params['period_end'], '%Y-%m-%d').date()
+
+    def progress(done, total, result):
+        if result['status'] == 'succeeded':
+            message = f"{result['company_name']}: {result['created']} entries created"
+        else:
+            message = f"{result['company_name']}: failed ({result['error']})"
+        ctx.progress(done * 100 // total, f'{done} of {total} companies processed. {message}')
+
+    ctx.progress(1, f"Processing {len(params['company_ids'])} companies")
+    return PortfolioPayrollRun(params['company_ids'], period_start, period_end).run(progress)
+
+
+@JobService.handler('payroll.payslips')
+def build_payslip_zip(ctx):
+    """Render finalized payslips into a ZIP file"""
+    from app.services.payslip_render_service import PayslipRenderService
+
+    params = ctx.params
+    entries = PayslipRenderService.load_entries(params['entry_ids'], params['company_id'])
+    total = len(entries) or 1
+
+    rendered = 0
+    reported_at = time.monotonic()
+
+    def tracked(pdfs):
+        nonlocal rendered, reported_at
+        for filename, pdf in pdfs:
+            yield filename, pdf
+            rendered += 1
+            # Each progress update commits, so report in batches rather than per payslip
+            if rendered % PAYSLIP_PROGRESS_EVERY == 0 or time.monotonic() - reported_at >= PAYSLIP_PROGRESS_SECONDS:
+                ctx.progress(rendered * 100 // total, f'Rendered {rendered} of {len(entries)} payslips')
+                reported_at = time.monotonic()
+
+    path = ctx.result_file('payslips.zip', 'application/zip')
+    with open(path, 'wb') as output:
+        for chunk in PayslipRenderService.stream_zip(tracked(PayslipRenderService.iter_entry_pdfs(entries))):
+            output.write(chunk)
+    return {'payslips': rendered}
+
+
+@JobService.handler('payroll.store_payslips')
+def store_finalized_payslips(ctx):
+    """Render newly finalized payslips into the PDF store ahead of their first download"""
+    from app.services.payslip_render_service import PayslipRenderService
+
+    params = ctx.params
+    entries = PayslipRenderService.load_entries(params['entry_ids'], params['company_id'])
+    ctx.progress(5, f'Rendering {len(entries)} payslips')
+    return {'payslips': PayslipRenderService.store_finalized(entries)}
+
+
+@JobService.handler('reports.export')
+def export_report(ctx):
+    """Write a CSV report export to a file"""
+    from app.services.report_export_service import ReportExportService
+
+    params = ctx.params
+    report = params['report']
+    period = params.get('period')
+
+    ctx.progress(5, f'Exporting {report} report')
+    path = ctx.result_file(ReportExportService.filename(report, period), 'text/csv')
+    with open(path, 'w', newline='', encoding='utf-8') as output:
+        rows = ReportExportService.write_csv(report, params['company_id'], period, output)
+    return {'report': report, 'rows': rows}
+
+
+@JobService.handler('notifications.scan')
+def scan_notifications(ctx):
+    """Scan compliance reminders and dispatch notifications"""
+    from app.services.notification_service import NotificationService
+
+    return {'notifications_sent': NotificationService.scan_and_dispatch_reminders()}
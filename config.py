@@ -23,6 +23,26 @@ class Config:
     SESSION_COOKIE_SAMESITE = 'Lax'
     PERMANENT_SESSION_LIFETIME = 86400  # 24 hours
     
+    # Payslip PDF rendering worker processes (0 renders in the request process)
+    PAYSLIP_RENDER_WORKERS = int(os.environ.get('PAYSLIP_RENDER_WORKERS', min(4, os.cpu_count() or 1)))
+    
+    # Finalized payslip PDF store (defaults to instance/payslips)
+    PAYSLIP_STORE_DIR = os.environ.get('PAYSLIP_STORE_DIR')
+    PAYSLIP_STORE_MAX_BYTES = int(os.environ.get('PAYSLIP_STORE_MAX_BYTES', 512 * 1024 * 1024))
+    
+    # Portfolio payroll run worker processes, one company each (0 runs in the calling process)
+    PORTFOLIO_PAYROLL_WORKERS = int(os.environ.get('PORTFOLIO_PAYROLL_WORKERS', os.cpu_count() or 1))
+    
+    # Employee search backend: auto, fts5 (SQLite), trigram (PostgreSQL pg_trgm) or ilike
+    EMPLOYEE_SEARCH_BACKEND = os.environ.get('EMPLOYEE_SEARCH_BACKEND', 'auto')
+    
+    # Employee typeahead: companies indexed in memory per process, and seconds before an index is rebuilt
+    EMPLOYEE_TYPEAHEAD_COMPANIES = int(os.environ.get('EMPLOYEE_TYPEAHEAD_COMPANIES', 64))
+    EMPLOYEE_TYPEAHEAD_TTL = int(os.environ.get('EMPLOYEE_TYPEAHEAD_TTL', 300))
+    
+    # Seconds a process trusts the shared cache versions it read before checking the database again
+    CACHE_VERSION_TTL = int(os.environ.get('CACHE_VERSION_TTL', 5))
+    
     # Application settings
     DEBUG = False
     TESTING = False
@@ -58,6 +78,8 @@ class TestingConfig(Config):
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    PAYSLIP_RENDER_WORKERS = 0
+    PORTFOLIO_PAYROLL_WORKERS = 0
 
 # Configuration dictionary
 config = {
@@ -93,3 +93,35 @@ def test_delete_beneficiary_in_use(client, app):
 
     with app.app_context():
         assert Beneficiary.query.get(beneficiary.id) is not None
+
+
+def test_delete_beneficiary_used_in_past_payroll(client, app):
+    from app.models import PayrollEntry, PayrollEntryDeduction
+
+    with app.app_context():
+        user, company = create_user_and_company()
+        beneficiary = Beneficiary(company_id=company.id, type='Other', name='Old Fund')
+        db.session.add(beneficiary)
+        db.session.commit()
+        employee = create_employee(company.id)
+        entry = PayrollEntry(employee_id=employee.id, company_id=company.id, pay_period_start=date(2025, 6, 1),
+                             pay_period_end=date(2025, 6, 30), month_year='2025-06', hourly_rate=Decimal('0'))
+        db.session.add(entry)
+        db.session.commit()
+        # The recurring deduction has since been removed; only the payroll snapshot remains
+        db.session.add(PayrollEntryDeduction(payroll_entry_id=entry.id, beneficiary_id=beneficiary.id,
+                                             amount_type='Fixed', value=Decimal('50.00'), amount=Decimal('50.00')))
+        db.session.commit()
+        user_id, company_id, beneficiary_id = user.id, company.id, beneficiary.id
+
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+        sess['selected_company_id'] = company_id
+
+    response = client.post(f'/company/{company_id}/beneficiaries/{beneficiary_id}/delete', follow_redirects=True)
+    assert response.status_code == 200
+    assert b'past payroll deduction' in response.data
+
+    with app.app_context():
+        assert db.session.get(Beneficiary, beneficiary_id) is not None
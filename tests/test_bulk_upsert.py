@@ -0,0 +1,71 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import PayrollEntry, PayrollEntryDeduction, PayrollPeriodSummary
+from app.services.bulk_upsert import bulk_upsert
+from app.services.payroll_batch_service import PayrollBatchCalculator
+from tests.test_payroll_batch import setup_company
+
+
+def entry_row(employee, hourly_rate='50.00'):
+    return {
+        'employee_id': employee.id,
+        'company_id': employee.company_id,
+        'pay_period_start': date(2025, 6, 1),
+        'pay_period_end': date(2025, 6, 30),
+        'month_year': '2025-06',
+        'hourly_rate': Decimal(hourly_rate),
+    }
+
+
+def test_duplicate_period_entry_is_rejected(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        for _ in range(2):
+            db.session.add(PayrollEntry(**entry_row(hourly)))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+
+def test_bulk_upsert_skips_or_updates_conflicts(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        returning = (PayrollEntry.employee_id,)
+
+        inserted = bulk_upsert(PayrollEntry, [entry_row(hourly)], PayrollEntry.PERIOD_KEY, returning=returning)
+        assert [row.employee_id for row in inserted] == [hourly.id]
+
+        inserted = bulk_upsert(PayrollEntry, [entry_row(hourly, '60.00'), entry_row(monthly)],
+                               PayrollEntry.PERIOD_KEY, returning=returning)
+        assert [row.employee_id for row in inserted] == [monthly.id]
+        assert PayrollEntry.query.filter_by(employee_id=hourly.id).one().hourly_rate == Decimal('50.00')
+
+        bulk_upsert(PayrollEntry, [entry_row(hourly, '60.00')], PayrollEntry.PERIOD_KEY,
+                    update_columns=('hourly_rate',))
+        db.session.commit()
+        assert PayrollEntry.query.filter_by(employee_id=hourly.id).one().hourly_rate == Decimal('60.00')
+        assert PayrollEntry.query.count() == 2
+
+
+def test_overlapping_batch_runs_create_each_entry_once(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        late = PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30))
+        # The late run loads its inputs before the first run commits its entries
+        loaded = late._load()
+        first = PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+        late._load = lambda: loaded
+
+        summary = late.run()
+
+        assert first['created'] == 2
+        assert summary['created'] == 0
+        assert summary['skipped'] == 2
+        assert PayrollEntry.query.count() == 2
+        assert PayrollEntryDeduction.query.count() == 1
+        assert PayrollPeriodSummary.for_company(company.id, '2025-06').headcount == 2
@@ -0,0 +1,51 @@
+from datetime import date
+
+from app import db
+from app.models import Company, Employee, EmployeeIdSequence
+from app.services.employee_id_service import (
+    allocate_employee_ids,
+    generate_employee_id,
+    preview_employee_id,
+)
+
+
+def add_employee(company, employee_id):
+    db.session.add(Employee(company_id=company.id, employee_id=employee_id, first_name='Old', last_name='Hand',
+                            cell_number='+27821234567', department='IT', job_title='Clerk',
+                            start_date=date(2020, 1, 1), salary=1, bank_name='FNB', account_number='1'))
+
+
+def test_sequence_continues_existing_ids_and_reserves_blocks(app):
+    with app.app_context():
+        company = Company(name='Sequence Works')
+        db.session.add(company)
+        db.session.flush()
+        add_employee(company, 'SQNCW-EMP004')
+        db.session.commit()
+
+        assert preview_employee_id(company.id) == 'SQNCW-EMP005'
+        assert EmployeeIdSequence.query.count() == 0
+
+        assert generate_employee_id(company.id) == 'SQNCW-EMP005'
+        assert allocate_employee_ids(company, 3) == ['SQNCW-EMP006', 'SQNCW-EMP007', 'SQNCW-EMP008']
+        db.session.commit()
+        assert preview_employee_id(company.id) == 'SQNCW-EMP009'
+
+        # A rolled back reservation is handed out again
+        assert generate_employee_id(company.id) == 'SQNCW-EMP009'
+        db.session.rollback()
+        assert generate_employee_id(company.id) == 'SQNCW-EMP009'
+
+
+def test_companies_never_share_a_sequence_prefix(app):
+    with app.app_context():
+        first, second = Company(name='Twin Traders'), Company(name='Twin Traders')
+        db.session.add_all([first, second])
+        db.session.commit()
+
+        first_id = generate_employee_id(first.id)
+        second_id = generate_employee_id(second.id)
+        db.session.commit()
+
+        assert first_id.split('-')[0] != second_id.split('-')[0]
+        assert second_id.endswith('-EMP001')
@@ -0,0 +1,267 @@
+from datetime import date
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import event
+
+from app import db
+from app.models import Company, Employee, ImportBatch, ImportRow, User
+from app.services.employee_id_service import allocate_employee_ids
+from app.services.employee_service import EmployeeService
+from app.services.employee_import_service import (
+    commit_import_batch,
+    generate_import_sheet,
+    validate_import_frame,
+    validate_import_rows,
+)
+
+
+def edge_case_sheet():
+    rows = [
+        {'Cell Number': '0821234567', 'South African ID Number': '8001015009087', 'Gender': ''},
+        {'Cell Number': "'+27821234567", 'South African ID Number': '8001014009087', 'Date of Birth': '1980-01-02'},
+        {'Cell Number': ' 0821234567 ', 'South African ID Number': '8013015009087'},
+        {'Cell Number': '0521234567', 'South African ID Number': '8001325009087'},
+        {'Cell Number': np.nan, 'South African ID Number': '8002305009087'},
+        {'Cell Number': '0821234567', 'South African ID Number': '800101500908'},
+        {'Cell Number': '0821234567', 'South African ID Number': "'8001015009087"},
+        {'Cell Number': '0821234567', 'South African ID Number': '0502295009087'},
+        {'Cell Number': '0821234567', 'South African ID Number': '80010150090８7'},
+        {'Cell Number': '0821234567', 'Date of Birth': '1/2/1980', 'Start Date': '2020-1-5'},
+        {'Cell Number': '0821234567', 'Date of Birth': '31/02/1980', 'Start Date': '2020/02/30'},
+        {'Cell Number': '0821234567', 'Date of Birth': '5 March 1980', 'Start Date': 'soon'},
+        {'Cell Number': '0821234567', 'Date of Birth': '0001-01-01', 'Start Date': '13-13-2020'},
+        {'Cell Number': '0821234567', 'Gender': ' MALE', 'Marital Status': 'WIDOWED', 'Bank Name': 'Standard Bank SA'},
+        {'Cell Number': '0821234567', 'Gender': "'", 'Marital Status': 'it is complicated', 'Bank Name': 'Investec'},
+    ]
+    return pd.DataFrame(rows, dtype=str)
+
+
+def test_frame_validation_matches_row_wise_on_edge_cases():
+    df = edge_case_sheet()
+
+    rows = validate_import_frame(df)
+
+    assert rows == validate_import_rows(df)
+    assert rows[0]['data']['gender'] == 'Male'
+    assert rows[0]['data']['date_of_birth'] == date(1980, 1, 1)
+    assert rows[1]['data']['cell_number'] == '+27821234567'
+    assert rows[4]['errors'] == ['Cell number is required']
+    assert rows[3]['errors'] == [
+        'Cell number: Please enter a valid South African mobile number (0791234567 or +27791234567).',
+        'Invalid day in ID number',
+    ]
+    assert rows[10]['errors'] == ['Invalid date of birth', 'Invalid start date']
+
+
+def test_frame_validation_matches_row_wise_on_generated_sheet():
+    df = generate_import_sheet(2000, seed=7).astype(str)
+    df.loc[df.sample(frac=0.05, random_state=1).index, 'Department'] = np.nan
+
+    assert validate_import_frame(df) == validate_import_rows(df)
+
+
+def test_frame_validation_handles_missing_columns_and_empty_sheets():
+    df = pd.DataFrame({'First Name': ['Ayanda'], 'Cell Number': ['0721234567']}, dtype=str)
+    assert validate_import_frame(df) == validate_import_rows(df)
+    assert validate_import_frame(df.iloc[0:0]) == []
+
+
+def login_with_company(app, client):
+    with app.app_context():
+        company = Company(name='ImportCo')
+        user = User(email='importer@example.com', is_accountant=True)
+        user.password_hash = 'unused'
+        user.companies.append(company)
+        db.session.add(user)
+        db.session.commit()
+        user_id, company_id = user.id, company.id
+    with client.session_transaction() as flask_session:
+        flask_session['_user_id'] = str(user_id)
+        flask_session['_fresh'] = True
+        flask_session['selected_company_id'] = company_id
+    return company_id
+
+
+def to_xlsx(df):
+    buffer = BytesIO()
+    df.to_excel(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+def upload(client, df):
+    return client.post('/employees/import', data={'file': (to_xlsx(df), 'staff.xlsx')},
+                       content_type='multipart/form-data')
+
+
+def test_upload_stages_rows_outside_the_session(app, client):
+    company_id = login_with_company(app, client)
+    df = generate_import_sheet(120, seed=3)
+
+    response = upload(client, df)
+
+    with app.app_context():
+        batch = ImportBatch.query.one()
+        assert response.headers['Location'].endswith(f'/employees/import/{batch.id}/review')
+        assert batch.company_id == company_id
+        assert batch.row_count == 120
+        staged = [row.errors for row in batch.rows.order_by('row_number')]
+        expected = validate_import_rows(pd.read_excel(to_xlsx(df), dtype=str))
+        assert staged == [row['errors'] for row in expected]
+    with client.session_transaction() as flask_session:
+        assert 'import_rows' not in flask_session
+
+    page = client.get(f'/employees/import/{batch.id}/review?filter=errors')
+    assert page.status_code == 200
+    assert page.data.count(b'class="card mb-3 import-row"') == min(50, sum(1 for e in staged if e))
+
+
+def test_reviewed_rows_are_imported_by_batch_id(app, client):
+    login_with_company(app, client)
+    df = pd.DataFrame([
+        {'First Name': 'Thabo', 'Last Name': 'Nkosi', 'Cell Number': '0821234567', 'Start Date': '2024-03-01',
+         'South African ID Number': '8001015009087', 'Monthly Salary': '20000'},
+        {'First Name': 'Lerato', 'Last Name': 'Dlamini', 'Cell Number': '12345', 'Start Date': '2024-03-01'},
+        {'First Name': 'Pieter', 'Last Name': 'Botha', 'Cell Number': '0731234567', 'Start Date': '2024-03-01'},
+    ])
+    upload(client, df)
+    with app.app_context():
+        batch = ImportBatch.query.one()
+        rows = {row.data['first_name']: row for row in batch.rows}
+        assert [row.row_number for row in batch.filtered_rows()] == [2, 1, 3]
+        batch_id = batch.id
+        thabo, lerato, pieter = rows['Thabo'].id, rows['Lerato'].id, rows['Pieter'].id
+
+    url = f'/employees/import/{batch_id}'
+    fixed = client.post(f'{url}/rows/{lerato}', data={'cell_number': '0721234567', 'status': 'confirmed'}).get_json()
+    assert fixed['row']['errors'] == []
+    assert fixed['row']['data']['cell_number'] == '+27721234567'
+    assert fixed['counts']['pending'] == 2
+    client.post(f'{url}/rows/{pieter}', data={'status': 'skipped'})
+    assert client.post(f'{url}/rows/{thabo}', data={'status': 'imported'}).status_code == 400
+    client.post(f'{url}/status', data={'status': 'confirmed', 'filter': 'pending'})
+
+    response = client.post(f'{url}/confirm')
+
+    assert response.status_code == 302
+    with app.app_context():
+        assert sorted(e.first_name for e in Employee.query.all()) == ['Lerato', 'Thabo']
+        batch = db.session.get(ImportBatch, batch_id)
+        assert batch.status == ImportBatch.STATUS_IMPORTED
+        assert batch.counts()[ImportRow.STATUS_IMPORTED] == 2
+        assert db.session.get(ImportRow, thabo).employee_id is not None
+    assert client.post(f'{url}/rows/{pieter}', data={'status': 'confirmed'}).status_code == 409
+
+
+def staff_row(number, **overrides):
+    data = {'first_name': f'Staff{number}', 'last_name': 'Member', 'cell_number': '+27821234567',
+            'id_number': f'80010150{number:05d}', 'tax_number': f'9{number:09d}', 'department': 'IT',
+            'job_title': 'Clerk', 'start_date': '2024-03-01', 'salary_type': 'monthly', 'monthly_salary': '20000',
+            'bank_name': 'FNB', 'account_number': '62000000'}
+    data.update(overrides)
+    return {'data': data, 'errors': []}
+
+
+def stage_confirmed(company_id, rows):
+    batch = ImportBatch.stage(company_id, rows)
+    db.session.flush()
+    batch.rows.update({'status': ImportRow.STATUS_CONFIRMED}, synchronize_session=False)
+    return batch
+
+
+def test_commit_import_batch_reports_failures_per_row(app):
+    with app.app_context():
+        company = Company(name='Bulk Imports')
+        db.session.add(company)
+        db.session.flush()
+        existing = Employee(company_id=company.id, employee_id='BLKMP-EMP007', first_name='Old', last_name='Hand',
+                            id_number='8001015000001', tax_number='9000000002', cell_number='+27821234567',
+                            department='IT', job_title='Clerk', start_date=date(2020, 1, 1), salary=1,
+                            bank_name='FNB', account_number='1')
+        db.session.add(existing)
+        batch = stage_confirmed(company.id, [
+            staff_row(1, id_number='8001015000001'),
+            staff_row(2),
+            staff_row(3, tax_number='9000000004'),
+            staff_row(4),
+            staff_row(5, start_date=''),
+            staff_row(6, first_name='X' * 51),
+            staff_row(7),
+        ])
+
+        summary = commit_import_batch(batch, chunk_size=2)
+        db.session.commit()
+
+        assert summary['imported'] == 2
+        assert summary['skipped'] == 0
+        assert [number for number, _ in summary['failures']] == [1, 2, 4, 5, 6]
+        messages = dict(summary['failures'])
+        assert 'ID number 8001015000001 already exists' in messages[1]
+        assert 'tax number 9000000002 already exists' in messages[2]
+        assert messages[4] == 'Duplicate tax number 9000000004 (row 3)'
+        assert messages[5] == 'Start date is required'
+        assert 'longer than 50' in messages[6]
+
+        imported = Employee.query.filter(Employee.id != existing.id).order_by(Employee.id).all()
+        assert [e.first_name for e in imported] == ['Staff3', 'Staff7']
+        assert [e.employee_id.split('-EMP')[1] for e in imported] == ['008', '009']
+        statuses = {row.row_number: (row.status, row.employee_id) for row in batch.rows}
+        assert statuses[3] == (ImportRow.STATUS_IMPORTED, imported[0].id)
+        assert statuses[4][0] == ImportRow.STATUS_FAILED
+        assert batch.status == ImportBatch.STATUS_IMPORTED
+        assert EmployeeService.search_employees('staff7', company_id=company.id) == [imported[1]]
+
+
+def test_commit_import_batch_retries_a_rejected_chunk_row_by_row(app, monkeypatch):
+    from app.services import employee_import_service
+    monkeypatch.setattr(employee_import_service, '_existing_values', lambda *args, **kwargs: set())
+
+    with app.app_context():
+        company = Company(name='Bulk Imports')
+        db.session.add(company)
+        db.session.flush()
+        batch = stage_confirmed(company.id, [staff_row(1), staff_row(2)])
+        db.session.add(Employee(company_id=company.id, employee_id='OTHER-1', first_name='Old', last_name='Hand',
+                                tax_number=staff_row(2)['data']['tax_number'], cell_number='+27821234567',
+                                department='IT', job_title='Clerk', start_date=date(2020, 1, 1), salary=1,
+                                bank_name='FNB', account_number='1'))
+
+        summary = commit_import_batch(batch)
+        db.session.commit()
+
+        assert summary['imported'] == 1
+        assert [number for number, _ in summary['failures']] == [2]
+        assert 'UNIQUE' in summary['failures'][0][1]
+        assert Employee.query.filter_by(first_name='Staff1').count() == 1
+
+
+def test_commit_import_batch_query_count_does_not_grow_with_rows(app):
+    queries = []
+
+    def record(*args, **kwargs):
+        queries.append(args[2])
+
+    with app.app_context():
+        company = Company(name='Bulk Imports')
+        db.session.add(company)
+        db.session.flush()
+        allocate_employee_ids(company, 1)  # seed the ID sequence
+        db.session.commit()
+        counts = []
+        for first, size in ((0, 5), (100, 300)):
+            batch = stage_confirmed(company.id, [staff_row(first + n) for n in range(size)])
+            db.session.commit()
+            queries.clear()
+            event.listen(db.engine, 'before_cursor_execute', record)
+            try:
+                summary = commit_import_batch(batch)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', record)
+            db.session.commit()
+            assert summary['imported'] == size
+            counts.append(len(queries))
+
+        assert counts[0] == counts[1]
+        assert Employee.query.count() == 305
@@ -0,0 +1,143 @@
+from datetime import date
+
+from sqlalchemy import event, insert, update
+
+from app import db
+from app.models import CacheVersion, Company, Employee, User
+from app.services.employee_service import EmployeeService
+
+
+def add_employee(company, number, last_name, first_name='Sam', department='IT'):
+    employee = Employee(company_id=company.id, employee_id=f'LIST-EMP{number:03d}', first_name=first_name,
+                        last_name=last_name, cell_number='+27821234567', department=department, job_title='Clerk',
+                        start_date=date(2020, 1, 1), salary=1, bank_name='FNB', account_number='1')
+    db.session.add(employee)
+    return employee
+
+
+def setup_staff(count=25):
+    company, other = Company(name='List Co'), Company(name='Other Co')
+    db.session.add_all([company, other])
+    db.session.flush()
+    for n in range(count):
+        # Repeated names exercise the id tie-breaker
+        add_employee(company, n, f'Surname{n % 7}', department='IT' if n % 2 else 'Finance')
+    add_employee(other, 99, 'Surname0')
+    db.session.commit()
+    return company
+
+
+class StatementRecorder:
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+
+def test_keyset_pages_walk_the_list_in_both_directions(app):
+    with app.app_context():
+        company = setup_staff()
+        expected = [e.id for e in Employee.query.filter_by(company_id=company.id)
+                    .order_by(Employee.last_name, Employee.first_name, Employee.id)]
+
+        pages, cursor = [], None
+        while True:
+            page = EmployeeService.get_employees_keyset(cursor=cursor, per_page=10, company_id=company.id)
+            pages.append([e.id for e in page['employees']])
+            assert page['pagination']['total'] == 25
+            if not page['pagination']['has_next']:
+                break
+            cursor = page['pagination']['next_cursor']
+        assert [len(ids) for ids in pages] == [10, 10, 5]
+        assert sum(pages, []) == expected
+        assert not EmployeeService.get_employees_keyset(per_page=10, company_id=company.id)['pagination']['has_prev']
+
+        back = EmployeeService.get_employees_keyset(cursor=page['pagination']['prev_cursor'], per_page=10,
+                                                    company_id=company.id)
+        assert [e.id for e in back['employees']] == pages[1]
+        assert back['pagination']['has_prev'] and back['pagination']['has_next']
+
+        first = EmployeeService.get_employees_keyset(cursor='not-a-cursor', per_page=10, company_id=company.id)
+        assert [e.id for e in first['employees']] == pages[0]
+
+
+def test_list_totals_are_cached_until_employees_change(app):
+    with app.app_context():
+        company = setup_staff()
+
+        assert EmployeeService.count_employees(company_id=company.id) == 25
+        assert EmployeeService.count_employees(department='IT', company_id=company.id) == 12
+        with StatementRecorder(db.engine) as recorder:
+            assert EmployeeService.count_employees(company_id=company.id) == 25
+        assert recorder.statements == []
+
+        add_employee(company, 50, 'Newcomer', department='IT')
+        db.session.commit()
+        assert EmployeeService.count_employees(company_id=company.id) == 26
+        assert EmployeeService.count_employees(department='IT', company_id=company.id) == 13
+
+
+
+def test_list_totals_follow_versions_bumped_by_other_processes(app):
+    with app.app_context():
+        company = setup_staff()
+        assert EmployeeService.count_employees(company_id=company.id) == 25
+
+        # Another process adds an employee and bumps the company's shared count version
+        with db.engine.begin() as connection:
+            connection.execute(insert(Employee), dict(
+                company_id=company.id, employee_id='LIST-EMP200', first_name='Sam', last_name='Late',
+                cell_number='+27821234567', department='IT', job_title='Clerk', start_date=date(2020, 1, 1),
+                salary=1, bank_name='FNB', account_number='1'))
+            connection.execute(update(CacheVersion).where(CacheVersion.name == f'employee_count:{company.id}')
+                               .values(version=CacheVersion.version + 1))
+
+        assert EmployeeService.count_employees(company_id=company.id) == 25
+        app.config['CACHE_VERSION_TTL'] = 0
+        assert EmployeeService.count_employees(company_id=company.id) == 26
+
+
+def test_keyset_page_seeks_the_company_name_index(app):
+    with app.app_context():
+        company = setup_staff()
+        cursor = EmployeeService.get_employees_keyset(per_page=10, company_id=company.id)['pagination']['next_cursor']
+
+        with StatementRecorder(db.engine) as recorder:
+            EmployeeService.get_employees_keyset(cursor=cursor, per_page=10, company_id=company.id)
+        (statement, parameters), = [s for s in recorder.statements if 'LIMIT' in s[0]]
+
+        with db.engine.connect() as connection:
+            plan = [row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+        assert any('ix_employees_company_name' in step for step in plan), plan
+        assert not [step for step in plan if 'TEMP B-TREE' in step or step.startswith('SCAN')], plan
+
+
+def test_employee_list_page_links_keyset_cursors(app, client):
+    with app.app_context():
+        company = setup_staff()
+        user = User(email='lister@example.com', is_accountant=True)
+        user.password_hash = 'unused'
+        user.companies.append(company)
+        db.session.add(user)
+        db.session.commit()
+        user_id, company_id = user.id, company.id
+        cursor = EmployeeService.get_employees_keyset(per_page=10, company_id=company_id)['pagination']['next_cursor']
+    with client.session_transaction() as flask_session:
+        flask_session['_user_id'] = str(user_id)
+        flask_session['_fresh'] = True
+        flask_session['selected_company_id'] = company_id
+
+    response = client.get(f'/employees/?cursor={cursor}')
+
+    assert response.status_code == 200
+    assert b'Showing 10 of 25 employees' in response.data
+    assert b'cursor=' in response.data
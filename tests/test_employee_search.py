@@ -0,0 +1,96 @@
+from datetime import date
+
+from sqlalchemy import event
+
+from app import db
+from app.models import Company, Employee
+from app.services.employee_search import BACKENDS, search_backend
+from app.services.employee_service import EmployeeService
+
+
+def add_employee(company, employee_id, first_name, last_name, id_number=None):
+    employee = Employee(company_id=company.id, employee_id=employee_id, first_name=first_name, last_name=last_name,
+                        id_number=id_number, cell_number='+27821234567', department='IT', job_title='Clerk',
+                        start_date=date(2020, 1, 1), salary=1, bank_name='FNB', account_number='1')
+    db.session.add(employee)
+    return employee
+
+
+def setup_staff():
+    company, other = Company(name='Search Co'), Company(name='Other Co')
+    db.session.add_all([company, other])
+    db.session.flush()
+    add_employee(company, 'SRCHC-EMP001', 'Thabo', 'Nkosi', '8001015009087')
+    add_employee(company, 'SRCHC-EMP002', 'Anna', 'Thabethe', '9002025009088')
+    add_employee(company, 'SRCHC-EMP003', 'Pieter', 'Botha', '7503035009089')
+    add_employee(other, 'THRCO-EMP001', 'Thabo', 'Mokoena')
+    db.session.commit()
+    return company
+
+
+def names(employees):
+    return [f'{e.first_name} {e.last_name}' for e in employees]
+
+
+def test_sqlite_search_uses_fts5_prefix_matching_with_ranking(app):
+    with app.app_context():
+        company = setup_staff()
+        assert search_backend().name == 'fts5'
+
+        assert names(EmployeeService.search_employees('thab', company_id=company.id)) == [
+            'Thabo Nkosi', 'Anna Thabethe']
+        assert names(EmployeeService.search_employees('thabo nk', company_id=company.id)) == ['Thabo Nkosi']
+        assert names(EmployeeService.search_employees('SRCHC-EMP003', company_id=company.id)) == ['Pieter Botha']
+        assert names(EmployeeService.search_employees('900202', company_id=company.id)) == ['Anna Thabethe']
+        assert EmployeeService.search_employees('"*', company_id=company.id) == []
+
+        page = EmployeeService.get_employees_paginated(search='bot', company_id=company.id)
+        assert names(page['employees']) == ['Pieter Botha']
+        assert page['pagination']['total'] == 1
+
+
+def test_search_index_follows_employee_changes(app):
+    with app.app_context():
+        company = setup_staff()
+        pieter = Employee.query.filter_by(employee_id='SRCHC-EMP003').one()
+        anna = Employee.query.filter_by(employee_id='SRCHC-EMP002').one()
+
+        pieter.last_name = 'Naidoo'
+        db.session.delete(anna)
+        db.session.commit()
+
+        assert EmployeeService.search_employees('botha', company_id=company.id) == []
+        assert names(EmployeeService.search_employees('naid', company_id=company.id)) == ['Pieter Naidoo']
+        assert names(EmployeeService.search_employees('thab', company_id=company.id)) == ['Thabo Nkosi']
+
+
+def test_search_reads_employees_through_the_index(app):
+    with app.app_context():
+        company = setup_staff()
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if 'employee_search' in statement:
+                statements.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            EmployeeService.search_employees('thab', company_id=company.id)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+        (statement, parameters), = statements
+        with db.engine.connect() as connection:
+            plan = [row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+        assert not [step for step in plan if step.startswith('SCAN employees')], plan
+
+
+def test_ilike_fallback_matches_substrings(app):
+    with app.app_context():
+        company = setup_staff()
+        staff = Employee.query.filter_by(company_id=company.id)
+
+        query, rank_order = BACKENDS['ilike'].apply(staff, 'bo')
+        assert names(query.order_by(*rank_order, Employee.last_name)) == ['Pieter Botha', 'Thabo Nkosi']
+        query, _ = BACKENDS['ilike'].apply(staff, 'abet')
+        assert names(query) == ['Anna Thabethe']
@@ -0,0 +1,169 @@
+import time
+from datetime import date
+
+from sqlalchemy import event, insert, update
+
+from app import db
+from app.models import CacheVersion, Company, Employee, User
+from app.services.employee_typeahead import CompanyTypeahead, TypeaheadCache, typeahead_cache
+
+
+def add_employee(company, employee_id, first_name, last_name, id_number=None):
+    employee = Employee(company_id=company.id, employee_id=employee_id, first_name=first_name, last_name=last_name,
+                        id_number=id_number, cell_number='+27821234567', department='IT', job_title='Clerk',
+                        start_date=date(2020, 1, 1), salary=1, bank_name='FNB', account_number='1')
+    db.session.add(employee)
+    return employee
+
+
+def setup_staff():
+    company = Company(name='Typeahead Co')
+    db.session.add(company)
+    db.session.flush()
+    add_employee(company, 'TYPHD-EMP001', 'Thabo', 'Nkosi', '8001015009087')
+    add_employee(company, 'TYPHD-EMP002', 'Anna', 'Thabethe', '9002025009088')
+    add_employee(company, 'TYPHD-EMP003', 'Pieter', 'Botha', '7503035009089')
+    db.session.commit()
+    return company
+
+
+def names(results):
+    return [result['full_name'] for result in results]
+
+
+def test_prefix_lookup_over_names_and_ids():
+    index = CompanyTypeahead([
+        (1, 'TYPHD-EMP001', 'Thabo', 'Nkosi', '8001015009087', 'IT', 'Clerk', 'Active'),
+        (2, 'TYPHD-EMP002', 'Anna', 'Thabethe', '9002025009088', 'IT', 'Clerk', 'Active'),
+        (3, 'TYPHD-EMP003', 'Pieter', 'Botha', None, 'IT', 'Clerk', 'Active'),
+    ])
+
+    assert names(index.search('thab')) == ['Anna Thabethe', 'Thabo Nkosi']
+    assert names(index.search('  THABO   nk')) == ['Thabo Nkosi']
+    assert names(index.search('typhd-emp003')) == ['Pieter Botha']
+    assert names(index.search('900202')) == ['Anna Thabethe']
+    assert names(index.search('typhd', limit=2)) == ['Thabo Nkosi', 'Anna Thabethe']
+    assert index.search('') == []
+
+
+def test_search_endpoint_serves_warm_companies_without_queries(app, client):
+    with app.app_context():
+        company = setup_staff()
+        user = User(email='typeahead@example.com', is_accountant=True)
+        user.password_hash = 'unused'
+        user.companies.append(company)
+        db.session.add(user)
+        db.session.commit()
+        user_id, company_id = user.id, company.id
+    with client.session_transaction() as flask_session:
+        flask_session['_user_id'] = str(user_id)
+        flask_session['_fresh'] = True
+        flask_session['selected_company_id'] = company_id
+
+    assert names(client.get('/employees/search?q=bot').get_json()['employees']) == ['Pieter Botha']
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/employees/search?q=thabo')
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert names(response.get_json()['employees']) == ['Thabo Nkosi']
+    assert not [statement for statement in statements if 'FROM employees' in statement]
+
+
+def test_indexes_are_dropped_when_employee_changes_commit(app):
+    with app.app_context():
+        company = setup_staff()
+        cache = typeahead_cache()
+        assert names(cache.search(company.id, 'bot')) == ['Pieter Botha']
+
+        pieter = Employee.query.filter_by(employee_id='TYPHD-EMP003').one()
+        pieter.last_name = 'Naidoo'
+        db.session.flush()
+        db.session.rollback()
+        assert names(cache.search(company.id, 'bot')) == ['Pieter Botha']
+
+        pieter.last_name = 'Naidoo'
+        add_employee(company, 'TYPHD-EMP004', 'Botho', 'Dlamini')
+        db.session.commit()
+        assert names(cache.search(company.id, 'bot')) == ['Botho Dlamini']
+        assert names(cache.search(company.id, 'naid')) == ['Pieter Naidoo']
+
+        db.session.delete(pieter)
+        db.session.commit()
+        assert cache.search(company.id, 'naid') == []
+
+
+def test_indexes_follow_versions_bumped_by_other_processes(app):
+    with app.app_context():
+        company = setup_staff()
+        cache = typeahead_cache()
+        assert names(cache.search(company.id, 'sam')) == []
+
+        # Another process adds an employee and bumps the company's shared typeahead version
+        with db.engine.begin() as connection:
+            connection.execute(insert(Employee), dict(
+                company_id=company.id, employee_id='TYPHD-EMP200', first_name='Sam', last_name='Late',
+                cell_number='+27821234567', department='IT', job_title='Clerk', start_date=date(2020, 1, 1),
+                salary=1, bank_name='FNB', account_number='1'))
+            connection.execute(update(CacheVersion).where(CacheVersion.name == f'employee_typeahead:{company.id}')
+                               .values(version=CacheVersion.version + 1))
+
+        assert names(cache.search(company.id, 'sam')) == []
+        app.config['CACHE_VERSION_TTL'] = 0
+        assert names(cache.search(company.id, 'sam')) == ['Sam Late']
+
+
+def test_builds_that_race_an_invalidation_are_not_kept(app, monkeypatch):
+    with app.app_context():
+        company = setup_staff()
+        cache = TypeaheadCache()
+        load = CompanyTypeahead.load
+
+        def load_while_employees_change(company_id, version=0):
+            index = load(company_id, version)
+            cache.invalidate([company_id])
+            return index
+
+        monkeypatch.setattr(CompanyTypeahead, 'load', load_while_employees_change)
+        assert names(cache.search(company.id, 'bot')) == ['Pieter Botha']
+        assert company.id not in cache._indexes
+
+        monkeypatch.setattr(CompanyTypeahead, 'load', load)
+        index = cache.get(company.id)
+        assert cache.get(company.id) is index
+
+
+def test_cache_keeps_recent_companies_and_expires_indexes(app):
+    with app.app_context():
+        companies = [Company(name=f'Co {n}') for n in range(3)]
+        db.session.add_all(companies)
+        db.session.commit()
+        cache = TypeaheadCache(max_companies=2, ttl=60)
+
+        first = cache.get(companies[0].id)
+        cache.get(companies[1].id)
+        assert cache.get(companies[0].id) is first
+        cache.get(companies[2].id)
+        assert list(cache._indexes) == [companies[0].id, companies[2].id]
+
+        first.built_at -= 61
+        assert cache.get(companies[0].id) is not first
+
+
+def test_warm_lookups_stay_under_a_millisecond():
+    rows = [(n, f'TYPHD-EMP{n:05d}', f'First{n % 500}', f'Last{n}', f'{8001015000000 + n}', 'IT', 'Clerk', 'Active')
+            for n in range(10000)]
+    index = CompanyTypeahead(rows)
+
+    start = time.perf_counter()
+    for n in range(1000):
+        index.search(f'first{n % 50}')
+    assert (time.perf_counter() - start) / 1000 < 0.001
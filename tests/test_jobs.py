@@ -0,0 +1,185 @@
+import csv
+import os
+from datetime import date
+
+from app import db
+from app.models import Job, PayrollEntry
+from app.services.job_service import JobService
+from tests.test_payroll_batch import setup_company
+
+
+def test_payroll_job_runs_batch(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        job = JobService.enqueue('payroll.process', {
+            'company_id': company.id,
+            'period_start': '2025-06-01',
+            'period_end': '2025-06-30',
+        }, company_id=company.id)
+        assert job.status == Job.STATUS_QUEUED
+
+        assert JobService.run_pending() == 1
+
+        job = db.session.get(Job, job.id)
+        assert job.status == Job.STATUS_SUCCEEDED
+        assert job.progress == 100
+        assert job.result['created'] == 2
+        assert PayrollEntry.query.count() == 2
+
+
+def test_report_export_job_writes_download(app, tmp_path):
+    app.config['JOB_RESULTS_DIR'] = str(tmp_path)
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        job = JobService.enqueue('reports.export', {'company_id': company.id, 'report': 'employee_status'})
+
+        JobService.run_pending()
+
+        job = db.session.get(Job, job.id)
+        assert job.has_download
+        assert job.result == {'report': 'employee_status', 'rows': 2}
+        with open(job.result_path, newline='') as f:
+            rows = list(csv.reader(f))
+        assert rows[0][0] == 'Employee ID'
+        assert len(rows) == 3
+
+
+def test_queued_job_can_be_cancelled(app):
+    with app.app_context():
+        job = JobService.enqueue('notifications.scan')
+        JobService.cancel(job)
+
+        assert job.status == Job.STATUS_CANCELLED
+        assert JobService.claim_next('test-worker') is None
+
+
+def test_running_job_stops_at_next_progress_check(app, tmp_path):
+    app.config['JOB_RESULTS_DIR'] = str(tmp_path)
+    calls = []
+
+    @JobService.handler('test.cancellable')
+    def cancellable(ctx):
+        path = ctx.result_file('partial.txt')
+        open(path, 'w').close()
+        JobService.cancel(ctx.job)
+        calls.append('before')
+        ctx.progress(50)
+        calls.append('after')
+
+    with app.app_context():
+        job = JobService.enqueue('test.cancellable')
+        job = JobService.claim_next('test-worker')
+        assert JobService.claim_next('other-worker') is None
+
+        JobService.run(job)
+
+        assert calls == ['before']
+        assert job.status == Job.STATUS_CANCELLED
+        assert job.result_path is None
+        assert not any(tmp_path.iterdir())
+
+
+def test_finalizing_entries_queues_payslip_rendering(app, client, monkeypatch):
+    from app.models import User
+    from app.routes import payroll as payroll_routes
+    from app.services.payroll_batch_service import PayrollBatchCalculator
+    from app.services.payslip_render_service import PayslipRenderService
+
+    rendered = []
+
+    def store_finalized(entries):
+        rendered.extend(entries)
+        return len(entries)
+
+    monkeypatch.setattr(payroll_routes, 'WEASYPRINT_AVAILABLE', True)
+    monkeypatch.setattr(PayslipRenderService, 'store_finalized', staticmethod(store_finalized))
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+        user = User(email='finalizer@example.com', is_accountant=True)
+        user.password_hash = 'unused'
+        user.companies.append(company)
+        db.session.add(user)
+        db.session.commit()
+        user_id, company_id = user.id, company.id
+        entry_ids = [str(entry.id) for entry in PayrollEntry.query.all()]
+    with client.session_transaction() as flask_session:
+        flask_session['_user_id'] = str(user_id)
+        flask_session['_fresh'] = True
+        flask_session['selected_company_id'] = company_id
+
+    response = client.post('/payroll/bulk-actions', data={'action': 'finalize', 'entry_ids': entry_ids})
+
+    assert response.status_code == 302
+    assert rendered == []
+    with app.app_context():
+        job = Job.query.filter_by(job_type='payroll.store_payslips').one()
+        assert job.company_id == company_id
+
+        assert JobService.run_pending() == 1
+        job = db.session.get(Job, job.id)
+        assert job.status == Job.STATUS_SUCCEEDED
+        assert job.result == {'payslips': 2}
+    assert len(rendered) == 2
+
+
+def test_deleting_a_company_removes_its_jobs(app, client, tmp_path):
+    from app.models import Company, User
+
+    app.config['JOB_RESULTS_DIR'] = str(tmp_path)
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        user = User(email='leaver@example.com', is_accountant=True)
+        user.password_hash = 'unused'
+        user.companies.append(company)
+        db.session.add(user)
+        db.session.commit()
+
+        finished = JobService.enqueue('reports.export', {'company_id': company.id, 'report': 'employee_status'},
+                                      company_id=company.id)
+        JobService.run_pending()
+        result_dir = os.path.dirname(db.session.get(Job, finished.id).result_path)
+        running = JobService.enqueue('notifications.scan', company_id=company.id)
+        running.status = Job.STATUS_RUNNING
+        db.session.commit()
+        user_id, company_id, running_id = user.id, company.id, running.id
+    with client.session_transaction() as flask_session:
+        flask_session['_user_id'] = str(user_id)
+        flask_session['_fresh'] = True
+
+    response = client.post(f'/auth/profile/remove-company/{company_id}')
+
+    assert response.status_code == 302
+    with app.app_context():
+        assert db.session.get(Company, company_id) is None
+        assert db.session.get(Job, finished.id) is None
+        assert not os.path.exists(result_dir)
+        running = db.session.get(Job, running_id)
+        assert running.company_id is None
+        assert running.cancel_requested
+
+
+def test_payslip_zip_job_batches_progress_updates(app, tmp_path, monkeypatch):
+    from app.services.job_service import JobContext
+    from app.services.payslip_render_service import PayslipRenderService
+
+    app.config['JOB_RESULTS_DIR'] = str(tmp_path)
+    updates = []
+    original_progress = JobContext.progress
+
+    def progress(self, percent, message=None):
+        updates.append(percent)
+        original_progress(self, percent, message)
+
+    monkeypatch.setattr(JobContext, 'progress', progress)
+    monkeypatch.setattr(PayslipRenderService, 'load_entries', staticmethod(lambda ids, company_id: list(ids)))
+    monkeypatch.setattr(PayslipRenderService, 'iter_entry_pdfs',
+                        staticmethod(lambda entries: ((f'{entry}.pdf', b'%PDF-1') for entry in entries)))
+    with app.app_context():
+        job = JobService.enqueue('payroll.payslips', {'company_id': 1, 'entry_ids': list(range(60))})
+
+        JobService.run_pending()
+
+        job = db.session.get(Job, job.id)
+        assert job.result == {'payslips': 60}
+        assert updates == [41, 83]
@@ -0,0 +1,103 @@
+from datetime import date
+from decimal import Decimal
+
+from app import db
+from app.models import (
+    Company,
+    Employee,
+    PayrollEntry,
+    Beneficiary,
+    EmployeeRecurringDeduction,
+)
+from app.services.payroll_batch_service import PayrollBatchCalculator
+
+
+def create_employee(company_id, employee_id, salary_type='monthly', salary='10000.00'):
+    emp = Employee(
+        company_id=company_id,
+        employee_id=employee_id,
+        first_name='Test',
+        last_name=employee_id,
+        cell_number='0821234567',
+        department='IT',
+        job_title='Dev',
+        start_date=date(2023, 1, 1),
+        salary_type=salary_type,
+        salary=Decimal(salary),
+        bank_name='Bank',
+        account_number='12345678',
+    )
+    db.session.add(emp)
+    return emp
+
+
+def setup_company():
+    company = Company(name='BatchCo')
+    db.session.add(company)
+    db.session.commit()
+
+    monthly = create_employee(company.id, 'EMP001')
+    hourly = create_employee(company.id, 'EMP002', salary_type='hourly', salary='50.00')
+    db.session.commit()
+
+    fund = Beneficiary(company_id=company.id, type='Pension Fund', name='Fund')
+    db.session.add(fund)
+    db.session.commit()
+    db.session.add(EmployeeRecurringDeduction(
+        employee_id=monthly.id,
+        beneficiary_id=fund.id,
+        amount_type='Fixed',
+        value=Decimal('250.00'),
+    ))
+    db.session.commit()
+    return company, monthly, hourly
+
+
+def test_batch_run_creates_entries_in_one_pass(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+
+        summary = PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+
+        assert summary['employees'] == 2
+        assert summary['created'] == 2
+        assert summary['skipped'] == 0
+        assert set(summary['timings']) == {'load_ms', 'compute_ms', 'write_ms', 'total_ms'}
+
+        entries = {e.employee_id: e for e in PayrollEntry.query.all()}
+        assert len(entries) == 2
+        entry = entries[monthly.id]
+        assert entry.month_year == '2025-06'
+        assert entry.created_at is not None
+        assert entry.gross_pay == Decimal('10000.00')
+        # Stored net pay matches the ORM view of gross minus deductions
+        assert round(float(entry.net_pay), 2) == round(float(entry.gross_pay - entry.total_deductions), 2)
+        assert round(float(entry.uif), 2) == 100.0
+        assert round(summary['totals']['gross_pay'], 2) == round(float(entries[hourly.id].gross_pay) + 10000.0, 2)
+
+
+def test_batch_run_skips_existing_entries(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        calculator = PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30))
+        calculator.run()
+
+        summary = calculator.run()
+
+        assert summary['created'] == 0
+        assert summary['skipped'] == 2
+        assert PayrollEntry.query.count() == 2
+
+
+def test_entry_statutory_deductions_use_percentages_as_rates(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        entry = PayrollEntry(employee=monthly, company_id=company.id, pay_period_start=date(2025, 6, 1),
+                             pay_period_end=date(2025, 6, 30), month_year='2025-06', hourly_rate=Decimal('0'))
+        db.session.add(entry)
+
+        entry.calculate_statutory_deductions()
+
+        # The global default stores 1% as 1.000
+        assert round(float(entry.uif), 2) == 100.0
+        assert round(float(entry.sdl), 2) == 100.0
@@ -0,0 +1,43 @@
+from datetime import date
+from decimal import Decimal
+
+from app import db
+from app.models import Company, PayrollEntry
+from app.services.payroll_batch_service import PayrollBatchCalculator
+from tests.test_payroll_batch import setup_company
+
+
+def test_company_id_is_stamped_on_insert(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+        entry = PayrollEntry(employee_id=hourly.id, pay_period_start=date(2025, 7, 1),
+                             pay_period_end=date(2025, 7, 31), month_year='2025-07',
+                             ordinary_hours=Decimal('10'), hourly_rate=Decimal('50'))
+        db.session.add(entry)
+        db.session.commit()
+
+        assert entry.company_id == company.id
+        assert {e.company_id for e in PayrollEntry.query.all()} == {company.id}
+
+
+def test_sync_payroll_company_checks_and_repairs(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+        runner = app.test_cli_runner()
+
+        assert runner.invoke(args=['sync-payroll-company', '--check']).exit_code == 0
+
+        other = Company(name='Other Co')
+        db.session.add(other)
+        db.session.commit()
+        PayrollEntry.query.update({'company_id': other.id})
+        db.session.commit()
+        result = runner.invoke(args=['sync-payroll-company', '--check'])
+        assert result.exit_code != 0
+        assert '2 payroll entries' in result.output
+
+        result = runner.invoke(args=['sync-payroll-company'])
+        assert 'Updated company_id on 2 payroll entries' in result.output
+        assert runner.invoke(args=['sync-payroll-company', '--check']).exit_code == 0
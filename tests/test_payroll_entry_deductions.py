@@ -0,0 +1,81 @@
+from datetime import date
+from decimal import Decimal
+
+from app import db
+from app.models import PayrollEntry, PayrollEntryDeduction, EmployeeRecurringDeduction
+from app.services.report_export_service import beneficiary_totals_for_period
+from app.services.payroll_batch_service import PayrollBatchCalculator
+from tests.test_payroll_batch import setup_company
+
+
+def test_batch_run_snapshots_deduction_lines(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+
+        lines = PayrollEntryDeduction.query.all()
+        assert len(lines) == 1
+        assert lines[0].payroll_entry.employee_id == monthly.id
+        assert lines[0].amount == Decimal('250.00')
+
+
+def test_snapshot_survives_deduction_changes(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+        PayrollEntry.query.update({'is_verified': True, 'month_year': '2025-06'})
+        db.session.commit()
+
+        # A later change to the recurring deduction does not rewrite history
+        deduction = EmployeeRecurringDeduction.query.one()
+        deduction.value = Decimal('400.00')
+        db.session.commit()
+
+        totals = beneficiary_totals_for_period(company.id, '2025-06')
+        assert [(name, data['total']) for name, data in totals.items()] == [('Fund', Decimal('250.00'))]
+
+        # Re-saving an entry refreshes its own snapshot
+        entry = PayrollEntry.query.filter_by(employee_id=monthly.id).one()
+        entry.allowances = Decimal('100.00')
+        db.session.commit()
+        assert [line.amount for line in entry.deduction_lines] == [Decimal('400.00')]
+        assert PayrollEntryDeduction.query.count() == 1
+
+
+def test_backfill_all_leaves_finalized_snapshots_alone(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+        PayrollEntry.query.update({'is_finalized': True})
+        db.session.commit()
+        EmployeeRecurringDeduction.query.one().value = Decimal('400.00')
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['backfill-payroll-totals', '--all'])
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        entry = PayrollEntry.query.filter_by(employee_id=monthly.id).one()
+        assert [line.amount for line in entry.deduction_lines] == [Decimal('250.00')]
+        assert entry.recurring_deductions_total == Decimal('250.00')
+
+
+def test_backfill_all_keeps_finalized_totals_without_lines(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+        entry = PayrollEntry.query.filter_by(employee_id=monthly.id).one()
+        entry.is_finalized = True
+        db.session.commit()
+        PayrollEntryDeduction.query.delete()
+        monthly.salary = Decimal('20000.00')
+        db.session.commit()
+        gross_pay, total_deductions = entry.gross_pay, entry.total_deductions
+
+    result = app.test_cli_runner().invoke(args=['backfill-payroll-totals', '--all'])
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        entry = PayrollEntry.query.filter_by(employee_id=monthly.id).one()
+        assert (entry.gross_pay, entry.total_deductions) == (gross_pay, total_deductions)
+        assert entry.deduction_lines == []
@@ -0,0 +1,151 @@
+from datetime import date
+from decimal import Decimal
+
+from app import db
+from app.models import PayrollEntry, PayrollPeriodSummary, User
+from app.services.payroll_batch_service import PayrollBatchCalculator
+from app.services.portfolio_service import PortfolioService
+from tests.test_payroll_batch import setup_company
+
+
+def summary_values(company_id, month_year):
+    summary = PayrollPeriodSummary.for_company(company_id, month_year)
+    if summary is None:
+        return None
+    values = summary.to_dict()
+    values.pop('updated_at')
+    return values
+
+
+def aggregated_values(company_id, month_year):
+    PayrollPeriodSummary.rebuild(company_id)
+    return summary_values(company_id, month_year)
+
+
+def test_batch_run_and_edits_keep_summary_in_step(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+
+        summary = PayrollPeriodSummary.for_company(company.id, '2025-06')
+        entries = PayrollEntry.query.all()
+        assert summary.headcount == 2
+        assert summary.gross_pay == sum(e.gross_pay for e in entries)
+        assert summary.net_pay == sum(e.net_pay for e in entries)
+        assert summary.verified_count == 0
+
+        entry = PayrollEntry.query.filter_by(employee_id=monthly.id).one()
+        entry.is_verified = True
+        entry.is_finalized = True
+        db.session.commit()
+        updated = summary_values(company.id, '2025-06')
+        assert updated['verified_count'] == 1
+        assert updated['finalized_count'] == 1
+        assert updated['verified_net_pay'] == float(entry.net_pay)
+
+        entry.month_year = '2025-07'
+        db.session.commit()
+        assert summary_values(company.id, '2025-06')['headcount'] == 1
+        assert summary_values(company.id, '2025-07')['headcount'] == 1
+
+        db.session.delete(entry)
+        db.session.commit()
+        assert summary_values(company.id, '2025-07') is None
+
+        assert summary_values(company.id, '2025-06') == aggregated_values(company.id, '2025-06')
+
+
+
+def test_flushes_add_deltas_to_rows_written_by_other_sessions(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        # Another writer already counted an entry this session has not seen
+        db.session.add(PayrollPeriodSummary(company_id=company.id, month_year='2025-06', headcount=1,
+                                            gross_pay=Decimal('1000.00'), net_pay=Decimal('900.00'),
+                                            last_pay_period_end=date(2025, 6, 15)))
+        db.session.commit()
+
+        entry = PayrollEntry(employee_id=monthly.id, company_id=company.id, pay_period_start=date(2025, 6, 1),
+                             pay_period_end=date(2025, 6, 30), month_year='2025-06', hourly_rate=Decimal('0'),
+                             gross_pay=Decimal('500.00'), net_pay=Decimal('400.00'))
+        db.session.add(entry)
+        db.session.commit()
+        values = summary_values(company.id, '2025-06')
+        assert values['headcount'] == 2
+        assert values['gross_pay'] == 1000.0 + float(entry.gross_pay)
+        assert values['net_pay'] == 900.0 + float(entry.net_pay)
+        assert values['last_pay_period_end'] == '2025-06-30'
+
+        entry.is_verified = True
+        entry.net_pay = Decimal('450.00')
+        db.session.commit()
+        values = summary_values(company.id, '2025-06')
+        assert (values['headcount'], values['verified_count']) == (2, 1)
+        assert values['net_pay'] == 900.0 + float(entry.net_pay)
+        assert values['verified_net_pay'] == float(entry.net_pay)
+
+        db.session.delete(entry)
+        db.session.commit()
+        values = summary_values(company.id, '2025-06')
+        assert (values['headcount'], values['gross_pay'], values['net_pay']) == (1, 1000.0, 900.0)
+        # The remaining entry is not in payroll_entries, so the latest period end is re-read as empty
+        assert values['last_pay_period_end'] is None
+
+
+def test_rebuild_summaries_command_repairs_bulk_updates(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+        PayrollEntry.query.update({'is_verified': True})
+        db.session.commit()
+        assert summary_values(company.id, '2025-06')['verified_count'] == 0
+
+        result = app.test_cli_runner().invoke(args=['rebuild-summaries', '--company-id', str(company.id)])
+
+        assert 'Rebuilt 1 payroll period summaries' in result.output
+        db.session.expire_all()
+        assert summary_values(company.id, '2025-06')['verified_count'] == 2
+
+
+def test_portfolio_views_read_last_payroll_without_multiplying_rows(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+        user = User(email='portfolio@example.com', is_accountant=True)
+        user.password_hash = 'unused'
+        user.companies.append(company)
+        db.session.add(user)
+        db.session.commit()
+
+        row, = PortfolioService.get_portfolio_table_data(user.id)
+        assert row['last_payroll_date'] == date(2025, 6, 30)
+        assert row['payroll_status'] == 'pending'
+
+        (overview,), total_employees = PortfolioService.get_portfolio_overview_data(user.id)
+        assert total_employees == 2
+        assert overview['last_payroll_date'] == date(2025, 6, 30)
+        # Two employees without tax numbers plus an overdue payroll
+        assert overview['pending_issues'] == 3
+
+
+def test_deleting_an_employee_takes_their_entries_out_of_the_summary(app, client):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+        user = User(email='summary-delete@example.com', is_accountant=True)
+        user.password_hash = 'unused'
+        user.companies.append(company)
+        db.session.add(user)
+        db.session.commit()
+        user_id, company_id, employee_id = user.id, company.id, hourly.id
+    with client.session_transaction() as flask_session:
+        flask_session['_user_id'] = str(user_id)
+        flask_session['_fresh'] = True
+        flask_session['selected_company_id'] = company_id
+
+    response = client.post(f'/employees/{employee_id}/delete')
+
+    assert response.status_code == 302
+    with app.app_context():
+        assert summary_values(company_id, '2025-06')['headcount'] == 1
+        assert summary_values(company_id, '2025-06') == aggregated_values(company_id, '2025-06')
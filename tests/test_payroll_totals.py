@@ -0,0 +1,70 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import update
+
+from app import db
+from app.models import PayrollEntry
+from tests.test_payroll_batch import setup_company
+
+
+def create_entry(employee, **kwargs):
+    entry = PayrollEntry(
+        employee_id=employee.id,
+        pay_period_start=date(2025, 6, 1),
+        pay_period_end=date(2025, 6, 30),
+        ordinary_hours=Decimal('176'),
+        hourly_rate=Decimal('50.00'),
+        paye=Decimal('100.00'),
+        uif=Decimal('10.00'),
+        sdl=Decimal('10.00'),
+        **kwargs,
+    )
+    db.session.add(entry)
+    db.session.commit()
+    return entry
+
+
+def test_totals_persisted_on_save_and_refreshed_on_input_change(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        entry = create_entry(monthly)
+
+        assert entry.gross_pay == Decimal('10000.00')
+        assert entry.recurring_deductions_total == Decimal('250.00')
+        assert entry.total_deductions == Decimal('370.00')
+
+        # Totals are queryable in SQL
+        total = db.session.query(db.func.sum(PayrollEntry.total_deductions)).scalar()
+        assert total == Decimal('370.00')
+
+        entry.allowances = Decimal('500.00')
+        db.session.commit()
+        assert entry.gross_pay == Decimal('10500.00')
+
+        # Non-input changes leave stored totals alone
+        db.session.execute(update(PayrollEntry).values(gross_pay=Decimal('1.00')))
+        db.session.expire_all()
+        entry = db.session.get(PayrollEntry, entry.id)
+        entry.is_verified = True
+        db.session.commit()
+        assert entry.gross_pay == Decimal('1.00')
+
+
+def test_backfill_command_populates_missing_totals(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        entry = create_entry(hourly)
+        db.session.execute(update(PayrollEntry).values(
+            gross_pay=None, recurring_deductions_total=None, total_deductions=None
+        ))
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['backfill-payroll-totals'])
+    assert result.exit_code == 0, result.output
+    assert '1 payroll entries updated' in result.output
+
+    with app.app_context():
+        entry = db.session.get(PayrollEntry, entry.id)
+        assert entry.gross_pay == Decimal('8800.00')
+        assert entry.total_deductions == Decimal('120.00')
@@ -0,0 +1,72 @@
+import re
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import PayrollEntry
+from app.services.payroll_batch_service import PayrollBatchCalculator
+from app.services.payslip_print_service import PayslipPrintRun
+from app.services.payslip_render_service import PayslipRenderService
+from tests.test_payroll_batch import setup_company
+
+
+@pytest.fixture
+def weasyprint():
+    try:
+        return pytest.importorskip('weasyprint')
+    except OSError as e:
+        # Installed but missing its system libraries (pango, cairo)
+        pytest.skip(f'WeasyPrint is not usable: {e}')
+
+
+def finalized_period_entries(company):
+    PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+    PayrollEntry.query.update({'is_finalized': True})
+    db.session.commit()
+    return PayslipRenderService.load_period_entries(company.id, '2025-06')
+
+
+def page_count(pdf):
+    return len(re.findall(rb'/Type\s*/Page\b', pdf))
+
+
+def test_print_run_html_shares_one_stylesheet(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        entries = finalized_period_entries(company)
+        assert len(entries) == 2
+
+        with app.test_request_context():
+            standalone = PayslipRenderService.render_html(entries[0])
+            print_html = PayslipRenderService.render_html(entries[0], print_run=True)
+
+        stylesheet = PayslipPrintRun.stylesheet_source()
+        assert '@page' in stylesheet
+        assert stylesheet.strip() in standalone
+        assert '<style>' not in print_html
+
+
+def test_print_run_indexes_pages_and_extracts_payslips(app, weasyprint):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        entries = finalized_period_entries(company)
+
+        with app.test_request_context():
+            run = PayslipPrintRun(entries, current_date=date(2025, 7, 1))
+            index = run.layout()
+            combined = run.write_pdf()
+            first = run.extract_pdf(entries[0].id)
+            missing = run.extract_pdf(-1)
+
+        assert [item['entry_id'] for item in index] == [entry.id for entry in entries]
+        assert index[0]['first_page'] == 1
+        for previous, item in zip(index, index[1:]):
+            assert item['first_page'] == previous['last_page'] + 1
+        assert all(item['last_page'] >= item['first_page'] for item in index)
+
+        assert combined.startswith(b'%PDF')
+        assert page_count(combined) == index[-1]['last_page']
+        assert first.startswith(b'%PDF')
+        assert page_count(first) == index[0]['last_page'] - index[0]['first_page'] + 1
+        assert missing is None
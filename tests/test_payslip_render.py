@@ -0,0 +1,61 @@
+import io
+import zipfile
+from datetime import date
+
+from app import db
+from app.models import PayrollEntry
+from app.services.payroll_batch_service import PayrollBatchCalculator
+from app.services.payslip_render_service import PayslipRenderService
+from app.services.sars_config_resolver import SARSConfigResolver
+from tests.test_payroll_batch import setup_company
+from tests.test_sars_config_resolver import QueryCounter
+
+
+def fake_pdf(html):
+    return b'%PDF-' + str(len(html)).encode()
+
+
+def test_stream_zip_writes_each_payslip():
+    documents = [(f'payslip_{i}.pdf', f'<p>{i}</p>') for i in range(5)]
+
+    chunks = list(PayslipRenderService.stream_zip(
+        PayslipRenderService.iter_pdfs(documents, workers=0, render=fake_pdf)
+    ))
+
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+    assert sorted(archive.namelist()) == [name for name, _ in documents]
+    assert archive.read('payslip_0.pdf') == fake_pdf('<p>0</p>')
+
+
+def test_worker_pool_renders_all_documents():
+    documents = [(f'payslip_{i}.pdf', 'x' * i) for i in range(6)]
+    try:
+        pdfs = dict(PayslipRenderService.iter_pdfs(documents, workers=2, render=fake_pdf))
+    finally:
+        PayslipRenderService.shutdown()
+
+    assert pdfs == {name: fake_pdf(html) for name, html in documents}
+
+
+def test_payslip_html_renders_without_database_access(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+        PayrollEntry.query.update({'is_finalized': True})
+        db.session.commit()
+        ids = [entry.id for entry in PayrollEntry.query.all()]
+        company_id = company.id
+
+    with app.test_request_context():
+        entries = PayslipRenderService.load_entries(ids, company_id)
+        SARSConfigResolver.resolve_global()
+        db.session.close()
+
+        with QueryCounter(db.engine) as counter:
+            documents = [
+                (PayslipRenderService.payslip_filename(entry), PayslipRenderService.render_html(entry))
+                for entry in entries
+            ]
+        assert counter.count == 0
+        assert len(documents) == 2
+        assert all('BatchCo' in html for _, html in documents)
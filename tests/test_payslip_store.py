@@ -0,0 +1,112 @@
+import warnings
+from datetime import date
+
+from sqlalchemy import event
+
+from app import db
+from app.models import PayrollEntry
+from app.services.payroll_batch_service import PayrollBatchCalculator
+from app.services.payslip_render_service import PayslipRenderService
+from app.services.payslip_store import PayslipStore
+from tests.test_payroll_batch import setup_company
+
+
+def finalized_entries(app, tmp_path):
+    app.config['PAYSLIP_STORE_DIR'] = str(tmp_path)
+    company, monthly, hourly = setup_company()
+    PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+    entries = PayrollEntry.query.order_by(PayrollEntry.id).all()
+    for entry in entries:
+        entry.is_finalized = True
+    db.session.commit()
+    PayslipStore.reset_stats()
+    return entries
+
+
+def test_store_hit_miss_and_eviction_on_edit(app, tmp_path):
+    with app.app_context():
+        entry = finalized_entries(app, tmp_path)[0]
+
+        assert PayslipStore.get(entry) is None
+        path = PayslipStore.put(entry, b'%PDF-1')
+        assert PayslipStore.get(entry) == path
+        assert PayslipStore.stats()['hits'] == 1
+        assert PayslipStore.stats()['misses'] == 1
+
+        # Un-finalizing (or any edit) evicts the stored PDF
+        entry.is_finalized = False
+        db.session.commit()
+        assert PayslipStore.stats()['files'] == 0
+        assert PayslipStore.get(entry) is None
+
+
+def test_fingerprint_tracks_template_fields(app, tmp_path):
+    with app.app_context():
+        entry = finalized_entries(app, tmp_path)[0]
+        before = PayslipStore.fingerprint(entry)
+
+        entry.employee.company.name = 'Renamed Co'
+        assert PayslipStore.fingerprint(entry) != before
+
+        before = PayslipStore.fingerprint(entry)
+        entry.employee.job_title = 'Senior Dev'
+        assert PayslipStore.fingerprint(entry) != before
+
+
+def test_fingerprint_is_the_same_for_detached_entries(app, tmp_path):
+    with app.app_context():
+        company = finalized_entries(app, tmp_path)[0].company_id
+        entry = PayslipRenderService.load_entries([e.id for e in PayrollEntry.query.all()], company)[0]
+        attached = PayslipStore.fingerprint(entry)
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        db.session.close()
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('error')
+                assert PayslipStore.fingerprint(entry) == attached
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert statements == []
+
+
+def test_store_evicts_least_recently_used(app, tmp_path):
+    with app.app_context():
+        first, second = finalized_entries(app, tmp_path)
+        app.config['PAYSLIP_STORE_MAX_BYTES'] = 15
+
+        PayslipStore.put(first, b'x' * 10)
+        PayslipStore.put(second, b'y' * 10)
+
+        assert PayslipStore.get(first) is None
+        assert PayslipStore.get(second) is not None
+
+
+def test_puts_walk_the_store_only_when_it_may_be_full(app, tmp_path, monkeypatch):
+    with app.app_context():
+        first, second = finalized_entries(app, tmp_path)
+        walks = []
+        original_files = PayslipStore._files
+
+        def files():
+            walks.append(1)
+            return original_files()
+
+        monkeypatch.setattr(PayslipStore, '_files', staticmethod(files))
+        app.config['PAYSLIP_STORE_MAX_BYTES'] = 100
+        for n in range(5):
+            PayslipStore.put(first if n % 2 else second, b'x' * (n + 1), fingerprint=f'f{n}')
+        assert len(walks) == 1
+
+        PayslipStore.put(first, b'x' * 100, fingerprint='big')
+        assert len(walks) == 2
+        assert PayslipStore.stats()['bytes'] <= 100
+
+
+def test_store_stats_require_login(app, client):
+    assert client.get('/health/payslip-store').status_code in (302, 401)
@@ -0,0 +1,75 @@
+from datetime import date
+
+from app import db
+from app.models import Company, Job, PayrollEntry
+from app.services import payroll_batch_service
+from app.services.job_service import JobService
+from app.services.portfolio_payroll_service import PortfolioPayrollRun
+from tests.test_payroll_batch import create_employee, setup_company
+
+
+def setup_portfolio():
+    company, monthly, hourly = setup_company()
+    other = Company(name='OtherCo')
+    db.session.add(other)
+    db.session.commit()
+    create_employee(other.id, 'OTH001')
+    db.session.commit()
+    return company, other
+
+
+def test_portfolio_run_consolidates_companies(app):
+    with app.app_context():
+        company, other = setup_portfolio()
+        seen = []
+
+        summary = PortfolioPayrollRun([company.id, other.id], date(2025, 6, 1), date(2025, 6, 30)).run(
+            lambda done, total, result: seen.append((done, total, result['company_name']))
+        )
+
+        assert summary['workers'] == 0
+        assert summary['companies'] == 2
+        assert summary['succeeded'] == 2
+        assert summary['failed'] == []
+        assert summary['created'] == 3
+        assert seen == [(1, 2, 'BatchCo'), (2, 2, 'OtherCo')]
+        assert round(summary['totals']['gross_pay'], 2) == round(
+            sum(float(e.gross_pay) for e in PayrollEntry.query.all()), 2
+        )
+
+
+def test_portfolio_run_isolates_failing_company(app, monkeypatch):
+    with app.app_context():
+        company, other = setup_portfolio()
+        original_run = payroll_batch_service.PayrollBatchCalculator.run
+
+        def run(self, commit=True):
+            if self.company_id == company.id:
+                raise RuntimeError('tax table missing')
+            return original_run(self, commit)
+
+        monkeypatch.setattr(payroll_batch_service.PayrollBatchCalculator, 'run', run)
+
+        summary = PortfolioPayrollRun([company.id, other.id], date(2025, 6, 1), date(2025, 6, 30)).run()
+
+        assert summary['succeeded'] == 1
+        assert summary['failed'] == [{'company_id': company.id, 'company_name': 'BatchCo',
+                                      'error': 'tax table missing'}]
+        assert {e.company_id for e in PayrollEntry.query.all()} == {other.id}
+
+
+def test_portfolio_payroll_job_reports_progress(app):
+    with app.app_context():
+        company, other = setup_portfolio()
+        job = JobService.enqueue('payroll.portfolio', {
+            'company_ids': [company.id, other.id],
+            'period_start': '2025-06-01',
+            'period_end': '2025-06-30',
+        })
+
+        assert JobService.run_pending() == 1
+
+        job = db.session.get(Job, job.id)
+        assert job.status == Job.STATUS_SUCCEEDED
+        assert job.result['created'] == 3
+        assert [r['company_name'] for r in job.result['results']] == ['BatchCo', 'OtherCo']
@@ -0,0 +1,114 @@
+"""Plan regression tests: hot service queries must not fall back to full table scans"""
+import re
+from datetime import date
+
+from sqlalchemy import event
+
+from app import db
+from app.models import User, ComplianceReminder, ReminderNotification
+from app.services.notification_service import NotificationService
+from app.services.payroll_batch_service import PayrollBatchCalculator
+from app.services.payroll_service import calculate_ytd_totals
+from app.services.payslip_render_service import PayslipRenderService
+from app.services.portfolio_service import PortfolioService
+from app.services.report_export_service import ReportExportService
+from app.services.report_query import ReportQuery
+from tests.test_payroll_batch import setup_company
+
+HOT_TABLES = ('payroll_entries', 'compliance_reminders', 'reminder_notifications')
+
+
+class StatementRecorder:
+    """Record the SQL statements touching hot tables while a block runs"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and any(t in statement for t in HOT_TABLES):
+            self.statements.append((statement, parameters))
+
+
+def full_scans(statement, parameters):
+    """Hot tables read with a full scan in the plan for a statement"""
+    with db.engine.connect() as connection:
+        if connection.dialect.name == 'postgresql':
+            connection.exec_driver_sql('SET enable_seqscan = off')
+            plan = [row[0] for row in connection.exec_driver_sql('EXPLAIN ' + statement, parameters)]
+            pattern = re.compile(r'Seq Scan on (\w+)')
+        else:
+            plan = [row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+            pattern = re.compile(r'^SCAN (\w+)$')
+    return [m.group(1) for m in map(pattern.search, plan) if m and m.group(1) in HOT_TABLES]
+
+
+def assert_indexed(recorder):
+    assert recorder.statements
+    for statement, parameters in recorder.statements:
+        assert full_scans(statement, parameters) == [], statement
+
+
+def setup_payroll():
+    company, monthly, hourly = setup_company()
+    PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+    return company, monthly
+
+
+def test_payroll_hot_queries_use_indexes(app):
+    with app.app_context():
+        company, monthly = setup_payroll()
+
+        with StatementRecorder(db.engine) as recorder:
+            calculate_ytd_totals(monthly.id, date(2025, 3, 1))
+            ReportQuery.payroll_rows(company.id, period='2025-06')
+            ReportExportService.to_csv('payroll', company.id, '2025-06')
+            PayslipRenderService.load_period_entries(company.id, '2025-06')
+            PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+
+        assert_indexed(recorder)
+
+
+def test_compliance_hot_queries_use_indexes(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        user = User(email='plans@example.com', is_accountant=True)
+        user.set_password('password')
+        user.companies.append(company)
+        db.session.add(user)
+        db.session.flush()
+        reminder = ComplianceReminder(company_id=company.id, title='EMP201', due_date=date(2025, 7, 7),
+                                      created_by=user.id)
+        db.session.add(reminder)
+        db.session.flush()
+        db.session.add(ReminderNotification(user_id=user.id, reminder_id=reminder.id, title='EMP201', message='Due'))
+        db.session.commit()
+
+        with StatementRecorder(db.engine) as recorder:
+            PortfolioService.get_notifications_count.uncached(user.id)
+            PortfolioService.get_compliance_metrics_optimized.uncached(user.id)
+            NotificationService.mark_all_notifications_as_read(user.id)
+
+        assert_indexed(recorder)
+
+
+def test_create_indexes_command_adds_missing_indexes(app):
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql('DROP INDEX ix_payroll_entries_company_month_status')
+            connection.exec_driver_sql('CREATE INDEX ix_payroll_entries_month_year ON payroll_entries (month_year)')
+
+        result = app.test_cli_runner().invoke(args=['create-indexes'])
+
+        assert 'Creating index ix_payroll_entries_company_month_status' in result.output
+        assert 'Dropping superseded index ix_payroll_entries_month_year' in result.output
+        names = {index['name'] for index in db.inspect(db.engine).get_indexes('payroll_entries')}
+        assert 'ix_payroll_entries_company_month_status' in names
+        assert 'ix_payroll_entries_month_year' not in names
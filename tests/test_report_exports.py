@@ -0,0 +1,53 @@
+import csv
+import io
+from datetime import date
+
+from app import db
+from app.models import PayrollEntry
+from app.services.payroll_batch_service import PayrollBatchCalculator
+from app.services.report_export_service import ReportExportService
+from tests.test_payroll_batch import setup_company
+
+
+def verified_payroll(company):
+    PayrollBatchCalculator(company.id, date(2025, 6, 1), date(2025, 6, 30)).run()
+    PayrollEntry.query.update({'is_verified': True})
+    db.session.commit()
+
+
+def test_exports_stream_column_rows_without_orm_objects(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        verified_payroll(company)
+        db.session.expunge_all()
+
+        for report in ('payroll', 'leave', 'deductions', 'employee_status', 'eft'):
+            text = ReportExportService.to_csv(report, company.id, '2025-06')
+            assert len(list(csv.reader(io.StringIO(text)))) > 1, report
+
+        assert len(db.session.identity_map) == 0
+
+
+def test_payroll_export_rows(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        verified_payroll(company)
+
+        rows = list(csv.reader(io.StringIO(ReportExportService.to_csv('payroll', company.id, '2025-06'))))
+
+        assert rows[0][:3] == ['Employee ID', 'Employee Name', 'Gross Pay']
+        assert rows[1][:3] == ['EMP001', 'Test EMP001', '10000.00']
+        assert rows[1][-2:] == ['2025-06', 'Verified']
+
+        deductions = list(csv.reader(io.StringIO(ReportExportService.to_csv('deductions', company.id))))
+        assert deductions[1][:3] == ['EMP001', 'Test EMP001', 'Fund']
+
+
+def test_iter_csv_yields_chunks(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+
+        chunks = list(ReportExportService.iter_csv('employee_status', company.id, chunk_size=10))
+
+        assert len(chunks) == 3
+        assert ''.join(chunks) == ReportExportService.to_csv('employee_status', company.id)
@@ -0,0 +1,78 @@
+from datetime import date
+
+from app import db
+from app.models import PayrollEntry
+from app.services.employee_service import EmployeeService
+from app.services.payroll_batch_service import PayrollBatchCalculator
+from app.services.report_query import ReportQuery
+from tests.test_payroll_batch import setup_company
+from tests.test_report_exports import verified_payroll
+from tests.test_sars_config_resolver import QueryCounter
+
+
+def test_payroll_rows_match_entries_without_orm_objects(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        verified_payroll(company)
+        entries = {e.id: e for e in PayrollEntry.query.all()}
+        expected = {
+            e.id: (e.employee.full_name, e.employee.employee_id, e.gross_pay, e.net_pay, e.month_year)
+            for e in entries.values()
+        }
+        db.session.expunge_all()
+
+        rows = ReportQuery.payroll_rows(company.id, period='2025-06')
+
+        assert len(db.session.identity_map) == 0
+        assert len(rows) == len(expected)
+        for row in rows:
+            assert (row.employee.full_name, row.employee.employee_id, row.gross_pay,
+                    row.net_pay, row.month_year) == expected[row.id]
+        assert not hasattr(rows[0], '__dict__')
+
+
+def test_payroll_rows_filters(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        verified_payroll(company)
+
+        assert [r.employee_id for r in ReportQuery.payroll_rows(company.id, employee_id=monthly.id)] == [monthly.id]
+        assert ReportQuery.payroll_rows(company.id, period='2025-05') == []
+
+        PayrollEntry.query.update({'is_verified': False})
+        db.session.commit()
+        assert ReportQuery.payroll_rows(company.id) == []
+        assert len(ReportQuery.payroll_rows(company.id, verified_only=False)) == 2
+
+
+def test_dashboard_stats_aggregates_payroll_in_sql(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        today = date.today()
+        PayrollBatchCalculator(company.id, today.replace(day=1), today.replace(day=28)).run()
+        entry = PayrollEntry.query.filter_by(employee_id=monthly.id).one()
+        entry.is_verified = True
+        db.session.commit()
+
+        stats = EmployeeService.get_dashboard_stats(company.id)
+
+        assert stats['total_monthly_payroll'] == float(entry.net_pay)
+        assert stats['unverified_entries'] == 1
+
+
+def test_period_history_uses_two_queries(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        for month in (3, 4, 5, 6):
+            PayrollBatchCalculator(company.id, date(2025, month, 1), date(2025, month, 28)).run()
+        expected_gross = sum(e.gross_pay for e in PayrollEntry.query.filter_by(month_year='2025-05'))
+
+        with QueryCounter(db.engine) as counter:
+            summaries, entries = ReportQuery.period_history(company.id, before='2025-06', limit=2)
+
+        assert counter.count == 2
+        assert [s.period for s in summaries] == ['2025-05', '2025-04']
+        assert summaries[0].employee_count == 2
+        assert summaries[0].gross_pay == expected_gross
+        assert {p: len(rows) for p, rows in entries.items()} == {'2025-05': 2, '2025-04': 2}
+        assert ReportQuery.period_totals(company.id, '2025-06')['employee_count'] == 2
@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from app import db
+from app.models import CacheVersion, Company, SARSConfig
+from app.services.sars_config_resolver import VERSION_NAME
+from app.services.sars_service import SARSService
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args, **kwargs):
+        self.count += 1
+
+
+def create_companies(count):
+    companies = [Company(name=f'Co {i}') for i in range(count)]
+    db.session.add_all(companies)
+    db.session.commit()
+    return companies
+
+
+def test_resolve_is_read_only_and_cached(app):
+    with app.app_context():
+        company = create_companies(1)[0]
+
+        config = SARSService.get_company_sars_config(company.id)
+        assert config['tax_authority_name'] == 'SARS'
+        assert SARSConfig.query.count() == 0
+
+        with QueryCounter(db.engine) as counter:
+            again = SARSService.get_company_sars_config(company.id)
+        assert counter.count == 0
+        assert again == config
+
+
+def test_update_bumps_version(app):
+    with app.app_context():
+        company = create_companies(1)[0]
+        assert SARSService.get_company_sars_config(company.id)['uif_salary_cap'] == Decimal('17712.00')
+
+        SARSService.update_company_sars_config(company.id, uif_salary_cap='20000')
+
+        assert SARSService.get_company_sars_config(company.id)['uif_salary_cap'] == Decimal('20000')
+
+
+def test_resolve_many_uses_single_override_query(app):
+    with app.app_context():
+        companies = create_companies(5)
+        SARSService.update_company_sars_config(companies[0].id, currency_symbol='$')
+        ids = [c.id for c in companies]
+        SARSService.get_global_sars_config()
+
+        with QueryCounter(db.engine) as counter:
+            configs = SARSService.get_company_sars_configs(ids)
+        # One query for the global config and one for all company overrides
+        assert counter.count == 2
+        assert configs[ids[0]]['currency_symbol'] == '$'
+        assert all(configs[i]['currency_symbol'] == 'R' for i in ids[1:])
+
+
+def test_other_processes_see_a_bump_once_their_version_expires(app):
+    with app.app_context():
+        company = create_companies(1)[0]
+        assert SARSService.get_company_sars_config(company.id)['currency_symbol'] == 'R'
+
+        # Another process commits an override and bumps the shared version
+        db.session.add(SARSConfig(company_id=company.id, currency_symbol='$'))
+        db.session.commit()
+        with db.engine.begin() as connection:
+            connection.execute(CacheVersion.__table__.insert(), {'name': VERSION_NAME, 'version': 42})
+
+        assert SARSService.get_company_sars_config(company.id)['currency_symbol'] == 'R'
+        app.config['CACHE_VERSION_TTL'] = 0
+        assert SARSService.get_company_sars_config(company.id)['currency_symbol'] == '$'
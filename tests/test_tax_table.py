@@ -0,0 +1,96 @@
+from decimal import Decimal
+
+from sqlalchemy import insert, update
+
+from app import db
+from app.models import CacheVersion, GlobalSARSConfig, TaxTable, TaxBracket
+from app.services.tax_table_service import VERSION_NAME, TaxTableService
+
+
+def legacy_paye(gross):
+    """The hard-coded 2024/2025 bracket chain the tax tables replace."""
+    if gross <= Decimal('7100'):
+        return Decimal('0')
+    elif gross <= Decimal('11000'):
+        return (gross - Decimal('7100')) * Decimal('0.18')
+    elif gross <= Decimal('17500'):
+        return Decimal('702') + (gross - Decimal('11000')) * Decimal('0.26')
+    elif gross <= Decimal('27000'):
+        return Decimal('2392') + (gross - Decimal('17500')) * Decimal('0.31')
+    elif gross <= Decimal('39000'):
+        return Decimal('5337') + (gross - Decimal('27000')) * Decimal('0.36')
+    elif gross <= Decimal('55000'):
+        return Decimal('9657') + (gross - Decimal('39000')) * Decimal('0.39')
+    return Decimal('15897') + (gross - Decimal('55000')) * Decimal('0.41')
+
+
+def test_default_table_matches_legacy_brackets(app):
+    with app.app_context():
+        TaxTableService.clear_cache()
+        db.session.add(TaxTable.create_default())
+        db.session.commit()
+
+        for gross in ['0', '5000', '7100', '7100.01', '11000', '15000.50', '27000', '38999.99', '55000', '120000']:
+            value = Decimal(gross)
+            assert TaxTableService.calculate_paye(value, '2024/2025') == legacy_paye(value)
+
+
+def test_switching_tax_year_is_a_data_change(app):
+    with app.app_context():
+        TaxTableService.clear_cache()
+        config = GlobalSARSConfig.get_current()
+        config.tax_year_display = '2026/2027'
+        table = TaxTable(tax_year='2026/2027')
+        table.brackets = [
+            TaxBracket(threshold=Decimal('0'), rate=Decimal('0')),
+            TaxBracket(threshold=Decimal('10000'), rate=Decimal('0.20')),
+        ]
+        db.session.add(table)
+        db.session.commit()
+
+        assert TaxTableService.calculate_paye(Decimal('15000')) == Decimal('1000')
+
+        # Editing the brackets invalidates the compiled table
+        table.brackets[1].rate = Decimal('0.10')
+        db.session.commit()
+        assert TaxTableService.calculate_paye(Decimal('15000')) == Decimal('500')
+
+
+def test_default_brackets_for_an_unknown_year_are_not_cached(app):
+    with app.app_context():
+        TaxTableService.clear_cache()
+        assert TaxTableService.calculate_paye(Decimal('15000'), '2030/2031') == legacy_paye(Decimal('15000'))
+
+        # Another process adds the year's table
+        with db.engine.begin() as connection:
+            table_id = connection.execute(insert(TaxTable).returning(TaxTable.id),
+                                          {'tax_year': '2030/2031', 'is_active': True}).scalar_one()
+            connection.execute(insert(TaxBracket), [
+                {'tax_table_id': table_id, 'threshold': Decimal('0'), 'rate': Decimal('0')},
+                {'tax_table_id': table_id, 'threshold': Decimal('10000'), 'rate': Decimal('0.20')},
+            ])
+
+        assert TaxTableService.calculate_paye(Decimal('15000'), '2030/2031') == Decimal('1000')
+
+
+def test_compiled_tables_follow_versions_bumped_by_other_processes(app):
+    with app.app_context():
+        table = TaxTable(tax_year='2026/2027')
+        table.brackets = [
+            TaxBracket(threshold=Decimal('0'), rate=Decimal('0')),
+            TaxBracket(threshold=Decimal('10000'), rate=Decimal('0.20')),
+        ]
+        db.session.add(table)
+        db.session.commit()
+        assert TaxTableService.calculate_paye(Decimal('15000'), '2026/2027') == Decimal('1000')
+
+        # Another process edits a bracket and bumps the shared version
+        with db.engine.begin() as connection:
+            connection.execute(update(TaxBracket).where(TaxBracket.id == table.brackets[1].id)
+                               .values(rate=Decimal('0.10')))
+            connection.execute(update(CacheVersion).where(CacheVersion.name == VERSION_NAME)
+                               .values(version=CacheVersion.version + 1))
+
+        assert TaxTableService.calculate_paye(Decimal('15000'), '2026/2027') == Decimal('1000')
+        app.config['CACHE_VERSION_TTL'] = 0
+        assert TaxTableService.calculate_paye(Decimal('15000'), '2026/2027') == Decimal('500')
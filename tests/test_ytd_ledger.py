@@ -0,0 +1,90 @@
+from datetime import date
+
+from app import db
+from app.models import PayrollEntry, User, YtdLedger
+from app.models.ytd_ledger import tax_year_for
+from app.services.payroll_batch_service import PayrollBatchCalculator
+from app.services.payroll_service import calculate_ytd_totals, get_ytd_totals, sum_ytd_totals
+from tests.test_payroll_batch import setup_company
+from tests.test_sars_config_resolver import QueryCounter
+
+
+def finalized_months(company, months):
+    for year, month in months:
+        PayrollBatchCalculator(company.id, date(year, month, 1), date(year, month, 28)).run()
+    for entry in PayrollEntry.query.all():
+        entry.is_finalized = True
+    db.session.commit()
+
+
+def test_tax_year_for():
+    assert tax_year_for(date(2025, 3, 1)) == 2025
+    assert tax_year_for(date(2026, 2, 28)) == 2025
+
+
+def test_ledger_follows_finalized_entries(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        finalized_months(company, [(2025, 2), (2025, 3), (2025, 4)])
+
+        ledger = YtdLedger.query.filter_by(employee_id=monthly.id, tax_year=2025).one()
+        assert ledger.periods == 2
+        assert ledger.gross_pay == 20000
+        assert YtdLedger.query.filter_by(employee_id=monthly.id, tax_year=2024).one().periods == 1
+
+        with QueryCounter(db.engine) as counter:
+            totals = get_ytd_totals(company.id, 2025)
+        assert counter.count == 1
+        assert totals[monthly.id] == calculate_ytd_totals(monthly.id, date(2025, 3, 1))
+        assert totals[monthly.id] == sum_ytd_totals(date(2025, 3, 1), date(2026, 2, 28), company_id=company.id)[monthly.id]
+
+        april = PayrollEntry.query.filter_by(employee_id=monthly.id, month_year='2025-04').one()
+        april.is_finalized = False
+        db.session.commit()
+        assert get_ytd_totals(company.id, 2025)[monthly.id]['gross_pay_ytd'] == 10000.0
+
+        db.session.delete(PayrollEntry.query.filter_by(employee_id=monthly.id, month_year='2025-03').one())
+        db.session.commit()
+        assert monthly.id not in get_ytd_totals(company.id, 2025)
+
+
+def test_rebuild_matches_incremental_ledger(app):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        finalized_months(company, [(2025, 3), (2025, 4)])
+        before = {row.employee_id: row.to_dict() for row in YtdLedger.query.all()}
+
+        YtdLedger.query.delete()
+        YtdLedger.rebuild(company.id)
+        db.session.commit()
+
+        after = {row.employee_id: row.to_dict() for row in YtdLedger.query.all()}
+        for values in list(before.values()) + list(after.values()):
+            values.pop('updated_at')
+        assert after == before
+
+
+def test_deleting_an_employee_removes_their_ledger_rows(app, client):
+    with app.app_context():
+        company, monthly, hourly = setup_company()
+        finalized_months(company, [(2025, 6)])
+        user = User(email='ledger-delete@example.com', is_accountant=True)
+        user.password_hash = 'unused'
+        user.companies.append(company)
+        db.session.add(user)
+        db.session.commit()
+        user_id, company_id, employee_id, other_id = user.id, company.id, hourly.id, monthly.id
+        assert employee_id in get_ytd_totals(company_id, 2025)
+    with client.session_transaction() as flask_session:
+        flask_session['_user_id'] = str(user_id)
+        flask_session['_fresh'] = True
+        flask_session['selected_company_id'] = company_id
+
+    response = client.post(f'/employees/{employee_id}/delete')
+
+    assert response.status_code == 302
+    with app.app_context():
+        assert YtdLedger.query.filter_by(employee_id=employee_id).count() == 0
+        totals = get_ytd_totals(company_id, 2025)
+        assert employee_id not in totals
+        assert other_id in totals